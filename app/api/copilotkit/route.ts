@@ -17,7 +17,14 @@ const serviceAdapter = new OpenAIAdapter({openai});
 const runtime = new CopilotRuntime({
   remoteEndpoints: [
     // Our CrewAI Flow endpoint URL
-    { url: "http://localhost:8000/copilotkit" },
+    {
+      url: "http://localhost:8000/copilotkit",
+      // Pass the signed-in user's token on, the backend rate limits agents per user
+      onBeforeRequest: ({ ctx }) => {
+        const token = ctx.properties?.authorization;
+        return { headers: token ? { Authorization: `Bearer ${token}` } : {} };
+      },
+    },
   ],
 });
  
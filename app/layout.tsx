@@ -1,11 +1,11 @@
 "use client" // Make this a client component to use hooks
 
-import React, { useEffect } from "react"
+import React, { useEffect, useState } from "react"
 import { Inter } from "next/font/google"
 import "./globals.css"
 import { ThemeProvider } from "@/components/theme-provider"
 import { CopilotKit } from "@copilotkit/react-core"
-import { authService } from "@/app/services/auth"
+import { authService, AUTH_TOKEN_CHANGED_EVENT } from "@/app/services/auth"
 import { logger } from "@/lib/logger"
 
 const inter = Inter({ subsets: ["latin"] })
@@ -15,25 +15,38 @@ export default function RootLayout({
 }: {
   children: React.ReactNode
 }) {
+  // Token the copilot runtime forwards to the agents, so they can tell users apart
+  const [token, setToken] = useState<string | null>(null)
+
+  // Follow the token through login, logout and refreshes, in this tab and others
+  useEffect(() => {
+    const syncToken = () => setToken(authService.getToken());
+    syncToken();
+    window.addEventListener(AUTH_TOKEN_CHANGED_EVENT, syncToken);
+    window.addEventListener("storage", syncToken);
+    return () => {
+      window.removeEventListener(AUTH_TOKEN_CHANGED_EVENT, syncToken);
+      window.removeEventListener("storage", syncToken);
+    };
+  }, []);
+
   // Proactive token refresh check - runs for all pages
   useEffect(() => {
-    // Only check if user is authenticated
-    if (authService.isAuthenticated()) {
-      // Check immediately on mount
+    // Check immediately on mount, a no-op until the user logs in
+    authService.checkAndRefreshTokenIfNeeded();
+
+    // Set interval to check periodically (e.g., every 60 seconds)
+    const intervalId = setInterval(() => {
+      if (!authService.isAuthenticated()) return;
+      logger.info("Running periodic token check...");
       authService.checkAndRefreshTokenIfNeeded();
+    }, 60 * 1000); // 60000 ms = 1 minute
 
-      // Set interval to check periodically (e.g., every 60 seconds)
-      const intervalId = setInterval(() => {
-        logger.info("Running periodic token check...");
-        authService.checkAndRefreshTokenIfNeeded();
-      }, 60 * 1000); // 60000 ms = 1 minute
-
-      // Clear interval on component unmount
-      return () => {
-        logger.info("Clearing token check interval.");
-        clearInterval(intervalId);
-      };
-    }
+    // Clear interval on component unmount
+    return () => {
+      logger.info("Clearing token check interval.");
+      clearInterval(intervalId);
+    };
   }, []); // Empty dependency array ensures this runs only once on mount
 
   return (
@@ -42,6 +55,7 @@ export default function RootLayout({
         <ThemeProvider attribute="class" defaultTheme="light" enableSystem={false} disableTransitionOnChange>
           <CopilotKit
             runtimeUrl="/api/copilotkit"
+            properties={token ? { authorization: token } : {}}
           >
             {children}
           </CopilotKit>
@@ -4,6 +4,12 @@ import { logger } from '@/lib/logger';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 const TOKEN_EXPIRY_THRESHOLD_MINUTES = 5; // Refresh token if it expires within 5 minutes
+// Dispatched on window whenever this tab stores or removes the token
+export const AUTH_TOKEN_CHANGED_EVENT = 'auth-token-changed';
+
+const notifyTokenChanged = () => {
+  window.dispatchEvent(new Event(AUTH_TOKEN_CHANGED_EVENT));
+};
 
 // --- Helper function outside the service ---
 // Function to decode JWT and check expiration (remains outside as it doesn't depend on service state)
@@ -81,6 +87,7 @@ class AuthService {
       if (newToken) {
         logger.info('Token refreshed successfully.');
         localStorage.setItem('token', newToken);
+        notifyTokenChanged();
         this.onRefreshed(newToken);
         return newToken;
       } else {
@@ -112,6 +119,7 @@ class AuthService {
       if (response.data.access_token) {
         logger.info('Login successful, token received.');
         localStorage.setItem('token', response.data.access_token);
+        notifyTokenChanged();
       } else {
         logger.warn('Login response did not contain access token.');
       }
@@ -129,6 +137,7 @@ class AuthService {
       if (response.data.access_token) {
         logger.info('Signup successful, token received.');
         localStorage.setItem('token', response.data.access_token);
+        notifyTokenChanged();
       } else {
         logger.warn('Signup response did not contain access token.');
       }
@@ -142,6 +151,7 @@ class AuthService {
   logout() {
     logger.info('Logging out, removing token.');
     localStorage.removeItem('token');
+    notifyTokenChanged();
     // Optionally redirect
     // setTimeout(() => window.location.href = '/', 100);
   }
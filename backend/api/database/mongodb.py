@@ -1,8 +1,10 @@
 import os
 from pymongo import MongoClient
+from pymongo.errors import PyMongoError
 from pymongo.operations import SearchIndexModel
 from dotenv import load_dotenv
 from ..utils.logger import logger
+from ..utils.instrumentation import mongo_command_listener
 load_dotenv()
 
 class MongoDB:
@@ -16,7 +18,7 @@ class MongoDB:
             mongodb_url = os.getenv("MONGODB_URL")
             database_name = os.getenv("DATABASE_NAME")
             
-            cls.client = MongoClient(mongodb_url)
+            cls.client = MongoClient(mongodb_url, event_listeners=[mongo_command_listener])
             cls.db = cls.client[database_name]
             
             logger.info("Mongo Check Complete")
@@ -32,4 +34,19 @@ class MongoDB:
 
     @classmethod
     def get_db(cls):
-        return cls.db 
\ No newline at end of file
+        return cls.db
+
+    @classmethod
+    def ensure_search_index(cls, collection_name: str, name: str, definition: dict) -> bool:
+        """Create an Atlas Search index unless it exists, True once it can be queried"""
+        collection = cls.db[collection_name]
+        try:
+            indexes = list(collection.list_search_indexes(name))
+            if not indexes:
+                collection.create_search_index(SearchIndexModel(definition=definition, name=name))
+                logger.info(f"Creating search index {name} on {collection_name}")
+                return False
+            return bool(indexes[0].get("queryable"))
+        except PyMongoError as e:
+            logger.warning(f"Atlas Search unavailable for {collection_name}: {e}")
+            return False 
\ No newline at end of file
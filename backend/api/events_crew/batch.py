@@ -0,0 +1,73 @@
+"""
+Batch event insights with EventsCrew.
+
+The crew is built once per batch and copied for every event (what crewAI's
+kickoff_for_each_async does too, the YAML and agent setup is the expensive
+part), and at most EVENTS_CREW_CONCURRENCY events run at a time. Event, food
+and license data of the whole batch is read up front in one aggregation, and
+the GetEventInformation tool is served from that prefetch, memoized per event.
+
+Results are yielded as each event finishes, e.g. to stream them as NDJSON.
+"""
+import os
+import json
+import time
+import asyncio
+from typing import AsyncIterator, List, Optional
+from .crew import EventsCrew
+from .tools.get_event_infromation import EventPrefetch, event_lookups
+from ..utils.logger import logger
+from ..utils.metrics import registry
+
+EVENTS_CREW_CONCURRENCY = int(os.getenv("EVENTS_CREW_CONCURRENCY", "4"))
+
+batch_events = registry.counter("events_crew_batch_events_total", "Events run through batch insights", ("outcome",))
+batch_event_seconds = registry.histogram("events_crew_batch_event_seconds", "Crew run time per event of a batch")
+
+async def run_batch(event_ids: List[str], concurrency: int = EVENTS_CREW_CONCURRENCY,
+                    user_id: Optional[str] = None) -> AsyncIterator[dict]:
+    """One result per event id, in completion order"""
+    prefetch = await asyncio.to_thread(EventPrefetch.load, event_ids, user_id)
+    template = EventsCrew().crew()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(event_id: str) -> dict:
+        info = prefetch.get(event_id)
+        if info is None:
+            batch_events.inc(outcome="not_found")
+            return {"eventId": event_id, "success": False, "error": "Event not found"}
+        async with semaphore:
+            start = time.perf_counter()
+            with event_lookups(prefetch, user_id) as lookups:
+                try:
+                    output = await template.copy().kickoff_async(inputs={
+                        "event_id": event_id,
+                        "event_name": info["event"]["name"],
+                    })
+                except Exception as e:
+                    batch_events.inc(outcome="error")
+                    logger.error(f"Event insight failed for {event_id}: {e}")
+                    return {"eventId": event_id, "success": False, "error": str(e), "lookups": lookups.report()}
+                finally:
+                    batch_event_seconds.observe(time.perf_counter() - start)
+        batch_events.inc(outcome="success")
+        return {
+            "eventId": event_id,
+            "eventName": info["event"]["name"],
+            "success": True,
+            "insight": output.raw,
+            "lookups": lookups.report(),
+        }
+
+    tasks = [asyncio.create_task(run_one(event_id)) for event_id in dict.fromkeys(event_ids)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # Consumer went away (e.g. client disconnected): don't start what is left
+        for task in tasks:
+            task.cancel()
+
+async def ndjson_lines(results: AsyncIterator[dict]) -> AsyncIterator[str]:
+    async for result in results:
+        yield json.dumps(result, default=str) + "\n"
@@ -1,6 +1,6 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
-from .tools.get_event_infromation import GetEventInformation
+from .tools.get_event_infromation import GetEventInformation, run_lookups
 
 # If you want to run a snippet of code before or after the crew starts, 
 # you can use the @before_kickoff and @after_kickoff decorators
@@ -8,6 +8,15 @@ from .tools.get_event_infromation import GetEventInformation
 
 
 get_event_information = GetEventInformation()
+
+class LookupScopedCrew(Crew):
+	"""Crew whose runs memoize tool lookups for the user_id in their inputs"""
+	def kickoff(self, inputs=None):
+		# Around the whole run rather than in before/after kickoff hooks, so a
+		# failed run does not leave its memo to the next one in this context
+		with run_lookups((inputs or {}).get("user_id")):
+			return super().kickoff(inputs)
+
 @CrewBase
 class EventsCrew():
 	"""Events crew"""
@@ -59,7 +68,9 @@ class EventsCrew():
 		# To learn how to add knowledge sources to your crew, check out the documentation:
 		# https://docs.crewai.com/concepts/knowledge#what-is-knowledge
 
-		return Crew(
+		# Tool results are memoized for the duration of a run, and only cover
+		# events of the user_id passed in the inputs
+		return LookupScopedCrew(
 			agents=self.agents, # Automatically created by the @agent decorator
 			tasks=self.tasks, # Automatically created by the @task decorator
 			process=Process.sequential,
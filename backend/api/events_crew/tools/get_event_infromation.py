@@ -1,34 +1,286 @@
+import os
+import re
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from crewai.tools import BaseTool
-from typing import Type
+from typing import Dict, Iterable, List, Optional, Tuple, Type
 from pydantic import BaseModel, Field
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+from ...database.mongodb import MongoDB
+from ...utils.logger import logger
+from ...utils.metrics import registry
+from ...utils.vendor_directory import vendor_directory
 
+# Rough size limit of one tool result, in tokens (about 4 characters each)
+EVENT_INFO_TOKEN_BUDGET = int(os.getenv("EVENT_INFO_TOKEN_BUDGET", "1500"))
+
+LICENSE_FIELDS = ("name", "type", "status", "dueDate", "issuingAuthority", "cost", "documents")
+
+event_info_calls = registry.counter("event_info_calls_total", "GetEventInformation calls", ("source",))
+event_info_seconds = registry.histogram("event_info_call_seconds", "GetEventInformation call time", ("source",))
+event_info_trimmed = registry.counter("event_info_trimmed_total", "GetEventInformation results trimmed to the token budget")
+
+def event_information(event: dict, food: Optional[dict], licenses: List[dict]) -> dict:
+    """What the agent gets to see about an event"""
+    food = food or {}
+    return {
+        "event": {
+            "id": str(event["_id"]),
+            "name": event.get("eventName"),
+            "description": event.get("description"),
+            "date": event.get("dateTime"),
+            "endDate": event.get("endDate"),
+            "location": event.get("location"),
+            "attendees": event.get("attendees"),
+            "sustainable": event.get("sustainable"),
+        },
+        "food": {
+            "summary": food.get("summary"),
+            "menu_items": food.get("menu_items", []),
+            "beverages": food.get("beverages", []),
+            "vendors": food.get("vendors", []),
+        },
+        "licenses": [{field: license.get(field) for field in LICENSE_FIELDS} for license in licenses],
+    }
+
+_indexed = False
+
+def _events():
+    global _indexed
+    db = MongoDB.get_db()
+    if not _indexed:
+        db.events.create_index("eventName")
+        # The one text index of the collection, name matches weigh most
+        db.events.create_index(
+            [("eventName", "text"), ("location", "text"), ("description", "text")],
+            name="events_text",
+            weights={"eventName": 10, "location": 2, "description": 1},
+        )
+        db.event_food.create_index("event_id")
+        db.licenses.create_index("eventId")
+        _indexed = True
+    return db.events
+
+def load_event_information(match: dict) -> List[dict]:
+    """
+    Events matching `match` joined with their food plan and licenses, in one
+    aggregation, and the vendors of all of them from the directory in one query
+    """
+    # $lookup stays within the events database (eventflow_db, where the agents keep event_food and licenses)
+    pipeline = [
+        {"$match": match},
+        {"$lookup": {"from": "event_food", "localField": "_id", "foreignField": "event_id", "as": "_food"}},
+        {"$addFields": {"_eventKey": {"$toString": "$_id"}}},
+        {"$lookup": {"from": "licenses", "localField": "_eventKey", "foreignField": "eventId", "as": "_licenses"}},
+    ]
+    events = list(_events().aggregate(pipeline))
+    foods = vendor_directory.hydrate([event["_food"][0] for event in events if event["_food"]])
+    food_by_event = {food["event_id"]: food for food in foods}
+    return [event_information(event, food_by_event.get(event["_id"]), event["_licenses"]) for event in events]
+
+def resolve_event_id(argument: str, user_id: str) -> Tuple[Optional[ObjectId], int]:
+    """
+    Event id for an id, an exact or leading part of one of the user's event
+    names, or the best text match, and the number of queries that took. An id
+    is returned as is, loading the event checks it belongs to the user.
+    """
+    argument = argument.strip()
+    scope = {"userId": user_id}
+    if ObjectId.is_valid(argument):
+        return ObjectId(argument), 0
+    events = _events()
+    event = events.find_one({**scope, "eventName": argument}, {"_id": 1})
+    if event is not None:
+        return event["_id"], 1
+    # Anchored and case-sensitive, so it is a range scan of the eventName index
+    event = events.find_one(
+        {**scope, "eventName": {"$regex": f"^{re.escape(argument)}"}}, {"_id": 1}, sort=[("eventName", 1)]
+    )
+    if event is not None:
+        return event["_id"], 2
+    try:
+        event = events.find_one(
+            {**scope, "$text": {"$search": argument}},
+            {"_id": 1, "score": {"$meta": "textScore"}},
+            sort=[("score", {"$meta": "textScore"})],
+        )
+    except OperationFailure as e:
+        logger.warning(f"Event text search unavailable: {e}")
+    return (event["_id"] if event else None), 3
+
+def estimate_tokens(payload) -> int:
+    return len(json.dumps(payload, default=str)) // 4 + 1
+
+def trim_to_budget(info: dict, budget: int) -> dict:
+    """
+    Fit an event information payload into `budget` tokens: halve the largest
+    list (menu items, beverages, vendors, licenses) until it fits, then cut the
+    description. Counts of the dropped items are kept under "omitted".
+    """
+    if estimate_tokens(info) <= budget:
+        return info
+    info = {"event": dict(info["event"]), "food": dict(info["food"]), "licenses": info["licenses"]}
+    sections = [(info["food"], "menu_items"), (info["food"], "beverages"), (info["food"], "vendors"), (info, "licenses")]
+    omitted: Dict[str, int] = {}
+    while estimate_tokens(info) > budget:
+        candidates = [(section, key) for section, key in sections if len(section[key]) > 1]
+        if not candidates:
+            break
+        section, key = max(candidates, key=lambda candidate: estimate_tokens(candidate[0][candidate[1]]))
+        items = section[key]
+        keep = len(items) // 2
+        omitted[key] = omitted.get(key, 0) + len(items) - keep
+        section[key] = items[:keep]
+    if omitted:
+        info["omitted"] = omitted
+    excess = estimate_tokens(info) - budget
+    description = info["event"]["description"] or ""
+    if excess > 0 and description:
+        info["event"]["description"] = description[:max(0, len(description) - excess * 4 - 1)] + "…"
+    event_info_trimmed.inc()
+    return info
+
+class EventPrefetch:
+    """Event, food and license data of a batch of events, read in one aggregation"""
+    def __init__(self, infos: Dict[str, dict]):
+        self.infos = infos
+        self._by_name = {info["event"]["name"].strip().lower(): info for info in infos.values() if info["event"]["name"]}
+
+    @classmethod
+    def load(cls, event_ids: Iterable[str], user_id: Optional[str] = None) -> "EventPrefetch":
+        match = {"_id": {"$in": [ObjectId(event_id) for event_id in event_ids if ObjectId.is_valid(event_id)]}}
+        if user_id is not None:
+            match["userId"] = user_id
+        return cls({info["event"]["id"]: info for info in load_event_information(match)})
+
+    def get(self, key: str) -> Optional[dict]:
+        """By event id or, case-insensitively, by event name"""
+        return self.infos.get(key.strip()) or self._by_name.get(key.strip().lower())
+
+class EventLookups:
+    """
+    GetEventInformation results of one crew run, memoized by argument and by
+    event, and a report of every call. Only events of `user_id` are found;
+    without a user nothing is.
+    """
+    def __init__(self, prefetch: Optional[EventPrefetch] = None, user_id: Optional[str] = None,
+                 token_budget: int = EVENT_INFO_TOKEN_BUDGET):
+        self.prefetch = prefetch
+        self.user_id = user_id
+        self.token_budget = token_budget
+        self.calls: List[dict] = []
+        self._results: Dict[str, str] = {}
+        self._by_event: Dict[str, str] = {}
+
+    def _render(self, info: Optional[dict], argument: str) -> str:
+        if info is None:
+            return f"No event found for '{argument}'."
+        return json.dumps(trim_to_budget(info, self.token_budget), default=str)
+
+    def _load(self, argument: str) -> Tuple[str, str, int]:
+        """Result, where it came from and the number of Mongo queries"""
+        if self.prefetch is not None:
+            info = self.prefetch.get(argument)
+            if info is not None:
+                result = self._by_event.get(info["event"]["id"])
+                if result is not None:
+                    return result, "memo", 0
+                result = self._by_event[info["event"]["id"]] = self._render(info, argument)
+                return result, "prefetch", 0
+        if self.user_id is None:
+            logger.warning(f"Event lookup for '{argument}' without a user")
+            return self._render(None, argument), "no_user", 0
+        event_id, queries = resolve_event_id(argument, self.user_id)
+        if event_id is None:
+            return self._render(None, argument), "mongo", queries
+        # Another name for an event this run already looked up
+        result = self._by_event.get(str(event_id))
+        if result is not None:
+            return result, "memo", queries
+        infos = load_event_information({"_id": event_id, "userId": self.user_id})
+        result = self._render(infos[0] if infos else None, argument)
+        if infos:
+            self._by_event[str(event_id)] = result
+        return result, "mongo", queries + 1
+
+    def lookup(self, argument: str) -> str:
+        start = time.perf_counter()
+        key = argument.strip().lower()
+        result = self._results.get(key)
+        if result is not None:
+            source, queries = "memo", 0
+        else:
+            result, source, queries = self._load(argument)
+            self._results[key] = result
+        elapsed = time.perf_counter() - start
+        event_info_calls.inc(source=source)
+        event_info_seconds.observe(elapsed, source=source)
+        self.calls.append({
+            "argument": argument,
+            "source": source,
+            "queries": queries,
+            "ms": round(elapsed * 1000, 3),
+            "tokens": estimate_tokens(result),
+        })
+        return result
+
+    def report(self) -> dict:
+        hits = sum(call["source"] == "memo" for call in self.calls)
+        return {
+            "calls": len(self.calls),
+            "cacheHits": hits,
+            "hitRate": round(hits / len(self.calls), 3) if self.calls else 0.0,
+            "queries": sum(call["queries"] for call in self.calls),
+            "totalMs": round(sum(call["ms"] for call in self.calls), 3),
+            "perCall": self.calls,
+        }
+
+# Lookups of the crew run in the current context
+_event_lookups: ContextVar[Optional[EventLookups]] = ContextVar("event_lookups", default=None)
+
+@contextmanager
+def event_lookups(prefetch: Optional[EventPrefetch] = None, user_id: Optional[str] = None):
+    """Memo for the crew run(s) started inside, kickoff_async's worker thread inherits it"""
+    lookups = EventLookups(prefetch, user_id)
+    token = _event_lookups.set(lookups)
+    try:
+        yield lookups
+    finally:
+        _event_lookups.reset(token)
+
+@contextmanager
+def run_lookups(user_id: Optional[str] = None):
+    """
+    Memo for one crew run, for the user of its inputs. Inside event_lookups()
+    (batches) the caller's memo is used as is.
+    """
+    current = _event_lookups.get()
+    if current is not None:
+        yield current
+        return
+    with event_lookups(user_id=user_id) as lookups:
+        try:
+            yield lookups
+        finally:
+            report = lookups.report()
+            logger.info("Event information lookups", extra={"fields": {k: v for k, v in report.items() if k != "perCall"}})
 
 class GetEventInformationInput(BaseModel):
-    """Input schema for MyCustomTool."""
-    argument: str = Field(..., description="Name of the Event")
+    """Input schema for GetEventInformation."""
+    argument: str = Field(..., description="Name or id of the event")
 
 class GetEventInformation(BaseTool):
-    name: str = "Name of my tool"
+    name: str = "get_event_information"
     description: str = (
-        "Clear description for what this tool is useful for, your agent will need this information to use it."
+        "Look up an event by its name or id. Returns the event details, its food plan "
+        "(menu items, beverages, vendors) and its licenses as JSON."
     )
     args_schema: Type[BaseModel] = GetEventInformationInput
 
     def _run(self, argument: str) -> str:
-        # Implementation goes here
-        mock_response_event = """
-        {
-            "event": {
-                "name": "Customer Exeperience Event",
-                "description": "Product Launch Event",
-                "date": "2023-08-01",
-                "location": "Raleigh",
-                "food": [
-                    {
-                        "name": "Food Item 1",
-                        "quantity": 10,
-                        "unit": "units"
-                    }
-        }
-        """
-        return mock_response_event
+        lookups = _event_lookups.get()
+        # Outside a crew run there is no user to scope the lookup to, it finds nothing
+        return (lookups or EventLookups()).lookup(argument)
@@ -4,13 +4,26 @@ from .routes.auth import router as auth_router
 from .routes.events import router as events_router
 from .routes.food import router as food_router
 from .routes.licenses import router as licenses_router
+from .routes.metrics import router as metrics_router
+from .routes.blobs import router as blobs_router
+from .routes.search import router as search_router
+from .routes.analytics import router as analytics_router
+from .routes.vendors import router as vendors_router
 from .database.mongodb import MongoDB
+from .utils.event_stats import event_stats
+from .utils.license_reminders import license_reminders
+from .utils.instrumentation import RequestMetricsMiddleware
+from .utils.rate_limit import RateLimitMiddleware, rate_limit_rules, rate_limit_store, llm_admission, LLMOverloadedError, llm_overloaded_handler
 from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
 from copilotkit.integrations.fastapi import add_fastapi_endpoint
 from copilotkit import CopilotKitRemoteEndpoint
 from copilotkit import LangGraphAgent
 from .langgraph.license_agent.agent import graph as licenses_graph
 from .langgraph.food_agent.agent import graph as food_graph
+from .langgraph.food_agent.catalog import get_food_index
+from .langgraph.food_agent.search import FOOD_INDEX_ENABLED
+from .utils.logger import logger
 
 
 
@@ -18,10 +31,31 @@ from .langgraph.food_agent.agent import graph as food_graph
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     MongoDB.connect_db()
+    # opens, or rebuilds, the food catalog index before the first food search needs it
+    if FOOD_INDEX_ENABLED:
+        try:
+            await run_in_threadpool(get_food_index)
+        except Exception as e:
+            logger.error(f"Food catalog index unavailable, searches go to the LLM: {e}")
+    # moves events between the dashboard status counters as their start and end pass
+    event_stats.start()
+    # wakes at the next license reminder and writes per-user digests
+    license_reminders.start()
     yield
+    license_reminders.stop()
+    event_stats.stop()
     MongoDB.close_db()
 
 app = FastAPI(lifespan=lifespan)
+# per-user token buckets and LLM admission control, innermost so 429s still get CORS headers
+app.add_middleware(
+    RateLimitMiddleware,
+    rules=rate_limit_rules,
+    store=rate_limit_store,
+    admission=llm_admission,
+)
+# LLM calls that time out waiting for admission outside an agent node
+app.add_exception_handler(LLMOverloadedError, llm_overloaded_handler)
 # cors
 app.add_middleware(
     CORSMiddleware,
@@ -30,6 +64,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# request ids, latency histograms and structured request logs
+app.add_middleware(RequestMetricsMiddleware)
 
 sdk = CopilotKitRemoteEndpoint(
     agents=[
@@ -51,6 +87,11 @@ app.include_router(auth_router, prefix="/api/auth")
 app.include_router(events_router, prefix="/api/events", tags=["events"])
 app.include_router(food_router, prefix="/api/events", tags=["food"])
 app.include_router(licenses_router, prefix="/api/events", tags=["licenses"])
+app.include_router(blobs_router, prefix="/api/blobs", tags=["blobs"])
+app.include_router(search_router, prefix="/api/search", tags=["search"])
+app.include_router(analytics_router, prefix="/api/analytics", tags=["analytics"])
+app.include_router(vendors_router, prefix="/api/vendors", tags=["vendors"])
+app.include_router(metrics_router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,21 @@
+"""
+Shared helpers for emitting intermediate agent state to the CopilotKit frontend.
+"""
+import time
+from langchain_core.runnables import RunnableConfig
+from copilotkit.langgraph import copilotkit_emit_state
+from ..utils.profiling import run_profiler, config_run_id, payload_size
+
+async def emit_state(config: RunnableConfig, state):
+    """Emit the agent state, recording a profiler span when the run is sampled"""
+    run_id = config_run_id(config)
+    if not run_profiler.is_profiled(run_id):
+        return await copilotkit_emit_state(config, state)
+
+    start = time.perf_counter()
+    result = await copilotkit_emit_state(config, state)
+    run_profiler.record_span(
+        run_id, "copilotkit_emit_state", "emit", start, time.perf_counter() - start,
+        {"payload_bytes": payload_size(state), "messages": len(state.get("messages", []))}
+    )
+    return result
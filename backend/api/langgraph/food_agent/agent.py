@@ -12,6 +12,7 @@ from .chat import chat_node
 from .search import search_node
 from .foods import perform_foods_node
 from .state import AgentState
+from .intents import intent_router
 from .summary import summary_node
 
 # Route is responsible for determing the next node based on the last message. This
@@ -44,6 +45,7 @@ graph_builder = StateGraph(AgentState)
 
 
 
+graph_builder.add_node("intent_node", intent_router.node)
 graph_builder.add_node("chat_node", chat_node)
 graph_builder.add_node("foods_node", foods_node)
 graph_builder.add_node("search_node", search_node)
@@ -53,7 +55,9 @@ graph_builder.add_node("summary_node", summary_node)
 
 graph_builder.add_conditional_edges("chat_node", route, ["search_node", "chat_node", "foods_node", "summary_node", END])
 
-graph_builder.add_edge(START, "chat_node")
+# Confident requests skip the tool-picking chat_node call and go straight to the tool
+graph_builder.add_edge(START, "intent_node")
+graph_builder.add_conditional_edges("intent_node", intent_router.route, ["search_node", "summary_node", "chat_node"])
 graph_builder.add_edge("search_node", "chat_node")
 graph_builder.add_edge("perform_foods_node", "chat_node")
 graph_builder.add_edge("foods_node", "perform_foods_node")
@@ -0,0 +1,266 @@
+"""
+Local vector index over the curated food catalog, so search_for_food can be
+answered without an LLM round trip.
+
+Dishes are embedded offline with a hashed bag of words and character trigrams
+into a float32 matrix saved as .npy and memory-mapped at query time. `type` and
+`dietary` filters are precomputed as packed bitmasks, one row per attribute
+value, and so is the cuisine. A query is parsed into filters plus free text,
+masked, scored by cosine similarity and reduced with a top-k partial sort.
+
+Build (or rebuild after editing data/food_catalog.json):
+
+    cd backend && python -m api.langgraph.food_agent.catalog build
+"""
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import hashlib
+import threading
+from typing import List, Optional
+import numpy as np
+from ...utils.metrics import registry
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+CATALOG_PATH = os.path.join(DATA_DIR, "food_catalog.json")
+INDEX_DIR = os.getenv("FOOD_INDEX_DIR", os.path.join(DATA_DIR, "index"))
+EMBEDDING_DIM = 512
+
+# Queries whose best match scores below this cosine similarity go to the LLM instead
+MIN_SCORE = float(os.getenv("FOOD_INDEX_MIN_SCORE", "0.45"))
+# Fewer confident matches than this also go to the LLM
+MIN_RESULTS = 3
+
+TYPE_KEYWORDS = {
+    "main": ["main", "mains", "entree", "entrees", "main course", "main courses"],
+    "starter": ["starter", "starters", "appetizer", "appetizers", "appetiser", "appetisers", "small plates"],
+    "dessert": ["dessert", "desserts", "sweets"],
+}
+DIETARY_KEYWORDS = {
+    "vegetarian": ["vegetarian", "veggie"],
+    "vegan": ["vegan", "plant-based", "plant based"],
+    "gluten-free": ["gluten-free", "gluten free", "celiac", "coeliac"],
+    "dairy-free": ["dairy-free", "dairy free", "lactose-free", "lactose free", "non-dairy"],
+}
+STOPWORDS = {
+    "a", "an", "and", "the", "for", "of", "with", "some", "any", "me", "my", "our", "i", "we", "to",
+    "find", "search", "suggest", "give", "list", "show", "please", "need", "want", "options", "option",
+    "ideas", "idea", "dishes", "dish", "food", "foods", "items", "menu", "event", "guests", "people",
+    "serve", "serving", "good", "nice", "few", "couple", "that", "are", "is", "in", "on", "at",
+    "something", "things", "recommend", "recommendations", "can", "you", "could", "what",
+}
+
+food_index_lookups = registry.counter(
+    "food_index_lookups_total", "Food catalog index lookups by outcome", ("outcome",)
+)
+food_index_search_seconds = registry.histogram(
+    "food_index_search_seconds", "Food catalog index search latency", (),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+def _tokens(text: str) -> List[str]:
+    return [w for w in re.findall(r"[a-z0-9]+", text.lower()) if w not in STOPWORDS]
+
+def embed_text(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Signed feature hashing of words and character trigrams, L2 normalized"""
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in _tokens(text):
+        h = zlib.crc32(word.encode())
+        vector[h % dim] += 1.0 if h & 0x80000000 else -1.0
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            h = zlib.crc32(padded[i:i + 3].encode())
+            vector[h % dim] += 0.5 if h & 0x80000000 else -0.5
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def _item_text(item: dict) -> str:
+    return f"{item['name']} {item['name']} {item.get('cuisine', '')} {item.get('description', '')}"
+
+def parse_query(query: str, cuisines=()):
+    """Split a query into (types, dietary, cuisines, count, remaining free text)"""
+    text = f" {query.lower()} "
+    found = {}
+    cuisine_keywords = {c: [c] for c in cuisines}
+    for group, keywords in (("type", TYPE_KEYWORDS), ("dietary", DIETARY_KEYWORDS), ("cuisine", cuisine_keywords)):
+        found[group] = []
+        for value, words in keywords.items():
+            for word in sorted(words, key=len, reverse=True):
+                pattern = rf"(?<![a-z-]){re.escape(word)}(?![a-z-])"
+                if re.search(pattern, text):
+                    found[group].append(value)
+                    text = re.sub(pattern, " ", text)
+                    break
+    count = None
+    match = re.search(r"\b(\d{1,2})\b(?!\s*(?:guests|people|attendees|persons|pax|%))", text)
+    if match:
+        count = max(1, min(20, int(match.group(1))))
+        text = text[:match.start()] + " " + text[match.end():]
+    free_text = " ".join(t for t in _tokens(text) if not t.isdigit())
+    return found["type"], found["dietary"], found["cuisine"], count, free_text
+
+class FoodCatalogIndex:
+    """Memory-mapped embedding matrix plus filter bitmasks over catalog items"""
+    def __init__(self, items: List[dict], embeddings: np.ndarray, masks: np.ndarray, mask_keys: List[str]):
+        self.items = items
+        self.embeddings = embeddings
+        self.masks = masks
+        self.mask_rows = {key: row for row, key in enumerate(mask_keys)}
+        self.cuisines = [key.split(":", 1)[1] for key in mask_keys if key.startswith("cuisine:")]
+
+    def __len__(self):
+        return len(self.items)
+
+    @staticmethod
+    def build(items: List[dict], index_dir: str, source_digest: str = "") -> "FoodCatalogIndex":
+        """Embed the items and write embeddings.npy, masks.npy and meta.json to index_dir"""
+        os.makedirs(index_dir, exist_ok=True)
+        embeddings = np.lib.format.open_memmap(
+            os.path.join(index_dir, "embeddings.npy"), mode="w+", dtype=np.float32,
+            shape=(len(items), EMBEDDING_DIM),
+        )
+        for row, item in enumerate(items):
+            embeddings[row] = embed_text(_item_text(item))
+        embeddings.flush()
+
+        cuisines = sorted({item["cuisine"] for item in items if item.get("cuisine")})
+        mask_keys = (
+            [f"type:{v}" for v in TYPE_KEYWORDS]
+            + [f"dietary:{v}" for v in DIETARY_KEYWORDS]
+            + [f"cuisine:{c}" for c in cuisines]
+        )
+        flags = np.zeros((len(mask_keys), len(items)), dtype=bool)
+        rows = {key: row for row, key in enumerate(mask_keys)}
+        for col, item in enumerate(items):
+            flags[rows[f"type:{item['type']}"], col] = True
+            for dietary in item["dietary"]:
+                flags[rows[f"dietary:{dietary}"], col] = True
+            # Vegan dishes also satisfy a vegetarian filter
+            if "vegan" in item["dietary"]:
+                flags[rows["dietary:vegetarian"], col] = True
+            if item.get("cuisine"):
+                flags[rows[f"cuisine:{item['cuisine']}"], col] = True
+        np.save(os.path.join(index_dir, "masks.npy"), np.packbits(flags, axis=1))
+
+        with open(os.path.join(index_dir, "meta.json"), "w") as f:
+            json.dump({"source_digest": source_digest, "mask_keys": mask_keys, "items": items}, f)
+        del embeddings
+        return FoodCatalogIndex.open(index_dir)
+
+    @staticmethod
+    def open(index_dir: str) -> "FoodCatalogIndex":
+        with open(os.path.join(index_dir, "meta.json")) as f:
+            meta = json.load(f)
+        embeddings = np.load(os.path.join(index_dir, "embeddings.npy"), mmap_mode="r")
+        masks = np.load(os.path.join(index_dir, "masks.npy"))
+        return FoodCatalogIndex(meta["items"], embeddings, masks, meta["mask_keys"])
+
+    def _any_of(self, group: str, values: List[str]) -> np.ndarray:
+        return np.bitwise_or.reduce([self.masks[self.mask_rows[f"{group}:{v}"]] for v in values])
+
+    def _filter(self, types: List[str], dietary: List[str], cuisines: List[str]) -> Optional[np.ndarray]:
+        """Packed (any type) AND (any cuisine) AND (every dietary) mask, None when unfiltered"""
+        packed = None
+        for group, values in (("type", types), ("cuisine", cuisines)):
+            if values:
+                mask = self._any_of(group, values)
+                packed = mask if packed is None else packed & mask
+        for value in dietary:
+            row = self.masks[self.mask_rows[f"dietary:{value}"]]
+            packed = row if packed is None else packed & row
+        return packed
+
+    def search(self, query: str, k: int = 5, min_score: float = MIN_SCORE) -> Optional[List[dict]]:
+        """Top-k Food dicts for the query, or None when the index is not confident"""
+        start = time.perf_counter()
+        try:
+            types, dietary, cuisines, count, text = parse_query(query, self.cuisines)
+            k = count or k
+            packed = self._filter(types, dietary, cuisines)
+            if packed is None:
+                candidates = None
+                if not text:
+                    food_index_lookups.inc(outcome="miss")
+                    return None
+            else:
+                candidates = np.flatnonzero(np.unpackbits(packed, count=len(self.items)))
+                if len(candidates) < min(k, MIN_RESULTS):
+                    food_index_lookups.inc(outcome="miss")
+                    return None
+
+            if text:
+                vector = embed_text(text)
+                matrix = self.embeddings if candidates is None else self.embeddings[candidates]
+                scores = matrix @ vector
+                top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                best = scores[top[0]]
+                # Keep matches close to the best one, the tail of a top-k is often noise
+                top = top[scores[top] >= max(min_score, best) / 2]
+                if best < min_score or len(top) < min(k, MIN_RESULTS):
+                    food_index_lookups.inc(outcome="miss")
+                    return None
+                rows = top if candidates is None else candidates[top]
+            else:
+                # Pure filter queries ("vegan desserts"): catalog order is the curated ranking
+                rows = candidates[:k]
+
+            food_index_lookups.inc(outcome="hit")
+            return [self._as_food(self.items[int(row)], dietary) for row in rows]
+        finally:
+            food_index_search_seconds.observe(time.perf_counter() - start)
+
+    @staticmethod
+    def _as_food(item: dict, dietary: List[str]) -> dict:
+        return {
+            "name": item["name"],
+            "type": item["type"],
+            # Report the dietary tag that was asked for, else the item's primary one
+            "dietary": dietary[0] if dietary else item["dietary"][0],
+        }
+
+def _catalog_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load_catalog_items(path: str = CATALOG_PATH) -> List[dict]:
+    with open(path) as f:
+        items = json.load(f)["items"]
+    for item in items:
+        if item["type"] not in TYPE_KEYWORDS or not item["dietary"] or any(d not in DIETARY_KEYWORDS for d in item["dietary"]):
+            raise ValueError(f"Invalid catalog item: {item}")
+    return items
+
+_index: Optional[FoodCatalogIndex] = None
+_index_lock = threading.Lock()
+
+def get_food_index() -> FoodCatalogIndex:
+    """
+    Open the prebuilt index, rebuilding it when the catalog file changed. The
+    app lifespan calls this at startup so no chat request waits for it.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            digest = _catalog_digest(CATALOG_PATH)
+            try:
+                with open(os.path.join(INDEX_DIR, "meta.json")) as f:
+                    stale = json.load(f).get("source_digest") != digest
+            except (OSError, ValueError):
+                stale = True
+            if stale:
+                _index = FoodCatalogIndex.build(load_catalog_items(), INDEX_DIR, digest)
+            else:
+                _index = FoodCatalogIndex.open(INDEX_DIR)
+    return _index
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["build"]:
+        print(__doc__)
+        sys.exit(1)
+    start = time.perf_counter()
+    index = FoodCatalogIndex.build(load_catalog_items(), INDEX_DIR, _catalog_digest(CATALOG_PATH))
+    print(f"Indexed {len(index)} dishes into {INDEX_DIR} in {time.perf_counter() - start:.2f}s")
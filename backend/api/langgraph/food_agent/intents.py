@@ -0,0 +1,35 @@
+"""
+Intent fast path rules for the food agent.
+"""
+from ..intent import IntentRouter, IntentRule, load_intent_model
+
+FOOD_WORDS = [
+    r"foods?", r"dish(?:es)?", r"meals?", r"menus?", r"desserts?", r"starters?", r"appeti[sz]ers?",
+    r"mains?", r"entrees?", r"snacks?", r"catering", r"lunch", r"dinner", r"breakfast", r"brunch",
+    r"canap[eé]s?", r"vegan", r"vegetarian", r"gluten-free", r"dairy-free", r"cuisine",
+]
+
+rules = [
+    IntentRule(
+        "search_for_summary",
+        [[r"summar\w*", r"overview", r"analytics", r"breakdown", r"stats", r"statistics"],
+         [r"menus?", r"foods?", r"dish(?:es)?", r"items?", r"catering"]],
+        lambda text: {},
+    ),
+    IntentRule(
+        "search_for_food",
+        [[r"find", r"search", r"suggest\w*", r"recommend\w*", r"ideas?", r"options?", r"look(?:ing)? for",
+          r"what (?:should|can|could) (?:i|we) serve", r"give me", r"show me", r"need"],
+         FOOD_WORDS],
+        lambda text: {"query": text},
+        # Multi-step requests and edits are left to chat_node
+        exclude=[r"add", r"remove", r"delete", r"update", r"change", r"replace", r"summar\w*", r"overview"],
+    ),
+]
+
+intent_router = IntentRouter(
+    "food",
+    rules,
+    {"search_for_food": "search_node", "search_for_summary": "summary_node"},
+    model=load_intent_model("food"),
+)
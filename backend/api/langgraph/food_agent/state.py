@@ -23,4 +23,6 @@ class AgentState(MessagesState):
     """The state of the agent."""
     foods: List[Food]
     analytics: FoodAnalytics
+    # Foods of a running search as they are generated, empty once it answered
+    search_results: List[Food]
     
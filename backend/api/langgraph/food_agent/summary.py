@@ -10,7 +10,8 @@ from langchain_openai import ChatOpenAI
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import AIMessage, ToolMessage
 from langchain.tools import tool
-from copilotkit.langgraph import copilotkit_emit_state, copilotkit_customize_config
+from copilotkit.langgraph import copilotkit_customize_config
+from ..emit import emit_state
 from .state import AgentState
 from pydantic import BaseModel, Field
 import os
@@ -110,6 +111,6 @@ async def summary_node(state: AgentState, config: RunnableConfig):
         # Use the JSON string as content
         content=tool_message_content
     ))
-    await copilotkit_emit_state(custom_config, state)
+    await emit_state(custom_config, state)
     return state
 
@@ -0,0 +1,252 @@
+"""
+Local intent fast path in front of the agents' chat_node.
+
+Each turn normally starts with a gpt-4o call whose only job is to pick a tool.
+The intent node classifies the user's message locally, with keyword rules and
+optionally a small nearest-centroid model trained from example utterances
+(INTENT_MODEL_PATH), and when it is confident it emits the tool call itself and
+routes straight to the tool node. chat_node then only writes the answer.
+
+INTENT_ROUTER_MODE:
+- "shadow" (default): never dispatch, only compare predictions with the tool chat_node picks
+- "active": dispatch confident predictions directly, once shadow agreement is good
+- "off": skip classification entirely
+
+A rule's confidence comes from how strongly it matched: extra matching terms
+raise it, long messages lower it, and so does context the message depends on,
+a reply to the agent's question or a reference back to earlier turns.
+
+Agreement between the local prediction and chat_node is recorded for every turn
+that still reaches chat_node first, in both active and shadow mode.
+"""
+import os
+import re
+import json
+import math
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from ..utils.logger import logger
+from ..utils.metrics import registry
+
+INTENT_ROUTER_MODE = os.getenv("INTENT_ROUTER_MODE", "shadow")
+INTENT_MIN_CONFIDENCE = float(os.getenv("INTENT_MIN_CONFIDENCE", "0.8"))
+INTENT_MODEL_PATH = os.getenv("INTENT_MODEL_PATH", "")
+
+intent_decisions = registry.counter(
+    "intent_router_decisions_total", "Intent fast path decisions", ("agent", "intent", "outcome")
+)
+intent_shadow = registry.counter(
+    "intent_router_shadow_total", "Local intent predictions compared with chat_node's tool choice",
+    ("agent", "predicted", "actual"),
+)
+
+NO_TOOL = "none"
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+(?:-[a-z0-9]+)*", text.lower())
+
+def _pattern(alternatives: List[str]):
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE)
+
+# Words that only make sense with the earlier turns, "do the same for Durham"
+BACK_REFERENCES = _pattern([r"it", r"that", r"this", r"those", r"these", r"them", r"same", r"again", r"also",
+                            r"too", r"instead", r"another", r"more"])
+
+def message_text(content) -> str:
+    """Text of a message's content; for a list of content parts, the text parts joined as langchain does"""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in content
+        if isinstance(part, str) or (isinstance(part, dict) and part.get("type") == "text")
+    )
+
+class IntentRule:
+    """Fires when every group of whole-word patterns matches somewhere in the message"""
+    def __init__(self, tool: str, groups: List[List[str]], args: Callable[[str], dict],
+                 exclude: Optional[List[str]] = None):
+        self.tool = tool
+        self.groups = [_pattern(group) for group in groups]
+        self.exclude = _pattern(exclude) if exclude else None
+        self.args = args
+
+    def matches(self, text: str) -> bool:
+        if self.exclude is not None and self.exclude.search(text):
+            return False
+        return all(group.search(text) for group in self.groups)
+
+    def confidence(self, text: str) -> float:
+        """
+        0.7 for one term per group, plus 0.1 for each further distinct term,
+        minus 0.1 for every 10 words past the first 20: the longer the message,
+        the more it can ask besides what the rule saw.
+        """
+        terms = sum(len({m.lower() for m in group.findall(text)}) for group in self.groups)
+        extra_words = max(0, len(_words(text)) - 20)
+        score = 0.7 + 0.1 * (terms - len(self.groups)) - 0.1 * math.ceil(extra_words / 10)
+        return round(max(0.0, min(0.95, score)), 2)
+
+class CentroidIntentModel:
+    """Nearest centroid over bag-of-words and bigram counts of example utterances"""
+    def __init__(self, centroids: Dict[str, Dict[str, float]]):
+        self.centroids = centroids
+
+    @staticmethod
+    def features(text: str) -> Dict[str, float]:
+        words = _words(text)
+        counts: Dict[str, float] = {}
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            counts[feature] = counts.get(feature, 0.0) + 1.0
+        norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+        return {k: v / norm for k, v in counts.items()}
+
+    @classmethod
+    def from_examples(cls, examples: Dict[str, List[str]]) -> "CentroidIntentModel":
+        centroids = {}
+        for tool, utterances in examples.items():
+            centroid: Dict[str, float] = {}
+            for utterance in utterances:
+                for k, v in cls.features(utterance).items():
+                    centroid[k] = centroid.get(k, 0.0) + v / len(utterances)
+            norm = math.sqrt(sum(v * v for v in centroid.values())) or 1.0
+            centroids[tool] = {k: v / norm for k, v in centroid.items()}
+        return cls(centroids)
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """Best tool and a confidence from its similarity and margin over the runner-up"""
+        vector = self.features(text)
+        scores = sorted(
+            ((sum(v * centroid.get(k, 0.0) for k, v in vector.items()), tool) for tool, centroid in self.centroids.items()),
+            reverse=True,
+        )
+        if not scores or scores[0][0] <= 0:
+            return None, 0.0
+        best, tool = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        return tool, min(1.0, best + (best - runner_up))
+
+def load_intent_model(agent: str, path: str = INTENT_MODEL_PATH) -> Optional[CentroidIntentModel]:
+    """Model from {"<agent>": {"<tool or none>": ["example", ...]}} in INTENT_MODEL_PATH, if configured"""
+    if not path:
+        return None
+    try:
+        with open(path) as f:
+            examples = json.load(f).get(agent)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load intent model {path}: {e}")
+        return None
+    return CentroidIntentModel.from_examples(examples) if examples else None
+
+class IntentRouter:
+    """Intent node, its routing function and shadow statistics for one agent graph"""
+    def __init__(self, agent: str, rules: List[IntentRule], tool_nodes: Dict[str, str],
+                 model: Optional[CentroidIntentModel] = None, mode: str = INTENT_ROUTER_MODE,
+                 min_confidence: float = INTENT_MIN_CONFIDENCE):
+        self.agent = agent
+        self.rules = rules
+        self.tool_nodes = tool_nodes
+        self.model = model
+        self.mode = mode
+        self.min_confidence = min_confidence
+        # thread id -> (predicted tool, confidence) waiting for chat_node's decision
+        self._pending: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        # (confident, agreed) -> turns
+        self.stats: Dict[Tuple[bool, bool], int] = {}
+
+    def classify(self, text: str, history: Optional[List] = None) -> Tuple[Optional[str], dict, float]:
+        """
+        (tool, args, confidence) for the message, given the messages before it;
+        several rules firing for different tools is no confident answer
+        """
+        fired = [rule for rule in self.rules if rule.matches(text)]
+        tools = {rule.tool for rule in fired}
+        if len(tools) == 1:
+            rule = fired[0]
+            tool, args, confidence = rule.tool, rule.args(text), max(r.confidence(text) for r in fired)
+        elif self.model is not None and not tools:
+            tool, confidence = self.model.predict(text)
+            rule = next((r for r in self.rules if r.tool == tool), None)
+            if tool == NO_TOOL or rule is None:
+                return None, {}, confidence
+            args = rule.args(text)
+        else:
+            return None, {}, 0.0
+        return tool, args, confidence * self._context_factor(text, history or [])
+
+    @staticmethod
+    def _context_factor(text: str, history: List) -> float:
+        """How far the message can be read on its own"""
+        if not history:
+            return 1.0
+        last = history[-1]
+        if isinstance(last, AIMessage) and message_text(last.content).rstrip().endswith("?"):
+            # An answer to the agent's question, chat_node knows what was asked
+            return 0.5
+        if BACK_REFERENCES.search(text):
+            return 0.75
+        return 1.0
+
+    async def node(self, state, config: RunnableConfig):
+        """Emit the tool call directly when the prediction is confident"""
+        messages = state["messages"]
+        if self.mode == "off" or not messages or not isinstance(messages[-1], HumanMessage):
+            return {}
+        tool, args, confidence = self.classify(message_text(messages[-1].content), messages[:-1])
+        if self.mode == "active" and tool is not None and confidence >= self.min_confidence:
+            intent_decisions.inc(agent=self.agent, intent=tool, outcome="dispatched")
+            return {"messages": [AIMessage(
+                content="",
+                tool_calls=[{"name": tool, "args": args, "id": f"call_fastpath_{uuid.uuid4().hex[:16]}"}],
+            )]}
+
+        intent_decisions.inc(agent=self.agent, intent=tool or NO_TOOL, outcome="fallback")
+        self._remember(config, tool or NO_TOOL, confidence)
+        return {}
+
+    def route(self, state) -> str:
+        """Tool node for a dispatched tool call, chat_node otherwise"""
+        messages = state.get("messages", [])
+        if messages and isinstance(messages[-1], AIMessage) and messages[-1].tool_calls:
+            return self.tool_nodes[messages[-1].tool_calls[0]["name"]]
+        return "chat_node"
+
+    def _remember(self, config: RunnableConfig, tool: str, confidence: float):
+        thread_id = config.get("configurable", {}).get("thread_id")
+        if thread_id is None:
+            return
+        self._pending[thread_id] = (tool, confidence)
+        self._pending.move_to_end(thread_id)
+        while len(self._pending) > 1000:
+            self._pending.popitem(last=False)
+
+    def observe(self, config: RunnableConfig, response: AIMessage):
+        """Compare chat_node's tool choice with the prediction made for this turn"""
+        thread_id = config.get("configurable", {}).get("thread_id")
+        pending = self._pending.pop(thread_id, None) if thread_id is not None else None
+        if pending is None:
+            return
+        predicted, confidence = pending
+        actual = response.tool_calls[0]["name"] if getattr(response, "tool_calls", None) else NO_TOOL
+        confident = predicted != NO_TOOL and confidence >= self.min_confidence
+        agreed = predicted == actual
+        self.stats[(confident, agreed)] = self.stats.get((confident, agreed), 0) + 1
+        intent_shadow.inc(agent=self.agent, predicted=predicted, actual=actual)
+        logger.info("intent shadow", extra={"fields": {
+            "agent": self.agent, "predicted": predicted, "actual": actual,
+            "confidence": round(confidence, 3), "confident": confident, "agreed": agreed,
+        }})
+
+    def agreement(self) -> dict:
+        """Share of confident predictions chat_node agreed with, and coverage of all turns"""
+        confident = self.stats.get((True, True), 0) + self.stats.get((True, False), 0)
+        total = sum(self.stats.values())
+        return {
+            "turns": total,
+            "confident": confident,
+            "confident_agreement": self.stats.get((True, True), 0) / confident if confident else None,
+            "coverage": confident / total if total else None,
+        }
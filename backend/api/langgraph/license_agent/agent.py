@@ -12,6 +12,7 @@ from .chat import chat_node
 from .search import search_node
 from .licenses import perform_licenses_node
 from .state import AgentState
+from .intents import intent_router
 
 # Route is responsible for determing the next node based on the last message. This
 # is needed because LangGraph does not automatically route to nodes, instead that
@@ -39,6 +40,7 @@ def route(state: AgentState):
 
 graph_builder = StateGraph(AgentState)
 
+graph_builder.add_node("intent_node", intent_router.node)
 graph_builder.add_node("chat_node", chat_node)
 graph_builder.add_node("licenses_node", licenses_node)
 graph_builder.add_node("search_node", search_node)
@@ -46,7 +48,9 @@ graph_builder.add_node("perform_licenses_node", perform_licenses_node)
 
 graph_builder.add_conditional_edges("chat_node", route, ["search_node", "chat_node", "licenses_node", END])
 
-graph_builder.add_edge(START, "chat_node")
+# Confident requests skip the tool-picking chat_node call and go straight to the tool
+graph_builder.add_edge(START, "intent_node")
+graph_builder.add_conditional_edges("intent_node", intent_router.route, ["search_node", "chat_node"])
 graph_builder.add_edge("search_node", "chat_node")
 graph_builder.add_edge("perform_licenses_node", "chat_node")
 graph_builder.add_edge("licenses_node", "perform_licenses_node")
@@ -0,0 +1,31 @@
+"""
+Intent fast path rules for the license agent.
+"""
+from ..intent import IntentRouter, IntentRule, load_intent_model
+from .knowledge_base import infer_jurisdiction, infer_license_type
+
+def search_args(text: str) -> dict:
+    return {
+        "query": text,
+        "jurisdiction": infer_jurisdiction(text) or "",
+        "license_type": infer_license_type(text) or "",
+    }
+
+rules = [
+    IntentRule(
+        "search_for_licenses",
+        [[r"licen[cs]es?", r"permits?", r"registrations?"],
+         [r"need", r"requir\w*", r"find", r"search", r"which", r"what", r"get", r"obtain", r"apply\w*",
+          r"list", r"look(?:ing)? for"]],
+        search_args,
+        # Multi-step requests and edits are left to chat_node
+        exclude=[r"add", r"save", r"remove", r"delete", r"update", r"change", r"status", r"upload\w*"],
+    ),
+]
+
+intent_router = IntentRouter(
+    "license",
+    rules,
+    {"search_for_licenses": "search_node"},
+    model=load_intent_model("license"),
+)
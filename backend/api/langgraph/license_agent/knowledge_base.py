@@ -0,0 +1,265 @@
+"""
+Persistent knowledge base of license requirements, keyed by jurisdiction,
+license type and the license keywords of the query.
+
+Jurisdictions are canonical "city, st" names: "Raleigh, NC", "raleigh north
+carolina" and "Raleigh" are all "raleigh, nc". Only places that resolve this
+way are cached, either with a US state or as a city of KNOWN_CITIES; for any
+other phrase the agent asks the LLM.
+
+Entries live in the `license_knowledge_base` collection and are mirrored in a
+process-local table, so a lookup for "food permit in Raleigh" is a dict hit
+instead of a gpt-4o call, while "alcohol permit in Raleigh" is its own entry. LLM answers are written through to both on every
+miss. Entries older than LICENSE_KB_TTL_DAYS are stale: the agent refreshes
+them from the LLM but still serves them if that call fails.
+
+An inverted index over issuing authority and required document names supports
+filtering such as "every license the Wake County Health Department issues" or
+"licenses that need a certificate of insurance".
+"""
+import os
+import re
+import time
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+from ...database.mongodb import MongoDB
+from ...utils.logger import logger
+from ...utils.metrics import registry
+
+LICENSE_TYPES = ["Venue", "Food", "Safety", "Entertainment", "Logistics"]
+TYPE_KEYWORDS = {
+    "Food": ["food", "catering", "caterer", "restaurant", "kitchen", "vendor", "alcohol", "liquor", "beer", "wine", "health"],
+    "Venue": ["venue", "occupancy", "zoning", "building", "park", "special event", "outdoor", "tent"],
+    "Safety": ["fire", "safety", "security", "pyrotechnic", "fireworks", "first aid", "medical"],
+    "Entertainment": ["music", "noise", "amplified", "entertainment", "performance", "dj", "concert", "live band"],
+    "Logistics": ["parking", "road", "street closure", "traffic", "signage", "sign", "transport"],
+}
+TTL_SECONDS = float(os.getenv("LICENSE_KB_TTL_DAYS", "30")) * 86400
+
+license_kb_lookups = registry.counter(
+    "license_kb_lookups_total", "License knowledge base lookups by outcome", ("outcome",)
+)
+license_kb_entries = registry.gauge("license_kb_entries", "License knowledge base entries loaded in this process")
+
+STATES = {
+    "alabama": "al", "alaska": "ak", "arizona": "az", "arkansas": "ar", "california": "ca", "colorado": "co",
+    "connecticut": "ct", "delaware": "de", "district of columbia": "dc", "florida": "fl", "georgia": "ga",
+    "hawaii": "hi", "idaho": "id", "illinois": "il", "indiana": "in", "iowa": "ia", "kansas": "ks",
+    "kentucky": "ky", "louisiana": "la", "maine": "me", "maryland": "md", "massachusetts": "ma",
+    "michigan": "mi", "minnesota": "mn", "mississippi": "ms", "missouri": "mo", "montana": "mt",
+    "nebraska": "ne", "nevada": "nv", "new hampshire": "nh", "new jersey": "nj", "new mexico": "nm",
+    "new york": "ny", "north carolina": "nc", "north dakota": "nd", "ohio": "oh", "oklahoma": "ok",
+    "oregon": "or", "pennsylvania": "pa", "rhode island": "ri", "south carolina": "sc", "south dakota": "sd",
+    "tennessee": "tn", "texas": "tx", "utah": "ut", "vermont": "vt", "virginia": "va", "washington": "wa",
+    "west virginia": "wv", "wisconsin": "wi", "wyoming": "wy",
+}
+STATE_CODES = set(STATES.values())
+# Places recognized without a state: the Triangle, where most events are planned, and the largest US cities
+KNOWN_CITIES = {
+    "raleigh": "nc", "durham": "nc", "chapel hill": "nc", "cary": "nc", "apex": "nc", "morrisville": "nc",
+    "wake forest": "nc", "garner": "nc", "holly springs": "nc", "carrboro": "nc", "charlotte": "nc",
+    "greensboro": "nc", "winston salem": "nc", "wilmington": "nc", "asheville": "nc",
+    "wake county": "nc", "durham county": "nc", "orange county": "nc", "mecklenburg county": "nc",
+    "new york city": "ny", "los angeles": "ca", "chicago": "il", "houston": "tx", "phoenix": "az",
+    "philadelphia": "pa", "san antonio": "tx", "san diego": "ca", "dallas": "tx", "austin": "tx",
+    "san francisco": "ca", "seattle": "wa", "denver": "co", "boston": "ma", "atlanta": "ga", "miami": "fl",
+    "nashville": "tn", "washington dc": "dc",
+}
+
+def normalize_jurisdiction(jurisdiction: str) -> str:
+    """Lowercase words only, "Raleigh, NC" and "raleigh nc" compare equal"""
+    return " ".join(re.findall(r"[a-z0-9]+", jurisdiction.lower()))
+
+def canonical_jurisdiction(place: str) -> Optional[str]:
+    """"city, st" for a place with a US state or in KNOWN_CITIES, else None"""
+    words = re.sub(r"^(?:the )?(?:city|county|town|village) of ", "", normalize_jurisdiction(place)).split()
+    state = None
+    for size in (3, 2, 1):
+        tail = " ".join(words[-size:])
+        if len(words) >= size and (tail in STATES or (size == 1 and tail in STATE_CODES)):
+            state, words = STATES.get(tail, tail), words[:-size]
+            break
+    if not words:
+        return state
+    if state is None:
+        # "Raleigh Convention Center" is in Raleigh: the longest leading known city
+        for size in range(len(words), 0, -1):
+            city = " ".join(words[:size])
+            if city in KNOWN_CITIES:
+                return f"{city}, {KNOWN_CITIES[city]}"
+        return None
+    return f"{' '.join(words)}, {state}"
+
+def infer_license_type(text: str) -> Optional[str]:
+    """License type whose keywords appear most often in the text"""
+    text = f" {text.lower()} "
+    counts = {
+        license_type: sum(1 for word in words if re.search(rf"\b{re.escape(word)}\b", text))
+        for license_type, words in TYPE_KEYWORDS.items()
+    }
+    best = max(counts, key=counts.get)
+    return best if counts[best] else None
+
+def license_intent(text: str) -> List[str]:
+    """License keywords of the text, what tells "alcohol permit" from "food truck permit" """
+    text = f" {text.lower()} "
+    return sorted({word for words in TYPE_KEYWORDS.values() for word in words
+                   if re.search(rf"\b{re.escape(word)}\b", text)})
+
+def infer_jurisdiction(query: str) -> Optional[str]:
+    """
+    Canonical place named after "in"/"for", e.g. "food permit in Raleigh, NC".
+    None when the capitalized words there are not a known place ("in My
+    Company Picnic").
+    """
+    for match in re.finditer(
+        r"\b(?:in|for)\s+(?:the\s+)?(?:(?:City|County|Town|Village|State)\s+of\s+)?"
+        r"([A-Z][\w.'-]*(?:\s+[A-Z][\w.'-]*)*(?:,\s*[A-Z][\w.'-]*(?:\s+[A-Z][\w.'-]*)*)?)",
+        query,
+    ):
+        jurisdiction = canonical_jurisdiction(match.group(1))
+        if jurisdiction:
+            return jurisdiction
+    return None
+
+def _terms(text: str) -> Set[str]:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+def _posting_keys(license: dict) -> Set[Tuple[str, str]]:
+    """Inverted index keys of a license: authority and required document words"""
+    keys = {("authority", term) for term in _terms(license.get("issuing_authority", ""))}
+    for document in license.get("required_documents", []):
+        keys |= {("document", term) for term in _terms(document)}
+    return keys
+
+class LicenseKnowledgeBase:
+    """Write-through cache of license requirements backed by MongoDB"""
+    def __init__(self, collection_name: str = "license_knowledge_base", ttl_seconds: float = TTL_SECONDS):
+        self.collection_name = collection_name
+        self.ttl_seconds = ttl_seconds
+        # key -> entry document
+        self._entries: Dict[str, dict] = {}
+        # ("authority" | "document", term) -> {(key, license position)}
+        self._postings: Dict[Tuple[str, str], Set[Tuple[str, int]]] = {}
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def key(jurisdiction: str, license_type: str, query: str = "") -> str:
+        """Expects a canonical jurisdiction, e.g. "raleigh, nc|food|alcohol,catering" """
+        return f"{jurisdiction}|{license_type.lower()}|{','.join(license_intent(query))}"
+
+    def _collection(self):
+        return MongoDB.get_db()[self.collection_name]
+
+    def _load(self):
+        """Mirror the whole collection on first use, it is small and read-mostly"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            collection = self._collection()
+            collection.create_index([("jurisdiction", 1), ("license_type", 1)])
+            for entry in collection.find():
+                self._index(entry)
+            self._loaded = True
+            logger.info(f"Loaded {len(self._entries)} license knowledge base entries")
+
+    def _index(self, entry: dict):
+        key = entry["_id"]
+        self._unindex(key)
+        self._entries[key] = entry
+        for position, license in enumerate(entry["licenses"]):
+            for posting_key in _posting_keys(license):
+                self._postings.setdefault(posting_key, set()).add((key, position))
+        license_kb_entries.set(len(self._entries))
+
+    def _unindex(self, key: str):
+        old = self._entries.pop(key, None)
+        if old is None:
+            return
+        for position, license in enumerate(old["licenses"]):
+            for posting_key in _posting_keys(license):
+                postings = self._postings.get(posting_key)
+                if postings is not None:
+                    postings.discard((key, position))
+                    if not postings:
+                        del self._postings[posting_key]
+
+    def is_stale(self, entry: dict) -> bool:
+        return time.time() - entry["fetched_at"] > self.ttl_seconds
+
+    def lookup(self, jurisdiction: str, license_type: str, query: str = "") -> Optional[dict]:
+        """Entry for the canonical jurisdiction, type and query keywords (possibly stale), or None"""
+        self._load()
+        key = self.key(jurisdiction, license_type, query)
+        entry = self._entries.get(key)
+        if entry is None:
+            # Another worker may have written it since we loaded
+            entry = self._collection().find_one({"_id": key})
+            if entry is not None:
+                with self._lock:
+                    self._index(entry)
+        if entry is None:
+            license_kb_lookups.inc(outcome="miss")
+        else:
+            license_kb_lookups.inc(outcome="stale" if self.is_stale(entry) else "hit")
+        return entry
+
+    def store(self, jurisdiction: str, license_type: str, licenses: List[dict], query: str = "") -> dict:
+        """Write an LLM answer through to MongoDB and the local index"""
+        self._load()
+        key = self.key(jurisdiction, license_type, query)
+        entry = {
+            "_id": key,
+            "jurisdiction": jurisdiction,
+            "license_type": license_type,
+            "intent": license_intent(query),
+            "licenses": licenses,
+            "source_query": query,
+            "fetched_at": time.time(),
+        }
+        self._collection().replace_one({"_id": key}, entry, upsert=True)
+        with self._lock:
+            self._index(entry)
+        return entry
+
+    def filter(
+        self,
+        authority: Optional[str] = None,
+        document: Optional[str] = None,
+        jurisdiction: Optional[str] = None,
+        license_type: Optional[str] = None,
+    ) -> List[dict]:
+        """Licenses whose authority / required documents contain every word of the filters"""
+        self._load()
+        with self._lock:
+            matches: Optional[Set[Tuple[str, int]]] = None
+            for field, text in (("authority", authority), ("document", document)):
+                if not text:
+                    continue
+                for term in _terms(text):
+                    postings = self._postings.get((field, term), set())
+                    matches = set(postings) if matches is None else matches & postings
+            if matches is None:
+                matches = {(key, i) for key, entry in self._entries.items() for i in range(len(entry["licenses"]))}
+
+            if jurisdiction:
+                jurisdiction = normalize_jurisdiction(canonical_jurisdiction(jurisdiction) or jurisdiction)
+            results = []
+            for key, position in sorted(matches):
+                entry = self._entries[key]
+                if jurisdiction and normalize_jurisdiction(entry["jurisdiction"]) != jurisdiction:
+                    continue
+                if license_type and entry["license_type"].lower() != license_type.lower():
+                    continue
+                results.append({
+                    **entry["licenses"][position],
+                    "jurisdiction": entry["jurisdiction"],
+                    "license_type": entry["license_type"],
+                    "stale": self.is_stale(entry),
+                })
+            return results
+
+license_knowledge_base = LicenseKnowledgeBase()
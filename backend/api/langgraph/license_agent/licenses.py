@@ -9,6 +9,9 @@ from .state import AgentState, License, LicenseList
 from bson import ObjectId
 from datetime import datetime
 from ...database.mongodb import MongoDB
+from ...utils.search import index_document
+from ...utils.license_reminders import license_reminders
+from ...utils.portfolio import portfolio_analytics
 
 async def licenses_node(state: AgentState, config: RunnableConfig): # pylint: disable=unused-argument
     """
@@ -76,6 +79,9 @@ def handle_add_licenses(state: AgentState, args: dict) -> AIMessage:
             }
             
             collection.insert_one(license_data)
+            index_document("licenses", license_data)
+            license_reminders.license_changed(license_data)
+            portfolio_analytics.touch_event(license_data["eventId"])
         
         # Update state after successful DB operation
         state["licenses"].extend(licenses)
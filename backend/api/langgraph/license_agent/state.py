@@ -18,3 +18,5 @@ class LicenseList(TypedDict):
 class AgentState(MessagesState):
     """The state of the agent."""
     licenses: List[License]
+    # Licenses of a running search as they are generated, empty once it answered
+    search_results: List[dict]
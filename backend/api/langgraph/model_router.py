@@ -0,0 +1,160 @@
+"""
+Tiered model routing for structured extraction.
+
+Structured search output (FoodList, LicenseList) is first requested from the
+cheapest tier. The result goes through schema validation plus a quality check
+of the search node, and only when either fails (or the call errors) is the
+request escalated to the next, larger tier. The last tier's answer is used as
+is.
+
+Tiers come from STRUCTURED_MODEL_TIERS as "model:input_usd:output_usd,..."
+(prices per million tokens), cheapest first.
+
+Output is streamed as a forced tool call and parsed incrementally, so callers
+can receive each completed list item (`on_item`) while the rest is generated.
+"""
+import os
+import json
+import time
+from typing import Awaitable, Callable, List, Optional, Type
+from pydantic import BaseModel, ValidationError
+from langchain_core.runnables import RunnableConfig
+from ..utils.partial_json import IncrementalJSONParser
+from ..utils.logger import logger
+from ..utils.metrics import registry
+from ..utils.rate_limit import llm_admission, LLMOverloadedError
+
+DEFAULT_TIERS = "gpt-4o-mini:0.15:0.60,gpt-4o:2.50:10.00"
+
+tier_calls = registry.counter(
+    "structured_llm_tier_calls_total", "Structured extraction calls per model tier by outcome",
+    ("schema", "tier", "outcome"),
+)
+tier_seconds = registry.histogram(
+    "structured_llm_tier_seconds", "Structured extraction latency per model tier", ("schema", "tier"),
+)
+tier_cost = registry.counter(
+    "structured_llm_cost_usd_total", "Estimated structured extraction spend per model tier", ("schema", "tier"),
+)
+tier_escalations = registry.counter(
+    "structured_llm_escalations_total", "Structured extraction requests escalated to a larger tier",
+    ("schema", "from_tier", "reason"),
+)
+
+class ModelTier:
+    """A model and its price in USD per million input / output tokens"""
+    def __init__(self, model: str, input_cost: float = 0.0, output_cost: float = 0.0):
+        self.model = model
+        self.input_cost = input_cost
+        self.output_cost = output_cost
+
+    def cost(self, usage: Optional[dict]) -> float:
+        if not usage:
+            return 0.0
+        return (usage.get("input_tokens", 0) * self.input_cost + usage.get("output_tokens", 0) * self.output_cost) / 1e6
+
+def parse_tiers(spec: str) -> List[ModelTier]:
+    """Parse "model:input_usd:output_usd,..." e.g. "gpt-4o-mini:0.15:0.60" """
+    tiers = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        model, *prices = entry.split(":")
+        tiers.append(ModelTier(model, *(float(p) for p in prices)))
+    return tiers
+
+class StructuredModelRouter:
+    """Cheapest tier first, escalating on invalid or low-quality structured output"""
+    def __init__(self, tiers: List[ModelTier], make_model: Callable[[str], object]):
+        if not tiers:
+            raise ValueError("At least one model tier is required")
+        self.tiers = tiers
+        self.make_model = make_model
+        self._runnables = {}
+
+    @property
+    def name(self) -> str:
+        """Stable identifier of the tier chain, e.g. for cache keys"""
+        return ">".join(tier.model for tier in self.tiers)
+
+    def _structured(self, tier: ModelTier, schema: Type[BaseModel]):
+        key = (tier.model, schema)
+        if key not in self._runnables:
+            # Same forced tool call with_structured_output makes, but streamable
+            self._runnables[key] = self.make_model(tier.model).bind_tools(
+                [schema], tool_choice=schema.__name__, parallel_tool_calls=False,
+            )
+        return self._runnables[key]
+
+    async def _stream(self, tier: ModelTier, schema: Type[BaseModel], query: str, config: RunnableConfig,
+                      on_item: Optional[Callable[[int, dict], Awaitable[None]]]):
+        """(full message, tool call arguments text), reporting completed `items` elements on the way"""
+        parser = IncrementalJSONParser()
+        message = None
+        async for chunk in self._structured(tier, schema).astream(query, config=config, stream_usage=True):
+            message = chunk if message is None else message + chunk
+            for tool_chunk in chunk.tool_call_chunks:
+                if not tool_chunk.get("args"):
+                    continue
+                for path, item in parser.feed(tool_chunk["args"]):
+                    if on_item is not None and path[0] == "items":
+                        await on_item(path[1], item)
+        arguments = message.tool_call_chunks[0]["args"] if message is not None and message.tool_call_chunks else None
+        return message, arguments
+
+    async def ainvoke(
+        self,
+        schema: Type[BaseModel],
+        query: str,
+        config: RunnableConfig,
+        check: Optional[Callable[[BaseModel], Optional[str]]] = None,
+        on_item: Optional[Callable[[int, dict], Awaitable[None]]] = None,
+    ) -> BaseModel:
+        """Parsed output of the first tier that passes validation and `check` (a problem description or None).
+
+        `on_item(index, item)` is awaited for every completed element of the `items` list as it
+        streams in. Index 0 arriving again means a larger tier started over."""
+        schema_name = schema.__name__
+        for position, tier in enumerate(self.tiers):
+            last = position == len(self.tiers) - 1
+            start = time.perf_counter()
+            try:
+                async with llm_admission.slot():
+                    message, arguments = await self._stream(tier, schema, query, config, on_item)
+            except LLMOverloadedError:
+                # A larger tier would only wait in the same queue
+                tier_calls.inc(schema=schema_name, tier=tier.model, outcome="overloaded")
+                raise
+            except Exception as e:
+                tier_calls.inc(schema=schema_name, tier=tier.model, outcome="error")
+                if last:
+                    raise
+                logger.warning(f"{schema_name} extraction failed on {tier.model}: {e}")
+                tier_escalations.inc(schema=schema_name, from_tier=tier.model, reason="error")
+                continue
+            finally:
+                tier_seconds.observe(time.perf_counter() - start, schema=schema_name, tier=tier.model)
+
+            tier_cost.inc(tier.cost(getattr(message, "usage_metadata", None)), schema=schema_name, tier=tier.model)
+
+            parsed, reason = None, "invalid"
+            try:
+                if not arguments:
+                    raise ValueError("no structured output")
+                parsed = schema.model_validate(json.loads(arguments))
+                problem = check(parsed) if check else None
+                reason = "low_confidence" if problem else None
+            except (ValueError, ValidationError) as e:
+                problem = str(e)
+
+            if reason is None:
+                tier_calls.inc(schema=schema_name, tier=tier.model, outcome="accepted")
+                return parsed
+            tier_calls.inc(schema=schema_name, tier=tier.model, outcome=reason)
+            if last:
+                if parsed is None:
+                    raise ValueError(f"{schema_name} extraction failed on {tier.model}: {problem}")
+                # Nothing larger to ask, a weak answer beats none
+                return parsed
+            logger.info(f"Escalating {schema_name} from {tier.model}: {problem}")
+            tier_escalations.inc(schema=schema_name, from_tier=tier.model, reason=reason)
+
+structured_model_tiers = parse_tiers(os.getenv("STRUCTURED_MODEL_TIERS", DEFAULT_TIERS))
@@ -1,3 +1,4 @@
+import uuid
 from assistant_stream import create_run, RunController
 from assistant_stream.serialization import DataStreamResponse
 from langchain_core.messages import (
@@ -8,9 +9,18 @@ from langchain_core.messages import (
     SystemMessage,
     BaseMessage,
 )
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 from typing import List, Literal, Union, Optional, Any
+from ..utils.partial_json import IncrementalJSONParser
+from ..utils.blob_store import blob_holders, blob_store, parse_blob_ref
+from ..utils.metrics import registry
+from .auth import get_current_user
+
+chat_blob_part_bytes = registry.counter(
+    "chat_blob_part_bytes_total", "Bytes of image and file parts received in chat requests", ("kind",),
+)
 
 
 class LanguageModelTextPart(BaseModel):
@@ -21,14 +31,14 @@ class LanguageModelTextPart(BaseModel):
 
 class LanguageModelImagePart(BaseModel):
     type: Literal["image"]
-    image: str  # Will handle URL or base64 string
+    image: str  # URL, base64 string or blob reference (blob:sha256:...)
     mimeType: Optional[str] = None
     providerMetadata: Optional[Any] = None
 
 
 class LanguageModelFilePart(BaseModel):
     type: Literal["file"]
-    data: str  # URL or base64 string
+    data: str  # URL, base64 string or blob reference (blob:sha256:...)
     mimeType: str
     providerMetadata: Optional[Any] = None
 
@@ -88,6 +98,20 @@ LanguageModelV1Message = Union[
 ]
 
 
+def check_blob_parts(messages: List[LanguageModelV1Message], user_id: Optional[str]):
+    """Count inline vs referenced blob bytes, and reject references to blobs the user did not upload"""
+    for msg in messages:
+        if msg.role != "user":
+            continue
+        for p in msg.content:
+            if isinstance(p, (LanguageModelImagePart, LanguageModelFilePart)):
+                value = p.image if isinstance(p, LanguageModelImagePart) else p.data
+                digest = parse_blob_ref(value)
+                chat_blob_part_bytes.inc(len(value), kind="inline" if digest is None else "reference")
+                if digest is not None and not (blob_holders.holds(user_id, digest) and blob_store.exists(digest)):
+                    raise HTTPException(status_code=400, detail=f"Unknown blob reference {value}")
+
+
 def convert_to_langchain_messages(
     messages: List[LanguageModelV1Message],
 ) -> List[BaseMessage]:
@@ -104,6 +128,11 @@ def convert_to_langchain_messages(
                     content.append({"type": "text", "text": p.text})
                 elif isinstance(p, LanguageModelImagePart):
                     content.append({"type": "image_url", "image_url": p.image})
+                elif isinstance(p, LanguageModelFilePart):
+                    data = p.data
+                    if parse_blob_ref(data) is None and not data.startswith(("data:", "http:", "https:")):
+                        data = f"data:{p.mimeType};base64,{data}"
+                    content.append({"type": "file", "file": {"file_data": data}})
             result.append(HumanMessage(content=content))
 
         elif msg.role == "assistant":
@@ -146,28 +175,94 @@ class ChatRequest(BaseModel):
     system: Optional[str] = ""
     tools: Optional[List[FrontendToolCall]] = []
     messages: List[LanguageModelV1Message]
+    # With a thread id, `messages` only holds the turn's new messages and the
+    # earlier ones come from the graph's checkpointer. Without one, `messages`
+    # is the full history (stateless clients).
+    threadId: Optional[str] = None
 
 
-def add_langgraph_route(app: FastAPI, graph, path: str):
-    async def chat_completions(request: ChatRequest):
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
-            
+
+def current_user_or_none(token: Optional[str] = Depends(optional_oauth2_scheme)) -> Optional[str]:
+    """The caller's user id, None without a token; an invalid token is still a 401"""
+    return get_current_user(token) if token else None
+
+
+class _NullParser:
+    def feed(self, chunk: str):
+        return []
+
+
+def add_langgraph_route(app: FastAPI, graph, path: str, partial_args: bool = True):
+    """
+    Streams a graph run in the data stream protocol.
+
+    Image and file parts may carry a blob reference from POST /api/blobs
+    instead of inline base64, for blobs the caller uploaded. References are
+    kept in graph state and only resolved when the agent calls the model.
+
+    Requests with a threadId resume that thread from the graph's checkpointer
+    and only carry the new messages, so request size and conversion cost stay
+    flat as the conversation grows. They need a bearer token: the checkpointer
+    thread is namespaced with the user id, so a thread id guessed or leaked
+    from another user opens an empty thread of the caller's own.
+
+    With partial_args, every completed element of a top-level array in a tool
+    call's arguments (e.g. each food of add_foods) is also sent as a data event
+
+        {"type": "tool-call-args-element", "toolCallId": ..., "path": ["foods", 3], "value": {...}}
+
+    so clients can render arguments as they stream without re-parsing the
+    growing args text on every delta.
+    """
+    async def chat_completions(request: ChatRequest, user_id: Optional[str] = Depends(current_user_or_none)):
+        if request.threadId and getattr(graph, "checkpointer", None) is None:
+            raise HTTPException(status_code=400, detail="threadId requires a graph with a checkpointer")
+        if request.threadId and user_id is None:
+            raise HTTPException(
+                status_code=401,
+                detail="threadId requires authentication",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        check_blob_parts(request.messages, user_id)
         inputs = convert_to_langchain_messages(request.messages)
+        configurable = {
+            "system": request.system,
+            "frontend_tools": request.tools,
+        }
+        checkpointer = getattr(graph, "checkpointer", None)
+        stateless_thread = None
+        if request.threadId:
+            configurable["thread_id"] = f"{user_id}:{request.threadId}"
+        elif checkpointer is not None:
+            # Full-history request against a checkpointed graph: run it on a
+            # throwaway thread so the replayed history is not appended twice
+            stateless_thread = f"stateless-{uuid.uuid4()}"
+            configurable["thread_id"] = stateless_thread
 
         accumulated_content = "" 
 
         async def run(controller: RunController):
+            nonlocal accumulated_content  # Use nonlocal to modify the outer variable
+
+            try:
+                await stream_graph(controller)
+            finally:
+                if stateless_thread is not None and hasattr(checkpointer, "adelete_thread"):
+                    await checkpointer.adelete_thread(stateless_thread)
+
+        async def stream_graph(controller: RunController):
             tool_calls = {}
             tool_calls_by_idx = {}
-            nonlocal accumulated_content  # Use nonlocal to modify the outer variable
+            # index -> (tool call id, incremental parser of its args text)
+            args_parsers_by_idx = {}
 
             async for msg, metadata in graph.astream(
                 {"messages": inputs},
                 config ={
-                    "configurable": {
-                        "system": request.system,
-                        "frontend_tools": request.tools,
-                    }
+                    "configurable": configurable
                 },
                 stream_mode="messages"
             ):
@@ -186,18 +281,38 @@ def add_langgraph_route(app: FastAPI, graph, path: str):
                     if msg.content:
                         controller.append_text(msg.content)
 
-                    for chunk in msg.tool_call_chunks:
+                    for chunk in getattr(msg, "tool_call_chunks", []):
                         if not chunk["index"] in tool_calls_by_idx:
                             tool_controller = await controller.add_tool_call(
                                 chunk["name"], chunk["id"]
                             )
                             tool_calls_by_idx[chunk["index"]] = tool_controller
                             tool_calls[chunk["id"]] = tool_controller
+                            args_parsers_by_idx[chunk["index"]] = (chunk["id"], IncrementalJSONParser())
                         else:
                             tool_controller = tool_calls_by_idx[chunk["index"]]
 
                         tool_controller.append_args_text(chunk["args"])
+
+                        if partial_args and chunk["args"]:
+                            tool_call_id, parser = args_parsers_by_idx[chunk["index"]]
+                            try:
+                                elements = parser.feed(chunk["args"])
+                            except ValueError:
+                                # Malformed arguments: stop parsing, the args text still goes out
+                                args_parsers_by_idx[chunk["index"]] = (tool_call_id, _NullParser())
+                                elements = []
+                            for element_path, value in elements:
+                                controller.add_data({
+                                    "type": "tool-call-args-element",
+                                    "toolCallId": tool_call_id,
+                                    "path": list(element_path),
+                                    "value": value,
+                                })
             
-        return DataStreamResponse(create_run(run))
+        response = DataStreamResponse(create_run(run))
+        if request.threadId:
+            response.headers["X-Thread-Id"] = request.threadId
+        return response
 
     app.add_api_route(path, chat_completions, methods=["POST"])
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from api.routes.auth import get_current_user
+from api.utils.portfolio import portfolio_analytics
+
+# Initialize router
+router = APIRouter()
+
+# Totals, cost per attendee, vendor completion and license spend across all of
+# the user's events, recomputed only after one of them changed
+@router.get("/portfolio", response_model=dict)
+def get_portfolio_analytics(user_id: str = Depends(get_current_user)):
+    try:
+        analytics, version, cached = portfolio_analytics.get(user_id)
+        return {
+            "success": True,
+            "version": version,
+            "cached": cached,
+            "analytics": analytics
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to compute portfolio analytics: {str(e)}"
+        )
@@ -0,0 +1,107 @@
+from typing import Optional, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from api.routes.auth import get_current_user
+from api.utils.blob_store import BlobTooLarge, blob_holders, blob_store, is_digest
+
+# Initialize router
+router = APIRouter()
+
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+# Upload an image or file for chat messages. The request body is the raw file,
+# its Content-Type the mime type. Returns the blob reference to put in messages.
+# `deduplicated` only says whether the caller had uploaded it before, never
+# whether someone else did.
+@router.post("", response_model=dict)
+async def upload_blob(request: Request, user_id: str = Depends(get_current_user)):
+    mime_type = request.headers.get("content-type", "application/octet-stream").split(";")[0].strip()
+    try:
+        writer = await run_in_threadpool(blob_store.open_writer, mime_type)
+        try:
+            async for chunk in request.stream():
+                if chunk:
+                    await run_in_threadpool(writer.write, chunk)
+        except BaseException:
+            await run_in_threadpool(writer.abort)
+            raise
+        blob = await run_in_threadpool(writer.close)
+        added = await run_in_threadpool(blob_holders.add, user_id, blob["sha256"])
+        return {
+            "success": True,
+            "blob": {**blob, "deduplicated": not added}
+        }
+
+    except BlobTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload blob: {str(e)}"
+        )
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) of a single "bytes=" range, inclusive. None for no or an unusable header"""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size - 1)
+
+def blob_response(digest: str, range_header: Optional[str], headers: Optional[dict] = None) -> StreamingResponse:
+    """Stream a blob, or the requested range of it with 206"""
+    size, mime_type = blob_store.stat(digest)
+    headers = {
+        "ETag": f'"{digest}"',
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes",
+        **(headers or {}),
+    }
+    byte_range = parse_range(range_header, size)
+    start, end = byte_range or (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        blob_store.iter_range(digest, start, end, DOWNLOAD_CHUNK_BYTES),
+        status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+        media_type=mime_type,
+        headers=headers,
+    )
+
+# Download a blob the caller uploaded by its SHA-256 digest, a Range header gets part of it.
+# Anyone else's blob, license documents included, is not found.
+@router.get("/{digest}")
+def get_blob(digest: str, range: Optional[str] = Header(None), user_id: str = Depends(get_current_user)):
+    if not is_digest(digest) or not blob_holders.holds(user_id, digest) or not blob_store.exists(digest):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Blob not found"
+        )
+    try:
+        return blob_response(digest, range)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve blob: {str(e)}"
+        )
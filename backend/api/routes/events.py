@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 from ..database.mongodb import MongoDB
 from bson import ObjectId
 from .auth import get_current_user
+from ..utils.logger import logger
+from ..utils.search import index_document
+from ..utils.event_calendar import as_stored, calendar_window, event_calendar
+from ..utils.event_stats import event_stats
+from ..utils.portfolio import portfolio_analytics
+from .food import EventFoodData, load_food_data
+from .licenses import LicenseResponse, load_event_licenses
 
 # Initialize router
 router = APIRouter()
@@ -23,6 +33,10 @@ class EventCreate(BaseModel):
     description: str
     sustainable: bool
 
+class EventInsightsBatch(BaseModel):
+    eventIds: List[str]
+    concurrency: Optional[int] = None
+
 class EventResponse(BaseModel):
     id: str
     eventName: str
@@ -56,6 +70,9 @@ def serialize_event(event):
         # Process dates first
         event = process_event_dates(event)
         
+        # Bookkeeping of the dashboard counters, not part of the event
+        event.pop("statsBucket", None)
+
         # Check if _id exists, if not, use a generated ID or any other existing ID
         if "_id" in event:
             event["id"] = str(event["_id"])
@@ -66,6 +83,18 @@ def serialize_event(event):
         return event
     return None
 
+def event_payload(event):
+    """An event as the event page gets it"""
+    serialized = serialize_event(process_event_dates(event))
+    
+    # Add type if not present
+    if "type" not in serialized:
+        serialized["type"] = "Conference"
+    return serialized
+
+# Parts of the event bundle
+BUNDLE_PARTS = ("event", "food", "licenses")
+
 # Create a new event
 @router.post("", response_model=dict)
 def create_event(event: EventCreate, user_id: str = Depends(get_current_user)):
@@ -95,6 +124,10 @@ def create_event(event: EventCreate, user_id: str = Depends(get_current_user)):
         
         # Get the created event
         created_event = db.events.find_one({"_id": result.inserted_id})
+        index_document("events", created_event)
+        event_calendar.invalidate(user_id)
+        event_stats.event_changed(created_event)
+        portfolio_analytics.touch(user_id)
         
         return {
             "success": True,
@@ -102,9 +135,7 @@ def create_event(event: EventCreate, user_id: str = Depends(get_current_user)):
         }
         
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Create event error: {error_details}")
+        logger.exception("Create event error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create event: {str(e)}"
@@ -199,6 +230,10 @@ def update_event(
         
         # Get updated event
         updated_event = db.events.find_one({"_id": ObjectId(event_id)})
+        index_document("events", updated_event)
+        event_calendar.invalidate(user_id)
+        event_stats.event_changed(updated_event)
+        portfolio_analytics.touch(user_id)
         
         return {
             "success": True,
@@ -206,9 +241,7 @@ def update_event(
         }
         
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Update event error: {error_details}")
+        logger.exception("Update event error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update event: {str(e)}"
@@ -219,41 +252,13 @@ def update_event(
 @router.get("/dashboard", response_model=dict)
 def get_dashboard_data(user_id: str = Depends(get_current_user)):
     try:
-        db = MongoDB.get_db()
         current_date = datetime.now()
         
-        # Get all user events
-        all_events = list(db.events.find({"userId": user_id}))
-        
-        # Calculate stats
-        total_events = len(all_events)
-        
-        ongoing_events = []
-        upcoming_events = []
-        past_events = []
-        
-        # Categorize events
-        for event in all_events:
-            # Process dates to ensure endDate is set
-            event = process_event_dates(event)
-            event_date = event.get("dateTime")
-            end_date = event.get("endDate")
-            
-            if event_date and end_date:
-                if event_date <= current_date and end_date >= current_date:
-                    ongoing_events.append(event)
-                elif event_date > current_date:
-                    upcoming_events.append(event)
-                elif end_date < current_date:
-                    past_events.append(event)
-        
-        # Sort events
-        if ongoing_events:
-            ongoing_events.sort(key=lambda x: x.get("dateTime"))
-        if upcoming_events:
-            upcoming_events.sort(key=lambda x: x.get("dateTime"))
-        if past_events:
-            past_events.sort(key=lambda x: x.get("dateTime", datetime.now()), reverse=True)
+        # Ongoing, upcoming and past events from the (userId, dateTime, endDate) index,
+        # each already sorted: ongoing/upcoming by start, past most recent first
+        _, ongoing_events, upcoming_events, past_events = event_calendar.classify(user_id, current_date)
+        # Counters kept current by writes and the transition scheduler, one point read
+        stats = event_stats.get(user_id)
         
         # Serialize events first to ensure they all have proper IDs
         serialized_ongoing = [serialize_event(event) for event in ongoing_events]
@@ -268,12 +273,7 @@ def get_dashboard_data(user_id: str = Depends(get_current_user)):
         
         return {
             "success": True,
-            "stats": {
-                "total": total_events,
-                "ongoing": len(ongoing_events),
-                "upcoming": len(upcoming_events),
-                "completed": len(past_events)
-            },
+            "stats": stats,
             "events": {
                 "ongoing": serialized_ongoing,
                 "upcoming": serialized_upcoming,
@@ -283,14 +283,130 @@ def get_dashboard_data(user_id: str = Depends(get_current_user)):
         }
         
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Dashboard error: {error_details}")
+        logger.exception("Dashboard error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve dashboard data: {str(e)}"
         )
 
+# Dashboard stats only: total, ongoing, upcoming and completed event counts
+@router.get("/stats", response_model=dict)
+def get_event_stats(user_id: str = Depends(get_current_user)):
+    try:
+        return {
+            "success": True,
+            "stats": event_stats.get(user_id)
+        }
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve event stats: {str(e)}"
+        )
+
+# Events overlapping a calendar month, week or day (the one containing `date`),
+# or an explicit start/end window, sorted by start
+@router.get("/calendar", response_model=dict)
+def get_calendar(
+    view: str = Query("month", pattern="^(month|week|day)$"),
+    date: Optional[datetime] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: str = Depends(get_current_user)
+):
+    if (start is None) != (end is None) or (start is not None and as_stored(start) > as_stored(end)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start and end must be given together, start before end"
+        )
+    try:
+        if start is None:
+            start, end = calendar_window(view, as_stored(date) if date else datetime.now())
+        else:
+            start, end = as_stored(start), as_stored(end)
+        events = event_calendar.overlapping(user_id, start, end)
+        return {
+            "success": True,
+            "start": start,
+            "end": end,
+            "events": [serialize_event(event) for event in events]
+        }
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve calendar: {str(e)}"
+        )
+
+# Run the events crew over several events, one NDJSON line per event as it finishes
+@router.post("/insights/batch")
+def run_event_insights_batch(batch: EventInsightsBatch, user_id: str = Depends(get_current_user)):
+    # crewAI is heavy to import, only load it when a batch is requested
+    from ..events_crew.batch import EVENTS_CREW_CONCURRENCY, ndjson_lines, run_batch
+
+    if not batch.eventIds:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="eventIds must not be empty"
+        )
+    concurrency = min(batch.concurrency or EVENTS_CREW_CONCURRENCY, EVENTS_CREW_CONCURRENCY * 4)
+    return StreamingResponse(
+        ndjson_lines(run_batch(batch.eventIds, concurrency, user_id)),
+        media_type="application/x-ndjson"
+    )
+
+# The event page in one request: one authentication and ownership check, and
+# the event, food and license reads running concurrently
+@router.get("/{event_id}/bundle", response_model=dict)
+async def get_event_bundle(
+    event_id: str,
+    include: str = Query(",".join(BUNDLE_PARTS), description="Comma separated parts: event, food, licenses"),
+    user_id: str = Depends(get_current_user)
+):
+    parts = {part.strip() for part in include.split(",") if part.strip()}
+    if not parts or parts - set(BUNDLE_PARTS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"include takes a comma separated list of {', '.join(BUNDLE_PARTS)}"
+        )
+    if not ObjectId.is_valid(event_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid event ID format")
+    try:
+        db = MongoDB.get_db()
+        # The event read is the ownership check, the other reads start alongside it
+        # and are dropped if it finds nothing
+        reads = {"event": run_in_threadpool(
+            db.events.find_one,
+            {"_id": ObjectId(event_id), "userId": user_id},
+            None if "event" in parts else {"_id": 1}
+        )}
+        if "food" in parts:
+            reads["food"] = run_in_threadpool(load_food_data, ObjectId(event_id))
+        if "licenses" in parts:
+            reads["licenses"] = run_in_threadpool(load_event_licenses, event_id)
+        results = dict(zip(reads, await asyncio.gather(*reads.values())))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve event bundle: {str(e)}"
+        )
+    
+    if not results["event"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found"
+        )
+    
+    bundle = {"success": True}
+    if "event" in parts:
+        bundle["event"] = event_payload(results["event"])
+    if "food" in parts:
+        bundle["food"] = EventFoodData(**results["food"]).dict()
+    if "licenses" in parts:
+        # Shaped like GET /{event_id}/licenses, whose response model is LicenseResponse
+        bundle["licenses"] = [LicenseResponse(**license).dict() for license in results["licenses"]]
+    return bundle
+
 # Get a single event by ID
 @router.get("/{event_id}", response_model=dict)
 def get_event(event_id: str, user_id: str = Depends(get_current_user)):
@@ -309,17 +425,9 @@ def get_event(event_id: str, user_id: str = Depends(get_current_user)):
                 detail="Event not found"
             )
         
-        # Process and serialize event
-        event = process_event_dates(event)
-        serialized = serialize_event(event)
-        
-        # Add type if not present
-        if "type" not in serialized:
-            serialized["type"] = "Conference"
-            
         return {
             "success": True,
-            "event": serialized
+            "event": event_payload(event)
         }
         
     except Exception as e:
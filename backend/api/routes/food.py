@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field
 from bson import ObjectId
 from datetime import datetime
 from ..database.mongodb import MongoDB
 from .auth import get_current_user
+from ..utils.portfolio import portfolio_analytics
+from ..utils.vendor_directory import vendor_directory, VendorConflict, InvalidVendor, reference, merge
 
 router = APIRouter()
 
@@ -28,6 +30,8 @@ class Vendor(BaseModel):
     phone: str
     status: str
     progress: int
+    # Directory id, set on responses for vendors shared through the directory
+    id: Optional[str] = None
 
 class FoodSummary(BaseModel):
     budget: float = 0
@@ -52,19 +56,15 @@ def get_food_collection():
         raise HTTPException(status_code=500, detail="MongoDB collection not found")
     return collection
 
-# Routes
-@router.get("/{event_id}/food-data", response_model=EventFoodData)
-def get_food_data(event_id: str, user_id: str = Depends(get_current_user)):
-    """Get all food data for an event in a single request"""
-    if not ObjectId.is_valid(event_id):
-        raise HTTPException(status_code=400, detail="Invalid event ID format")
-
+def load_food_data(event_id: ObjectId) -> dict:
+    """An event's food data, also read by the event bundle"""
     collection = get_food_collection()
-    event_food = collection.find_one({"event_id": ObjectId(event_id)})
+    # Vendor details come from the user's vendor directory
+    event_food = vendor_directory.food_data(collection, event_id)
     
     if not event_food:
         # Return default values from Pydantic model
-        return EventFoodData(summary=FoodSummary())
+        return EventFoodData(summary=FoodSummary()).dict()
     
     return {
         "summary": event_food.get("summary", FoodSummary().dict()),
@@ -73,6 +73,15 @@ def get_food_data(event_id: str, user_id: str = Depends(get_current_user)):
         "vendors": event_food.get("vendors", [])
     }
 
+# Routes
+@router.get("/{event_id}/food-data", response_model=EventFoodData)
+def get_food_data(event_id: str, user_id: str = Depends(get_current_user)):
+    """Get all food data for an event in a single request"""
+    if not ObjectId.is_valid(event_id):
+        raise HTTPException(status_code=400, detail="Invalid event ID format")
+
+    return load_food_data(ObjectId(event_id))
+
 @router.post("/{event_id}/menu-items")
 def create_menu_item(event_id: str, item: MenuItem, user_id: str = Depends(get_current_user)):
     """Add a new menu item to an event"""
@@ -123,13 +132,21 @@ def create_vendor(event_id: str, vendor: Vendor, user_id: str = Depends(get_curr
     if not ObjectId.is_valid(event_id):
         raise HTTPException(status_code=400, detail="Invalid event ID format")
     
-    vendor_dict = vendor.dict()
-    
-    # Add vendor and update summary
+    vendor_dict = vendor.dict(exclude={"id"})
+    try:
+        # An existing vendor is booked as is, details that differ from it are refused
+        shared = vendor_directory.resolve(user_id, vendor_dict, exact=True)
+    except InvalidVendor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except VendorConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    entry = reference(shared, vendor_dict)
+    
+    # Reference the directory vendor and update summary
     get_food_collection().update_one(
         {"event_id": ObjectId(event_id)},
         {
-            "$push": {"vendors": vendor_dict},
+            "$push": {"vendors": entry},
             "$inc": {"summary.vendor_count": 1},
             "$set": {
                 "summary.vendor_status": "In progress",
@@ -138,8 +155,9 @@ def create_vendor(event_id: str, vendor: Vendor, user_id: str = Depends(get_curr
         },
         upsert=True
     )
+    portfolio_analytics.touch(user_id)
     
-    return vendor_dict
+    return merge([entry], {shared["_id"]: shared})[0]
 
 @router.put("/{event_id}/menu-items/{item_index}")
 def update_menu_item(event_id: str, item_index: int, item: MenuItem, user_id: str = Depends(get_current_user)):
@@ -211,7 +229,11 @@ def update_beverage(event_id: str, beverage_index: int, beverage: Beverage, user
 
 @router.put("/{event_id}/vendors/{vendor_index}")
 def update_vendor(event_id: str, vendor_index: int, vendor: Vendor, user_id: str = Depends(get_current_user)):
-    """Update a vendor by index"""
+    """
+    Update a vendor of the event by index. Status and progress are the
+    event's own; the name, type, contact and phone are written to the
+    directory vendor it books, so every event booking them sees the change.
+    """
     if not ObjectId.is_valid(event_id):
         raise HTTPException(status_code=400, detail="Invalid event ID format")
         
@@ -221,9 +243,23 @@ def update_vendor(event_id: str, vendor_index: int, vendor: Vendor, user_id: str
     if not event_food or "vendors" not in event_food or len(event_food["vendors"]) <= vendor_index:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    vendor_dict = vendor.dict()
+    vendor_dict = vendor.dict(exclude={"id"})
+    current = event_food["vendors"][vendor_index]
+    try:
+        if "vendor_id" in current:
+            shared = vendor_directory.update(user_id, current["vendor_id"], vendor_dict)
+        else:
+            # Embedded before the directory: file it there now
+            shared = vendor_directory.resolve(user_id, vendor_dict, exact=True)
+    except InvalidVendor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except VendorConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if shared is None:
+        raise HTTPException(status_code=404, detail="Vendor not found")
+    entry = reference(shared, vendor_dict)
     vendors = event_food["vendors"]
-    vendors[vendor_index] = vendor_dict
+    vendors[vendor_index] = entry
     
     # Update vendor and recalculate status
     confirmed_count = sum(1 for v in vendors if v.get("status") == "Confirmed")
@@ -239,8 +275,9 @@ def update_vendor(event_id: str, vendor_index: int, vendor: Vendor, user_id: str
             }
         }
     )
+    portfolio_analytics.touch(user_id)
     
-    return vendor_dict
+    return merge([entry], {shared["_id"]: shared})[0]
 
 @router.delete("/{event_id}/menu-items/{item_index}")
 def delete_menu_item(event_id: str, item_index: int, user_id: str = Depends(get_current_user)):
@@ -320,5 +357,6 @@ def delete_vendor(event_id: str, vendor_index: int, user_id: str = Depends(get_c
             }
         }
     )
+    portfolio_analytics.touch(user_id)
     
     return {"detail": "Vendor deleted successfully"}
\ No newline at end of file
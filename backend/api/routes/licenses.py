@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta
+from urllib.parse import quote
 from typing import List, Optional, Union
 from api.database.mongodb import MongoDB
 from bson import ObjectId
 from api.routes.auth import get_current_user
+from api.langgraph.license_agent.knowledge_base import license_knowledge_base
+from api.routes.blobs import blob_response
+from api.utils.resumable_upload import UploadOffsetMismatch, UploadTooLarge, resumable_uploads
+from api.utils.search import index_document, unindex_document
+from api.utils.license_reminders import license_reminders
+from api.utils.portfolio import portfolio_analytics
 
 # Initialize router
 router = APIRouter()
@@ -18,6 +27,14 @@ class Document(BaseModel):
     name: str
     uploaded: bool
     url: Optional[str] = None
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+    mimeType: Optional[str] = None
+
+class DocumentUploadCreate(BaseModel):
+    name: str
+    size: int
+    mimeType: str = "application/octet-stream"
 
 class LicenseCreate(BaseModel):
     name: str
@@ -42,6 +59,7 @@ class LicenseResponse(BaseModel):
     documents: List[str]
     notes: Optional[str] = None
     eventId: str
+    documentFiles: List[Document] = []
 
     class Config:
         orm_mode = True
@@ -54,6 +72,10 @@ def serialize_license(license):
         return license
     return None
 
+def load_event_licenses(event_id: str) -> List[dict]:
+    """An event's licenses, also read by the event bundle"""
+    return [serialize_license(license) for license in MongoDB.get_db().licenses.find({"eventId": event_id})]
+
 # Create a new license
 @router.post("", response_model=dict[str, Union[bool, LicenseResponse]])
 def create_license(license: LicenseCreate, user_id: str = Depends(get_current_user)):
@@ -80,6 +102,9 @@ def create_license(license: LicenseCreate, user_id: str = Depends(get_current_us
         # Insert into MongoDB
         result = db.licenses.insert_one(license_data)
         created_license = db.licenses.find_one({"_id": result.inserted_id})
+        index_document("licenses", created_license)
+        license_reminders.license_changed(created_license)
+        portfolio_analytics.touch(user_id)
         
         return {
             "success": True,
@@ -118,10 +143,7 @@ def get_event_licenses(event_id: str, user_id: str = Depends(get_current_user)):
             )
         
         # Get all licenses for this event
-        licenses = list(db.licenses.find({"eventId": event_id}))
-        
-        # Process and serialize each license
-        processed_licenses = [serialize_license(license) for license in licenses]
+        processed_licenses = load_event_licenses(event_id)
         
         return {
             "success": True,
@@ -134,6 +156,236 @@ def get_event_licenses(event_id: str, user_id: str = Depends(get_current_user)):
             detail=f"Failed to retrieve licenses: {str(e)}"
         )
 
+# Search the license requirements the agent has already researched
+@router.get("/licenses/knowledge-base", response_model=dict)
+def search_license_knowledge_base(
+    authority: Optional[str] = None,
+    document: Optional[str] = None,
+    jurisdiction: Optional[str] = None,
+    type: Optional[str] = None,
+    user_id: str = Depends(get_current_user)
+):
+    try:
+        licenses = license_knowledge_base.filter(
+            authority=authority,
+            document=document,
+            jurisdiction=jurisdiction,
+            license_type=type,
+        )
+        return {
+            "success": True,
+            "licenses": licenses
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search license knowledge base: {str(e)}"
+        )
+
+# The user's open licenses due within `days`, overdue ones included, soonest first
+@router.get("/licenses/due-soon", response_model=dict)
+def get_licenses_due_soon(
+    days: int = Query(7, ge=0, le=365),
+    limit: int = Query(50, ge=1, le=500),
+    user_id: str = Depends(get_current_user)
+):
+    try:
+        now = datetime.now()
+        licenses = license_reminders.due_soon(user_id, now + timedelta(days=days), limit)
+        return {
+            "success": True,
+            "licenses": [
+                {**serialize_license(license), "overdue": license["dueDate"] < now}
+                for license in licenses
+            ]
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve licenses due soon: {str(e)}"
+        )
+
+def get_user_license(license_id: str, user_id: str):
+    license = MongoDB.get_db().licenses.find_one({
+        "_id": ObjectId(license_id),
+        "userId": user_id
+    })
+    if not license:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="License not found or you don't have permission to access its documents"
+        )
+    return license
+
+def attach_document(db, license_id: str, user_id: str, document: dict):
+    """
+    Set the license's file for the document's name, replacing an earlier
+    upload in place or adding it. Each write is a single update, so readers
+    never see the license without the document.
+    """
+    owned = {"_id": ObjectId(license_id), "userId": user_id}
+    name = document["name"]
+    now = datetime.now()
+    # A second round covers another upload of the same name landing in between
+    for _ in range(2):
+        replaced = db.licenses.update_one(
+            {**owned, "documentFiles.name": name},
+            {"$set": {"documentFiles.$": document, "updatedAt": now}, "$addToSet": {"documents": name}}
+        )
+        if replaced.matched_count:
+            return
+        added = db.licenses.update_one(
+            {**owned, "documentFiles.name": {"$ne": name}},
+            {"$push": {"documentFiles": document}, "$set": {"updatedAt": now}, "$addToSet": {"documents": name}}
+        )
+        if added.matched_count:
+            return
+
+def serialize_upload(session):
+    return {
+        "id": session["_id"],
+        "name": session["metadata"].get("name"),
+        "size": session["size"],
+        "mimeType": session["mimeType"],
+        "offset": session["offset"],
+    }
+
+# Start a resumable document upload for a license. The bytes are then sent with
+# PATCH requests carrying an Upload-Offset header, see append_license_document.
+@router.post("/licenses/{license_id}/documents/uploads", response_model=dict)
+def create_license_document_upload(
+    license_id: str,
+    upload: DocumentUploadCreate,
+    user_id: str = Depends(get_current_user)
+):
+    try:
+        get_user_license(license_id, user_id)
+        session = resumable_uploads.create(
+            user_id, upload.size, upload.mimeType, {"licenseId": license_id, "name": upload.name},
+        )
+        return {
+            "success": True,
+            "upload": serialize_upload(session)
+        }
+
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start document upload: {str(e)}"
+        )
+
+# Where an interrupted upload has to resume
+@router.get("/licenses/{license_id}/documents/uploads/{upload_id}", response_model=dict)
+def get_license_document_upload(license_id: str, upload_id: str, user_id: str = Depends(get_current_user)):
+    session = resumable_uploads.get(upload_id, user_id)
+    if not session or session["metadata"].get("licenseId") != license_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    return {
+        "success": True,
+        "upload": serialize_upload(session)
+    }
+
+# Append the request body at Upload-Offset. The last append stores the document
+# and attaches it to the license's documents.
+@router.patch("/licenses/{license_id}/documents/uploads/{upload_id}", response_model=dict)
+async def append_license_document(
+    license_id: str,
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    user_id: str = Depends(get_current_user)
+):
+    try:
+        session = await run_in_threadpool(resumable_uploads.get, upload_id, user_id)
+        if not session or session["metadata"].get("licenseId") != license_id:
+            raise KeyError(upload_id)
+        session, blob = await resumable_uploads.append(upload_id, user_id, upload_offset, request.stream())
+        if blob is None:
+            return {
+                "success": True,
+                "upload": serialize_upload(session)
+            }
+
+        name = session["metadata"]["name"]
+        document = Document(
+            name=name,
+            uploaded=True,
+            url=f"/api/events/licenses/{license_id}/documents/{blob['sha256']}",
+            sha256=blob["sha256"],
+            size=blob["size"],
+            mimeType=blob["mimeType"],
+        ).dict()
+        await run_in_threadpool(attach_document, MongoDB.get_db(), license_id, user_id, document)
+        return {
+            "success": True,
+            "upload": serialize_upload(session),
+            "document": document
+        }
+
+    except UploadOffsetMismatch as e:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"detail": str(e), "offset": e.offset},
+            headers={"Upload-Offset": str(e.offset)}
+        )
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload document: {str(e)}"
+        )
+
+# Download a license document, a Range header gets part of it
+@router.get("/licenses/{license_id}/documents/{sha256}")
+def get_license_document(
+    license_id: str,
+    sha256: str,
+    range: Optional[str] = Header(None),
+    user_id: str = Depends(get_current_user)
+):
+    try:
+        license = get_user_license(license_id, user_id)
+        document = next((d for d in license.get("documentFiles", []) if d.get("sha256") == sha256), None)
+        if document is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found"
+            )
+        return blob_response(sha256, range, {
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(document['name'])}"
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve document: {str(e)}"
+        )
+
 # Update a license
 @router.put("/{license_id}", response_model=dict[str, Union[bool, LicenseResponse]])
 def update_license(
@@ -167,6 +419,9 @@ def update_license(
         
         # Get updated license
         updated_license = db.licenses.find_one({"_id": ObjectId(license_id)})
+        index_document("licenses", updated_license)
+        license_reminders.license_changed(updated_license)
+        portfolio_analytics.touch(user_id)
         
         return {
             "success": True,
@@ -226,6 +481,9 @@ def update_event_license(
         
         # Get updated license
         updated_license = db.licenses.find_one({"_id": ObjectId(license_id)})
+        index_document("licenses", updated_license)
+        license_reminders.license_changed(updated_license)
+        portfolio_analytics.touch(user_id)
         
         return {
             "success": True,
@@ -258,6 +516,8 @@ def delete_license(license_id: str, user_id: str = Depends(get_current_user)):
         
         # Delete the license
         db.licenses.delete_one({"_id": ObjectId(license_id)})
+        unindex_document("licenses", license_id)
+        portfolio_analytics.touch(user_id)
         
         return {
             "success": True,
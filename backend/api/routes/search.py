@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from api.routes.auth import get_current_user
+from api.utils.search import FIELD_WEIGHTS, search
+
+# Initialize router
+router = APIRouter()
+
+# Search the user's events and licenses. `type` narrows it to "events" or
+# "licenses", results are ranked across both and paginated with limit/offset.
+@router.get("", response_model=dict)
+def search_events_and_licenses(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: str = "all",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    user_id: str = Depends(get_current_user)
+):
+    kinds = list(FIELD_WEIGHTS) if type == "all" else [type]
+    if any(kind not in FIELD_WEIGHTS for kind in kinds):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="type must be one of all, events, licenses"
+        )
+    try:
+        page = search(user_id, q, kinds, limit, offset)
+        return {
+            "success": True,
+            "limit": limit,
+            "offset": offset,
+            **page
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search: {str(e)}"
+        )
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+from bson import ObjectId
+from api.routes.auth import get_current_user
+from api.utils.vendor_directory import vendor_directory, VendorConflict, InvalidVendor
+
+# Initialize router
+router = APIRouter()
+
+class VendorDetails(BaseModel):
+    name: str
+    type: str
+    contact: str
+    phone: str
+
+def _vendor_response(vendor: dict) -> dict:
+    return {
+        "id": str(vendor["_id"]),
+        "name": vendor.get("name", ""),
+        "type": vendor.get("type", ""),
+        "contact": vendor.get("contact", ""),
+        "phone": vendor.get("phone", ""),
+    }
+
+# The user's vendor directory, shared by all of their events
+@router.get("", response_model=dict)
+def list_vendors(
+    q: str = Query("", description="Start of the vendor name"),
+    limit: int = Query(100, ge=1, le=500),
+    user_id: str = Depends(get_current_user)
+):
+    try:
+        vendors = vendor_directory.list(user_id, q, limit)
+        return {
+            "success": True,
+            "vendors": [_vendor_response(vendor) for vendor in vendors]
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch vendors: {str(e)}"
+        )
+
+# Contact details changed here show up in every event that books the vendor
+@router.put("/{vendor_id}", response_model=dict)
+def update_vendor(vendor_id: str, details: VendorDetails, user_id: str = Depends(get_current_user)):
+    if not ObjectId.is_valid(vendor_id):
+        raise HTTPException(status_code=400, detail="Invalid vendor ID format")
+    try:
+        vendor = vendor_directory.update(user_id, ObjectId(vendor_id), details.dict())
+    except InvalidVendor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except VendorConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update vendor: {str(e)}"
+        )
+    if vendor is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vendor not found")
+    return {"success": True, "vendor": _vendor_response(vendor)}
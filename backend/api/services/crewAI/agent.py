@@ -3,12 +3,21 @@ This is the main entry point for the agent.
 It defines the workflow graph, state, tools, nodes and edges.
 """
 
+import os
 import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing_extensions import Literal
-from litellm import completion
+from litellm import acompletion
 from crewai.flow.flow import Flow, start, router, listen
 
-from copilotkit.crewai import copilotkit_stream, CopilotKitState
+from copilotkit.crewai import CopilotKitState
+from .streaming import copilotkit_astream
+
+# Run the tool calls of one response concurrently instead of one at a time
+PARALLEL_TOOL_CALLS = os.getenv("CREWAI_PARALLEL_TOOL_CALLS", "false").lower() == "true"
+# Messages kept in the flow state, older ones are dropped before each model call
+MAX_HISTORY_MESSAGES = int(os.getenv("CREWAI_MAX_HISTORY_MESSAGES", "40"))
 
 class AgentState(CopilotKitState):
     """
@@ -49,6 +58,35 @@ tool_handlers = {
     # your tool handler here
 }
 
+# Tool handlers are plain functions and may block, so they run off the event loop
+tool_executor = ThreadPoolExecutor(max_workers=int(os.getenv("CREWAI_TOOL_WORKERS", "8")))
+
+def _role(message) -> str:
+    return message.get("role") if hasattr(message, "get") else getattr(message, "role", None)
+
+def trim_history(messages: list, limit: int) -> list:
+    """The last `limit` messages, without leading tool results whose tool call was dropped"""
+    if len(messages) <= limit:
+        return messages
+    cut = len(messages) - limit
+    while cut < len(messages) and _role(messages[cut]) == "tool":
+        cut += 1
+    return messages[cut:]
+
+async def run_tool_calls(tool_calls: list) -> list:
+    """Tool messages for backend tool calls, in call order"""
+    loop = asyncio.get_running_loop()
+
+    async def run(tool_call):
+        handler = tool_handlers[tool_call["function"]["name"]]
+        args = json.loads(tool_call["function"]["arguments"])
+        result = await loop.run_in_executor(tool_executor, handler, args)
+        return {"role": "tool", "content": result, "tool_call_id": tool_call["id"]}
+
+    if PARALLEL_TOOL_CALLS:
+        return list(await asyncio.gather(*(run(tool_call) for tool_call in tool_calls)))
+    return [await run(tool_call) for tool_call in tool_calls]
+
 class SampleAgentFlow(Flow[AgentState]):
     """
     This is a sample flow that uses the CopilotKit framework to create a chat agent.
@@ -75,11 +113,14 @@ class SampleAgentFlow(Flow[AgentState]):
         """
         system_prompt = f"You are a helpful assistant. Talk in {self.state.language}."
 
+        # Keep the history bounded, long sessions otherwise resend everything
+        self.state.messages[:] = trim_history(self.state.messages, MAX_HISTORY_MESSAGES)
+
         # 1. Run the model and stream the response
-        #    Note: In order to stream the response, wrap the completion call in
-        #    copilotkit_stream and set stream=True.
-        response = await copilotkit_stream(
-            completion(
+        #    Note: acompletion with stream=True reads the stream without blocking
+        #    the event loop, copilotkit_astream forwards it to CopilotKit.
+        response = await copilotkit_astream(
+            await acompletion(
 
                 # 1.1 Specify the model to use
                 model="openai/gpt-4o",
@@ -97,10 +138,9 @@ class SampleAgentFlow(Flow[AgentState]):
                     GET_WEATHER_TOOL
                 ],
 
-                # 1.3 Disable parallel tool calls to avoid race conditions,
-                #     enable this for faster performance if you want to manage
-                #     the complexity of running tool calls in parallel.
-                parallel_tool_calls=False,
+                # 1.3 Parallel tool calls are off unless CREWAI_PARALLEL_TOOL_CALLS
+                #     is set, their handlers then run concurrently.
+                parallel_tool_calls=PARALLEL_TOOL_CALLS,
                 stream=True
             )
         )
@@ -112,32 +152,25 @@ class SampleAgentFlow(Flow[AgentState]):
 
         # 3. Handle tool calls
         if message.get("tool_calls"):
-            tool_call = message["tool_calls"][0]
-            tool_call_id = tool_call["id"]
-            tool_call_name = tool_call["function"]["name"]
-            tool_call_args = json.loads(tool_call["function"]["arguments"])
-
-            # 4. Check for tool calls in the response and handle them. If the tool call
-            #    is a CopilotKit action, we return the response to CopilotKit to handle
-            if (tool_call_name in
-                [action["function"]["name"] for action in self.state.copilotkit.actions]):
+            action_names = {action["function"]["name"] for action in self.state.copilotkit.actions}
+            backend_calls = [
+                tool_call for tool_call in message["tool_calls"]
+                if tool_call["function"]["name"] not in action_names
+            ]
+
+            # 4. Handle the backend tool calls and append their results to the
+            #    messages in state
+            self.state.messages.extend(await run_tool_calls(backend_calls))
+
+            # 5. If any tool call is a CopilotKit action, we return the response
+            #    to CopilotKit to handle
+            if len(backend_calls) < len(message["tool_calls"]):
                 return "route_end"
 
-            # 5. Otherwise, we handle the tool call on the backend
-            handler = tool_handlers[tool_call_name]
-            result = handler(tool_call_args)
-
-            # 6. Append the result to the messages in state
-            self.state.messages.append({
-                "role": "tool",
-                "content": result,
-                "tool_call_id": tool_call_id
-            })
-
-            # 7. Return to the follow up route to continue the conversation
+            # 6. Return to the follow up route to continue the conversation
             return "route_follow_up"
 
-        # 8. If there are no tool calls, return to the end route
+        # 7. If there are no tool calls, return to the end route
         return "route_end"
 
     @listen("route_end")
@@ -0,0 +1,125 @@
+"""
+Non-blocking version of copilotkit_stream.
+
+copilotkit_stream iterates a synchronous litellm stream, so every network read
+blocks the event loop and with it every other session. copilotkit_astream
+consumes an `acompletion(..., stream=True)` stream instead and emits the same
+CopilotKit events. Tool calls are tracked by their index, so parallel tool
+calls come back complete.
+"""
+from litellm.types.utils import (
+    ModelResponse,
+    Choices,
+    Message as LiteLLMMessage,
+    ChatCompletionMessageToolCall,
+    Function as LiteLLMFunction,
+)
+from copilotkit.runloop import queue_put
+from copilotkit.protocol import (
+    text_message_start,
+    text_message_content,
+    text_message_end,
+    action_execution_start,
+    action_execution_args,
+    action_execution_end,
+)
+
+async def copilotkit_astream(response) -> ModelResponse:
+    """
+    Stream an async litellm response to CopilotKit and return the complete message.
+
+    ```python
+    response = await copilotkit_astream(
+        await acompletion(model="openai/gpt-4o", messages=messages, tools=tools, stream=True)
+    )
+    ```
+    """
+    message_id = None
+    created, model, system_fingerprint, finish_reason = 0, "", None, None
+    content = ""
+    text_open = False
+    # index -> {"id", "name", "arguments"}, in the order the calls started
+    tool_calls = {}
+    open_tool_call = None
+
+    async def close_text():
+        nonlocal text_open
+        if text_open:
+            await queue_put(text_message_end(message_id=message_id))
+            text_open = False
+
+    async def close_tool_call():
+        nonlocal open_tool_call
+        if open_tool_call is not None:
+            await queue_put(action_execution_end(action_execution_id=open_tool_call))
+            open_tool_call = None
+
+    async for chunk in response:
+        message_id = message_id or chunk.id
+        created, model = chunk.created, chunk.model
+        system_fingerprint = getattr(chunk, "system_fingerprint", None)
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        delta = choice.delta
+
+        if delta.content:
+            await close_tool_call()
+            if not text_open:
+                await queue_put(text_message_start(message_id=message_id, parent_message_id=None))
+                text_open = True
+            content += delta.content
+            await queue_put(text_message_content(message_id=message_id, content=delta.content))
+
+        for tool_call in delta.tool_calls or []:
+            index = tool_call.index or 0
+            if index not in tool_calls:
+                await close_text()
+                await close_tool_call()
+                tool_calls[index] = {"id": tool_call.id, "name": tool_call.function.name, "arguments": ""}
+                open_tool_call = tool_call.id
+                await queue_put(action_execution_start(
+                    action_execution_id=tool_call.id,
+                    action_name=tool_call.function.name,
+                    parent_message_id=message_id,
+                ))
+            if tool_call.function.arguments:
+                tool_calls[index]["arguments"] += tool_call.function.arguments
+                await queue_put(action_execution_args(
+                    action_execution_id=tool_calls[index]["id"],
+                    args=tool_call.function.arguments,
+                ))
+
+        if choice.finish_reason is not None:
+            finish_reason = choice.finish_reason
+
+    await close_text()
+    await close_tool_call()
+
+    calls = [
+        ChatCompletionMessageToolCall(
+            function=LiteLLMFunction(arguments=call["arguments"], name=call["name"]),
+            id=call["id"],
+            type="function",
+        )
+        for _, call in sorted(tool_calls.items())
+    ]
+    return ModelResponse(
+        id=message_id,
+        created=created,
+        model=model,
+        object="chat.completion",
+        system_fingerprint=system_fingerprint,
+        choices=[
+            Choices(
+                finish_reason=finish_reason,
+                index=0,
+                message=LiteLLMMessage(
+                    content=content,
+                    role="assistant",
+                    tool_calls=calls or None,
+                    function_call=None,
+                ),
+            )
+        ],
+    )
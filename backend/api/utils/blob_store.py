@@ -0,0 +1,311 @@
+"""
+Content-addressed storage for image and file message parts.
+
+Uploads are streamed into the store while their SHA-256 is computed, and a
+blob is kept once per digest, so the same picture uploaded twice costs one
+copy. Chat messages then carry a reference
+
+    blob:sha256:<hex digest>
+
+instead of an inline base64 string. References stay references in graph state
+and checkpoints and are only turned into data URLs by `resolve_blob_refs`
+right before a model call, from a memory map of the stored file.
+
+Storage is shared, access is not: `blob_holders` records which users
+uploaded a blob through POST /api/blobs, and a user can only read or
+reference blobs they hold. Uploading bytes someone else stored keeps one
+copy but tells the caller nothing about it.
+
+The store is the local filesystem (BLOB_STORE_DIR) by default, or GridFS in
+the app database with BLOB_STORE=gridfs. Either way uploads are staged on
+local disk first (BLOB_STAGING_DIR for GridFS) and hashed on the way, so
+nothing is buffered in memory.
+"""
+import os
+import re
+import mmap
+import uuid
+import base64
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage
+from .metrics import registry
+
+BLOB_REF_PREFIX = "blob:sha256:"
+BLOB_MAX_BYTES = int(os.getenv("BLOB_MAX_BYTES", str(20 * 1024 * 1024)))
+
+_REF = re.compile(r"^blob:sha256:([0-9a-f]{64})$")
+
+blob_uploads = registry.counter("blob_uploads_total", "Blob uploads by outcome", ("outcome",))
+blob_upload_bytes = registry.counter("blob_upload_bytes_total", "Bytes received by blob uploads", ("outcome",))
+blob_resolved_bytes = registry.counter(
+    "blob_resolved_bytes_total", "Blob bytes turned into data URLs for model calls",
+)
+
+class BlobTooLarge(ValueError):
+    pass
+
+def blob_ref(digest: str) -> str:
+    return f"{BLOB_REF_PREFIX}{digest}"
+
+def is_digest(value: str) -> bool:
+    return bool(re.fullmatch(r"[0-9a-f]{64}", value))
+
+def parse_blob_ref(value) -> Optional[str]:
+    """The digest of a blob reference, None for anything else (URLs, base64)"""
+    if not isinstance(value, str):
+        return None
+    match = _REF.match(value)
+    return match.group(1) if match else None
+
+class _Writer:
+    """Hashes and counts what is written to a staging file, the store decides where it goes"""
+    def __init__(self, store: "_BlobStore", mime_type: str):
+        self.store = store
+        self.mime_type = mime_type
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self.tmp_path = os.path.join(store.staging_dir, f".upload-{uuid.uuid4().hex}")
+        self._file = open(self.tmp_path, "wb")
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > BLOB_MAX_BYTES:
+            raise BlobTooLarge(f"Blob exceeds {BLOB_MAX_BYTES} bytes")
+        self._hash.update(chunk)
+        self._file.write(chunk)
+
+    def close(self) -> dict:
+        self._file.close()
+        return self.store.put_file(self.tmp_path, self._hash.hexdigest(), self.mime_type)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+def _blob_info(digest: str, size: int, mime_type: str, deduplicated: bool) -> dict:
+    outcome = "deduplicated" if deduplicated else "stored"
+    blob_uploads.inc(outcome=outcome)
+    blob_upload_bytes.inc(size, outcome=outcome)
+    return {
+        "ref": blob_ref(digest),
+        "sha256": digest,
+        "size": size,
+        "mimeType": mime_type,
+        "deduplicated": deduplicated,
+    }
+
+class _BlobStore:
+    staging_dir: str
+
+    def open_writer(self, mime_type: str) -> _Writer:
+        os.makedirs(self.staging_dir, exist_ok=True)
+        return _Writer(self, mime_type)
+
+    def put(self, chunks: Iterable[bytes], mime_type: str) -> dict:
+        """Store a blob from an iterable of byte chunks, returns its reference and size"""
+        writer = self.open_writer(mime_type)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        except Exception:
+            writer.abort()
+            raise
+        return writer.close()
+
+class FileSystemBlobStore(_BlobStore):
+    """Blobs as files named by digest under `root`, fanned out by the first two hex chars"""
+    def __init__(self, root: str):
+        self.root = root
+        # Inside root, so finished uploads are moved into place rather than copied
+        self.staging_dir = os.path.join(root, ".uploads")
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put_file(self, path: str, digest: str, mime_type: str) -> dict:
+        """Take over a staged file whose SHA-256 is `digest`"""
+        size = os.path.getsize(path)
+        target = self._path(digest)
+        if os.path.exists(target):
+            os.remove(path)
+            return _blob_info(digest, size, mime_type, deduplicated=True)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(f"{target}.type", "w") as f:
+            f.write(mime_type)
+        # Atomic, so readers never see a partial blob under its digest
+        os.replace(path, target)
+        return _blob_info(digest, size, mime_type, deduplicated=False)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def stat(self, digest: str) -> Tuple[int, str]:
+        path = self._path(digest)
+        with open(f"{path}.type") as f:
+            return os.path.getsize(path), f.read()
+
+    @contextmanager
+    def open(self, digest: str) -> Iterator[Tuple[memoryview, str]]:
+        """Read-only memory map of the blob and its mime type, nothing is copied"""
+        path = self._path(digest)
+        size, mime_type = self.stat(digest)
+        if size == 0:
+            yield memoryview(b""), mime_type
+            return
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as data:
+                yield data, mime_type
+
+    def iter_range(self, digest: str, start: int, end: int, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Bytes start..end (inclusive) in chunks"""
+        with open(self._path(digest), "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+class GridFSBlobStore(_BlobStore):
+    """Blobs in a GridFS bucket of the app database, the digest is the file name"""
+    def __init__(self, bucket_name: str = "blobs", staging_dir: str = "uploads"):
+        self.bucket_name = bucket_name
+        self.staging_dir = staging_dir
+        self._indexed = False
+
+    def _db(self):
+        from ..database.mongodb import MongoDB
+        return MongoDB.get_db()
+
+    def _bucket(self):
+        import gridfs
+        return gridfs.GridFSBucket(self._db(), bucket_name=self.bucket_name)
+
+    def _files(self):
+        files = self._db()[f"{self.bucket_name}.files"]
+        if not self._indexed:
+            files.create_index("filename")
+            self._indexed = True
+        return files
+
+    def put_file(self, path: str, digest: str, mime_type: str) -> dict:
+        """Stream a staged file whose SHA-256 is `digest` into GridFS, then drop it"""
+        size = os.path.getsize(path)
+        try:
+            if self.exists(digest):
+                return _blob_info(digest, size, mime_type, deduplicated=True)
+            with open(path, "rb") as f:
+                self._bucket().upload_from_stream_with_id(
+                    uuid.uuid4().hex, digest, f, metadata={"mimeType": mime_type},
+                )
+            return _blob_info(digest, size, mime_type, deduplicated=False)
+        finally:
+            os.remove(path)
+
+    def exists(self, digest: str) -> bool:
+        return self._files().find_one({"filename": digest}, {"_id": 1}) is not None
+
+    def stat(self, digest: str) -> Tuple[int, str]:
+        doc = self._files().find_one({"filename": digest}, {"length": 1, "metadata": 1})
+        if doc is None:
+            raise FileNotFoundError(digest)
+        return doc["length"], (doc.get("metadata") or {}).get("mimeType", "application/octet-stream")
+
+    @contextmanager
+    def open(self, digest: str) -> Iterator[Tuple[memoryview, str]]:
+        """The blob and its mime type. GridFS chunks live in Mongo, so this is one read"""
+        stream = self._bucket().open_download_stream_by_name(digest)
+        try:
+            yield memoryview(stream.read()), (stream.metadata or {}).get("mimeType", "application/octet-stream")
+        finally:
+            stream.close()
+
+    def iter_range(self, digest: str, start: int, end: int, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Bytes start..end (inclusive) in chunks, only the GridFS chunks covering them are read"""
+        stream = self._bucket().open_download_stream_by_name(digest)
+        try:
+            stream.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = stream.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            stream.close()
+
+class BlobHolders:
+    """Which users hold a blob, i.e. uploaded it themselves through POST /api/blobs"""
+    def __init__(self, collection_name: str = "blob_holders"):
+        self.collection_name = collection_name
+        self._indexed = False
+
+    def _collection(self):
+        from ..database.mongodb import MongoDB
+        collection = MongoDB.get_db()[self.collection_name]
+        if not self._indexed:
+            collection.create_index([("userId", 1), ("sha256", 1)], unique=True)
+            self._indexed = True
+        return collection
+
+    def add(self, user_id: str, digest: str) -> bool:
+        """Record that the user holds the blob, False when they already did"""
+        result = self._collection().update_one(
+            {"userId": user_id, "sha256": digest},
+            {"$setOnInsert": {"createdAt": datetime.now()}},
+            upsert=True,
+        )
+        return result.upserted_id is not None
+
+    def holds(self, user_id: Optional[str], digest: str) -> bool:
+        if user_id is None:
+            return False
+        return self._collection().find_one({"userId": user_id, "sha256": digest}, {"_id": 1}) is not None
+
+def data_url(digest: str) -> str:
+    with blob_store.open(digest) as (data, mime_type):
+        blob_resolved_bytes.inc(len(data))
+        return f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+def _resolve_part(part):
+    if not isinstance(part, dict):
+        return part
+    if part.get("type") == "image_url":
+        image_url = part["image_url"]
+        url = image_url.get("url") if isinstance(image_url, dict) else image_url
+        digest = parse_blob_ref(url)
+        if digest:
+            url = data_url(digest)
+            return {**part, "image_url": {**image_url, "url": url} if isinstance(image_url, dict) else url}
+    elif part.get("type") == "file":
+        digest = parse_blob_ref(part["file"].get("file_data"))
+        if digest:
+            return {**part, "file": {**part["file"], "file_data": data_url(digest)}}
+    return part
+
+def resolve_blob_refs(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """Messages for a model call with blob references replaced by data URLs.
+
+    Messages without references are passed through as is, the state keeps the references."""
+    resolved = []
+    for message in messages:
+        if isinstance(message, HumanMessage) and isinstance(message.content, list):
+            content = [_resolve_part(part) for part in message.content]
+            if any(new is not old for new, old in zip(content, message.content)):
+                message = message.model_copy(update={"content": content})
+        resolved.append(message)
+    return resolved
+
+blob_holders = BlobHolders()
+
+if os.getenv("BLOB_STORE", "filesystem") == "gridfs":
+    blob_store = GridFSBlobStore(staging_dir=os.getenv("BLOB_STAGING_DIR", "uploads"))
+else:
+    blob_store = FileSystemBlobStore(os.getenv("BLOB_STORE_DIR", "blobs"))
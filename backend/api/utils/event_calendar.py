@@ -0,0 +1,222 @@
+"""
+Time-window queries over a user's events.
+
+An event occupies [dateTime, endDate], events saved without an end date last
+one day (as process_event_dates fills it in). "What overlaps [start, end]" is
+`dateTime <= end AND endDate >= start`, answered by Mongo from the
+(userId, dateTime, endDate) index.
+
+Users who query often get their events cached in a centered interval tree, so
+a month, week or day view is O(log n + k) in memory. A user becomes hot after
+CALENDAR_HOT_QUERIES queries, trees are dropped on every write to the user's
+events and after CALENDAR_CACHE_TTL_SECONDS (writes from other workers), and
+at most CALENDAR_CACHE_USERS are kept.
+"""
+import os
+import time
+import bisect
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from .metrics import registry
+
+CALENDAR_HOT_QUERIES = int(os.getenv("CALENDAR_HOT_QUERIES", "3"))
+CALENDAR_CACHE_USERS = int(os.getenv("CALENDAR_CACHE_USERS", "256"))
+CALENDAR_CACHE_TTL_SECONDS = float(os.getenv("CALENDAR_CACHE_TTL_SECONDS", "60"))
+DEFAULT_DURATION = timedelta(days=1)
+
+calendar_queries = registry.counter("calendar_queries_total", "Event time-window queries", ("source",))
+calendar_cached_users = registry.gauge("calendar_cached_users", "Users with an event interval tree in this process")
+
+def as_stored(moment: datetime) -> datetime:
+    """Naive UTC for timezone-aware input, which is how Mongo hands dates back"""
+    return moment.astimezone(timezone.utc).replace(tzinfo=None) if moment.tzinfo else moment
+
+def event_interval(event: dict) -> Tuple[datetime, datetime]:
+    start = event["dateTime"]
+    return start, event.get("endDate") or start + DEFAULT_DURATION
+
+class IntervalTree:
+    """
+    Centered interval tree over events, plus the events sorted by start and by
+    end for open-ended windows. Built once, a change means a new tree.
+    """
+    def __init__(self, events: List[dict]):
+        intervals = [(*event_interval(event), event) for event in events if event.get("dateTime")]
+        self.by_start = sorted(intervals, key=lambda interval: interval[0])
+        self.starts = [interval[0] for interval in self.by_start]
+        self.by_end = sorted(intervals, key=lambda interval: interval[1])
+        self.ends = [interval[1] for interval in self.by_end]
+        self.total = len(events)
+        self._root = self._build(self.by_start)
+
+    @classmethod
+    def _build(cls, intervals):
+        """Node: (center, left, right, intervals containing center by start, the same by end descending)"""
+        if not intervals:
+            return None
+        endpoints = sorted(point for interval in intervals for point in interval[:2])
+        center = endpoints[len(endpoints) // 2]
+        left, here, right = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        # `intervals` is sorted by start, so are the partitions
+        by_end = sorted(here, key=lambda interval: interval[1], reverse=True)
+        return center, cls._build(left), cls._build(right), here, by_end
+
+    def overlapping(self, start: datetime, end: datetime) -> List[dict]:
+        """Events overlapping [start, end], by start"""
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            center, left, right, by_start, by_end = node
+            if end < center:
+                # Every interval here ends at or after the center, past the window end
+                for interval in by_start:
+                    if interval[0] > end:
+                        break
+                    found.append(interval)
+                stack.append(left)
+            elif start > center:
+                for interval in by_end:
+                    if interval[1] < start:
+                        break
+                    found.append(interval)
+                stack.append(right)
+            else:
+                found.extend(by_start)
+                stack.append(left)
+                stack.append(right)
+        found.sort(key=lambda interval: interval[0])
+        return [interval[2] for interval in found]
+
+    def starting_after(self, moment: datetime) -> List[dict]:
+        return [interval[2] for interval in self.by_start[bisect.bisect_right(self.starts, moment):]]
+
+    def ended_before(self, moment: datetime) -> List[dict]:
+        return [interval[2] for interval in self.by_end[:bisect.bisect_left(self.ends, moment)]]
+
+class EventCalendar:
+    """Overlap queries against Mongo, or against the interval tree of hot users"""
+    def __init__(self, hot_queries: int = CALENDAR_HOT_QUERIES, capacity: int = CALENDAR_CACHE_USERS,
+                 ttl_seconds: float = CALENDAR_CACHE_TTL_SECONDS):
+        self.hot_queries = hot_queries
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        # user id -> [queries, tree or None, built at, writes seen], least recently used first
+        self._users: "OrderedDict[str, list]" = OrderedDict()
+        self._indexed = False
+        self._lock = threading.Lock()
+
+    def _collection(self):
+        from ..database.mongodb import MongoDB
+        collection = MongoDB.get_db().events
+        if not self._indexed:
+            collection.create_index([("userId", 1), ("dateTime", 1), ("endDate", 1)])
+            collection.create_index([("userId", 1), ("endDate", 1)])
+            self._indexed = True
+        return collection
+
+    def _tree(self, user_id: str) -> Optional[IntervalTree]:
+        """The user's tree, built once they are hot"""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                entry = self._users[user_id] = [0, None, 0.0, 0]
+                while len(self._users) > self.capacity:
+                    self._users.popitem(last=False)
+            self._users.move_to_end(user_id)
+            entry[0] += 1
+            if entry[1] is not None and time.monotonic() - entry[2] < self.ttl_seconds:
+                return entry[1]
+            if entry[0] < self.hot_queries:
+                return None
+            writes = entry[3]
+        tree = IntervalTree(list(self._collection().find({"userId": user_id})))
+        with self._lock:
+            # A write while the tree was read makes it stale, serve it this once but don't keep it
+            if entry[3] == writes:
+                entry[1], entry[2] = tree, time.monotonic()
+            calendar_cached_users.set(sum(1 for e in self._users.values() if e[1] is not None))
+        return tree
+
+    def invalidate(self, user_id: str):
+        """Call after writing one of the user's events"""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                entry[1] = None
+                entry[3] += 1
+
+    def overlapping(self, user_id: str, start: datetime, end: datetime) -> List[dict]:
+        """The user's events overlapping [start, end], by start"""
+        tree = self._tree(user_id)
+        if tree is not None:
+            calendar_queries.inc(source="cache")
+            return [dict(event) for event in tree.overlapping(start, end)]
+        calendar_queries.inc(source="mongo")
+        return self._overlapping_from_mongo(user_id, start, end)
+
+    def _overlapping_from_mongo(self, user_id: str, start: datetime, end: datetime) -> List[dict]:
+        return list(self._collection().find(
+            {
+                "userId": user_id,
+                "dateTime": {"$lte": end},
+                "$or": [
+                    {"endDate": {"$gte": start}},
+                    {"endDate": None, "dateTime": {"$gte": start - DEFAULT_DURATION}},
+                ],
+            },
+            sort=[("dateTime", 1)],
+        ))
+
+    def classify(self, user_id: str, now: datetime) -> Tuple[int, List[dict], List[dict], List[dict]]:
+        """Total count and the ongoing, upcoming and past events at `now`, each sorted for the dashboard"""
+        tree = self._tree(user_id)
+        if tree is not None:
+            calendar_queries.inc(source="cache")
+            ongoing = [dict(event) for event in tree.overlapping(now, now)]
+            upcoming = [dict(event) for event in tree.starting_after(now)]
+            past = [dict(event) for event in tree.ended_before(now)]
+            total = tree.total
+        else:
+            calendar_queries.inc(source="mongo")
+            collection = self._collection()
+            ongoing = self._overlapping_from_mongo(user_id, now, now)
+            upcoming = list(collection.find({"userId": user_id, "dateTime": {"$gt": now}}, sort=[("dateTime", 1)]))
+            past = list(collection.find({
+                "userId": user_id,
+                "$or": [
+                    {"endDate": {"$lt": now}},
+                    {"endDate": None, "dateTime": {"$lt": now - DEFAULT_DURATION}},
+                ],
+            }))
+            total = collection.count_documents({"userId": user_id})
+        past.sort(key=lambda event: event["dateTime"], reverse=True)
+        return total, ongoing, upcoming, past
+
+def calendar_window(view: str, day: datetime) -> Tuple[datetime, datetime]:
+    """[start, end] of the month, week (Monday first) or day containing `day`"""
+    start = day.replace(hour=0, minute=0, second=0, microsecond=0)
+    if view == "day":
+        following = start + timedelta(days=1)
+    elif view == "week":
+        start -= timedelta(days=start.weekday())
+        following = start + timedelta(days=7)
+    elif view == "month":
+        start = start.replace(day=1)
+        following = (start + timedelta(days=32)).replace(day=1)
+    else:
+        raise ValueError(f"Unknown calendar view: {view}")
+    return start, following - timedelta(microseconds=1)
+
+event_calendar = EventCalendar()
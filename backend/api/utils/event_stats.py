@@ -0,0 +1,285 @@
+"""
+Per-user event status counters for the dashboard.
+
+Each user has one `event_stats` document with `total`, `upcoming`, `ongoing`
+and `completed`, so the dashboard stats are a point read. Every event stores
+the bucket it is counted in (`statsBucket`). Moving an event is a conditional
+update on that field followed by `$inc` on the counters, so the same move made
+twice (by two workers, or by a write racing the scheduler) counts once.
+
+Events change bucket when they are written (`event_changed`) and when time
+passes their `dateTime` (upcoming -> ongoing) or `endDate` (ongoing ->
+completed). A background thread keeps the transitions due in the next
+STATS_SCHEDULE_HORIZON_SECONDS in a min-heap and sleeps until the earliest.
+They are read with range queries on the (statsBucket, dateTime) and
+(statsBucket, endDate) indexes, which also return any that were missed while
+no worker ran. Events written on other workers are picked up at the next load.
+
+Every STATS_VERIFY_INTERVAL_SECONDS the thread recounts STATS_VERIFY_BATCH
+users from the indexes, round robin, and rebuilds the counters that drifted.
+Users without a stats document get one built on their first read.
+
+Configuration:
+    STATS_SCHEDULE_HORIZON_SECONDS  how far ahead transitions are loaded (default 600)
+    STATS_VERIFY_INTERVAL_SECONDS   time between drift checks (default 900)
+    STATS_VERIFY_BATCH              users recounted per drift check (default 200)
+"""
+import os
+import time
+import heapq
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from .logger import logger
+from .metrics import registry
+from .event_calendar import DEFAULT_DURATION, event_interval
+
+STATS_SCHEDULE_HORIZON_SECONDS = float(os.getenv("STATS_SCHEDULE_HORIZON_SECONDS", "600"))
+STATS_VERIFY_INTERVAL_SECONDS = float(os.getenv("STATS_VERIFY_INTERVAL_SECONDS", "900"))
+STATS_VERIFY_BATCH = int(os.getenv("STATS_VERIFY_BATCH", "200"))
+# Pause after a failed scheduler pass, so a Mongo outage doesn't spin the thread
+RETRY_SECONDS = 5.0
+BUCKETS = ("upcoming", "ongoing", "completed")
+PROJECTION = {"userId": 1, "dateTime": 1, "endDate": 1, "statsBucket": 1}
+
+stats_transitions = registry.counter("event_stats_transitions_total", "Events moved between status buckets", ("trigger",))
+stats_drift = registry.counter("event_stats_drift_total", "Users whose status counters were found wrong and rebuilt")
+stats_scheduled = registry.gauge("event_stats_scheduled_transitions", "Event status transitions waiting in the scheduler heap")
+
+def bucket_at(event: dict, now: datetime) -> str:
+    start, end = event_interval(event)
+    if start > now:
+        return "upcoming"
+    if end < now:
+        return "completed"
+    return "ongoing"
+
+def next_transition(event: dict, now: datetime) -> Optional[datetime]:
+    """When the event next changes bucket, None once it is completed"""
+    start, end = event_interval(event)
+    if start > now:
+        return start
+    if end >= now:
+        # Completed is strictly after the end
+        return end + timedelta(microseconds=1)
+    return None
+
+class EventStats:
+    """Status counters per user and the scheduler that moves events as their boundaries pass"""
+    def __init__(self, horizon_seconds: float = STATS_SCHEDULE_HORIZON_SECONDS,
+                 verify_interval_seconds: float = STATS_VERIFY_INTERVAL_SECONDS, verify_batch: int = STATS_VERIFY_BATCH):
+        self.horizon_seconds = horizon_seconds
+        self.verify_interval_seconds = verify_interval_seconds
+        self.verify_batch = verify_batch
+        # (when, event id), every transition before self._horizon that this worker knows of
+        self._heap: List[Tuple[datetime, object]] = []
+        self._horizon: Optional[datetime] = None
+        self._verify_after: Optional[str] = None
+        self._wake = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._indexed = False
+
+    def _db(self):
+        from ..database.mongodb import MongoDB
+        db = MongoDB.get_db()
+        if not self._indexed:
+            db.events.create_index([("statsBucket", 1), ("dateTime", 1)])
+            db.events.create_index([("statsBucket", 1), ("endDate", 1)])
+            # Recounts, the same indexes the calendar queries use
+            db.events.create_index([("userId", 1), ("dateTime", 1), ("endDate", 1)])
+            db.events.create_index([("userId", 1), ("endDate", 1)])
+            self._indexed = True
+        return db
+
+    def _move(self, db, event: dict, now: datetime) -> Optional[Dict[str, int]]:
+        """Put the event in its bucket at `now`, the counter increments if this call moved it"""
+        if not event.get("dateTime"):
+            return None
+        counted = event.get("statsBucket")
+        bucket = bucket_at(event, now)
+        if counted == bucket:
+            return None
+        result = db.events.update_one({"_id": event["_id"], "statsBucket": counted}, {"$set": {"statsBucket": bucket}})
+        if not result.modified_count:
+            return None  # Moved by someone else first
+        increments = {bucket: 1}
+        if counted:
+            increments[counted] = -1
+        else:
+            increments["total"] = 1
+        return increments
+
+    @staticmethod
+    def _apply(db, user_id: str, increments: Dict[str, int]):
+        # No upsert: users without a document are counted in full on their first read
+        db.event_stats.update_one({"_id": user_id}, {"$inc": increments})
+
+    def get(self, user_id: str) -> Dict[str, int]:
+        """The user's counters, one point read"""
+        stats = self._db().event_stats.find_one({"_id": user_id})
+        if stats is None:
+            stats = self.rebuild(user_id)
+        return {key: stats.get(key, 0) for key in ("total", *BUCKETS)}
+
+    def rebuild(self, user_id: str, now: Optional[datetime] = None) -> dict:
+        """Recount the user's events and reset their buckets and counters"""
+        now = now or datetime.now()
+        db = self._db()
+        members = defaultdict(list)
+        total = 0
+        for event in db.events.find({"userId": user_id}, PROJECTION):
+            total += 1
+            if event.get("dateTime"):
+                members[bucket_at(event, now)].append(event["_id"])
+        for bucket, ids in members.items():
+            db.events.update_many({"_id": {"$in": ids}}, {"$set": {"statsBucket": bucket}})
+        stats = {"total": total, **{bucket: len(members[bucket]) for bucket in BUCKETS}, "rebuiltAt": now}
+        db.event_stats.replace_one({"_id": user_id}, stats, upsert=True)
+        return stats
+
+    def event_changed(self, event: dict):
+        """Call with the stored event after creating or updating it"""
+        now = datetime.now()
+        db = self._db()
+        increments = self._move(db, event, now)
+        if increments:
+            self._apply(db, event["userId"], increments)
+            stats_transitions.inc(trigger="write")
+        self._push(event, now)
+
+    def count(self, user_id: str, now: Optional[datetime] = None) -> Dict[str, int]:
+        """The counters recomputed from the user's events, index-only counts"""
+        now = now or datetime.now()
+        events = self._db().events
+        return {
+            "total": events.count_documents({"userId": user_id}),
+            "upcoming": events.count_documents({"userId": user_id, "dateTime": {"$gt": now}}),
+            "ongoing": events.count_documents({
+                "userId": user_id,
+                "dateTime": {"$lte": now},
+                "$or": [
+                    {"endDate": {"$gte": now}},
+                    {"endDate": None, "dateTime": {"$gte": now - DEFAULT_DURATION}},
+                ],
+            }),
+            "completed": events.count_documents({"userId": user_id, "endDate": {"$lt": now}}) + events.count_documents(
+                {"userId": user_id, "endDate": None, "dateTime": {"$lt": now - DEFAULT_DURATION}}
+            ),
+        }
+
+    def verify(self, now: Optional[datetime] = None) -> int:
+        """Recount the next batch of users and rebuild the ones that drifted, returns how many did"""
+        now = now or datetime.now()
+        db = self._db()
+        query = {"_id": {"$gt": self._verify_after}} if self._verify_after else {}
+        batch = list(db.event_stats.find(query, sort=[("_id", 1)], limit=self.verify_batch))
+        self._verify_after = batch[-1]["_id"] if len(batch) == self.verify_batch else None
+        drifted = 0
+        for stats in batch:
+            actual = self.count(stats["_id"], now)
+            stored = {key: stats.get(key, 0) for key in actual}
+            if stored != actual:
+                drifted += 1
+                stats_drift.inc()
+                logger.warning("Event stats drifted", extra={"fields": {"userId": stats["_id"], "stored": stored, "actual": actual}})
+                self.rebuild(stats["_id"], now)
+        return drifted
+
+    def _push(self, event: dict, now: datetime):
+        when = next_transition(event, now) if event.get("dateTime") else None
+        with self._wake:
+            if when is None or self._horizon is None or when >= self._horizon:
+                return  # Beyond what the heap covers, the load that reaches it reads it
+            heapq.heappush(self._heap, (when, event["_id"]))
+            stats_scheduled.set(len(self._heap))
+            if self._heap[0][1] == event["_id"]:
+                self._wake.notify()
+
+    def load(self, now: datetime):
+        """Schedule every transition before now + horizon, including overdue ones"""
+        horizon = now + timedelta(seconds=self.horizon_seconds)
+        db = self._db()
+        due = []
+        for query in (
+            {"statsBucket": "upcoming", "dateTime": {"$lt": horizon}},
+            {"statsBucket": "ongoing", "endDate": {"$lt": horizon}},
+            {"statsBucket": "ongoing", "endDate": None, "dateTime": {"$lt": horizon - DEFAULT_DURATION}},
+        ):
+            for event in db.events.find(query, {"dateTime": 1, "endDate": 1, "statsBucket": 1}):
+                # Overdue ones, missed while no worker ran, are due right away
+                overdue = bucket_at(event, now) != event["statsBucket"]
+                due.append((now if overdue else next_transition(event, now), event["_id"]))
+        with self._wake:
+            self._heap.extend(due)
+            heapq.heapify(self._heap)
+            self._horizon = horizon
+            stats_scheduled.set(len(self._heap))
+        return len(due)
+
+    def run_due(self, now: datetime) -> int:
+        """Apply the transitions due by `now`, returns how many events moved"""
+        with self._wake:
+            due = set()
+            while self._heap and self._heap[0][0] <= now:
+                due.add(heapq.heappop(self._heap)[1])
+            stats_scheduled.set(len(self._heap))
+        if not due:
+            return 0
+        db = self._db()
+        per_user = defaultdict(lambda: defaultdict(int))
+        moved = 0
+        for event in db.events.find({"_id": {"$in": list(due)}}, PROJECTION):
+            # Re-read, so events updated or deleted since they were scheduled are settled as they are now
+            increments = self._move(db, event, now)
+            if increments:
+                moved += 1
+                for key, amount in increments.items():
+                    per_user[event["userId"]][key] += amount
+            self._push(event, now)
+        for user_id, increments in per_user.items():
+            self._apply(db, user_id, {key: amount for key, amount in increments.items() if amount})
+        stats_transitions.inc(moved, trigger="schedule")
+        return moved
+
+    def start(self):
+        with self._wake:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="event-stats-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._wake:
+            self._stopping = True
+            self._wake.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self):
+        next_verify = time.monotonic() + self.verify_interval_seconds
+        while True:
+            wait = None
+            try:
+                now = datetime.now()
+                if self._horizon is None or now >= self._horizon:
+                    self.load(now)
+                self.run_due(now)
+                if time.monotonic() >= next_verify:
+                    self.verify(now)
+                    next_verify = time.monotonic() + self.verify_interval_seconds
+            except Exception as e:
+                logger.error(f"Event stats scheduler error: {e}")
+                wait = RETRY_SECONDS
+            with self._wake:
+                if self._stopping:
+                    return
+                if wait is None:
+                    wake_at = min(self._heap[0][0], self._horizon) if self._heap else self._horizon
+                    wait = min((wake_at - datetime.now()).total_seconds(), next_verify - time.monotonic())
+                self._wake.wait(max(wait, 0.001))
+
+event_stats = EventStats()
@@ -0,0 +1,174 @@
+"""
+Request-scoped instrumentation: HTTP middleware, MongoDB command listener and a
+LangChain callback handler feeding the metrics registry.
+"""
+import time
+import uuid
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from uuid import UUID
+from pymongo import monitoring
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from .logger import logger, request_id_var
+from .profiling import run_profiler, active_run_id
+from .metrics import (
+    http_request_duration,
+    mongo_commands,
+    mongo_command_duration,
+    llm_call_duration,
+    llm_tokens,
+)
+
+# Per-request counters, shared with threadpool workers through the copied context
+request_stats_var: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stats", default=None)
+
+def _record_request_stat(key: str, amount: float):
+    stats = request_stats_var.get()
+    if stats is not None:
+        stats[key] = stats.get(key, 0) + amount
+
+class RequestMetricsMiddleware(BaseHTTPMiddleware):
+    """
+    Assigns a request id, records route latency and logs one structured line per request.
+    For streaming responses the latency covers the time until the response headers are sent.
+    """
+    async def dispatch(self, request: Request, call_next):
+        request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+        id_token = request_id_var.set(request_id)
+        stats_token = request_stats_var.set({})
+        start = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            response.headers["X-Request-ID"] = request_id
+            return response
+        finally:
+            duration = time.perf_counter() - start
+            # Use the route template so ids in the path do not explode the label cardinality
+            route = request.scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(
+                duration, method=request.method, route=route_path, status=status_code
+            )
+            stats = request_stats_var.get() or {}
+            logger.info(
+                "request completed",
+                extra={"fields": {
+                    "method": request.method,
+                    "route": route_path,
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                    "mongo_commands": int(stats.get("mongo_commands", 0)),
+                    "mongo_ms": round(stats.get("mongo_seconds", 0) * 1000, 2),
+                    "llm_calls": int(stats.get("llm_calls", 0)),
+                    "llm_tokens": int(stats.get("llm_tokens", 0)),
+                }},
+            )
+            request_stats_var.reset(stats_token)
+            request_id_var.reset(id_token)
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Counts MongoDB commands and their durations by command name and collection"""
+    def __init__(self):
+        # request id -> (collection, profiled run id)
+        self._commands: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        # The collection name is the value of the command's first key (find, insert, update...)
+        collection = event.command.get(event.command_name)
+        with self._lock:
+            self._commands[event.request_id] = (
+                collection if isinstance(collection, str) else "",
+                active_run_id(),
+            )
+
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            collection, run_id = self._commands.pop(event.request_id, ("", None))
+        seconds = event.duration_micros / 1_000_000
+        run_profiler.record_span(
+            run_id, f"mongo.{event.command_name}", "mongo",
+            time.perf_counter() - seconds, seconds, {"collection": collection}
+        )
+        mongo_commands.inc(command=event.command_name, collection=collection, outcome=outcome)
+        mongo_command_duration.observe(seconds, command=event.command_name, collection=collection)
+        _record_request_stat("mongo_commands", 1)
+        _record_request_stat("mongo_seconds", seconds)
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
+
+class LLMMetricsCallbackHandler(BaseCallbackHandler):
+    """Records LLM latency and token usage labelled with the LangGraph node that made the call"""
+    def __init__(self):
+        self._runs: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, serialized: Optional[Dict[str, Any]], run_id: UUID, metadata: Optional[Dict[str, Any]], kwargs):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node", "unknown")
+        invocation = kwargs.get("invocation_params") or {}
+        model = invocation.get("model") or invocation.get("model_name") or metadata.get("ls_model_name") or "unknown"
+        with self._lock:
+            self._runs[run_id] = (time.perf_counter(), node, model)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, **kwargs):
+        self._start(serialized, run_id, metadata, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, metadata=None, **kwargs):
+        self._start(serialized, run_id, metadata, kwargs)
+
+    def _pop(self, run_id: UUID):
+        with self._lock:
+            return self._runs.pop(run_id, None)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        run = self._pop(run_id)
+        if run is None:
+            return
+        start, node, model = run
+        llm_call_duration.observe(time.perf_counter() - start, node=node, model=model, outcome="success")
+        _record_request_stat("llm_calls", 1)
+
+        prompt_tokens, completion_tokens = _token_usage(response)
+        if prompt_tokens:
+            llm_tokens.inc(prompt_tokens, node=node, model=model, kind="prompt")
+        if completion_tokens:
+            llm_tokens.inc(completion_tokens, node=node, model=model, kind="completion")
+        _record_request_stat("llm_tokens", prompt_tokens + completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        run = self._pop(run_id)
+        if run is None:
+            return
+        start, node, model = run
+        llm_call_duration.observe(time.perf_counter() - start, node=node, model=model, outcome="error")
+        _record_request_stat("llm_calls", 1)
+
+def _token_usage(response: LLMResult):
+    """Read token usage from llm_output, falling back to the message usage_metadata (streaming)"""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    prompt_tokens = usage.get("prompt_tokens", 0) or 0
+    completion_tokens = usage.get("completion_tokens", 0) or 0
+    if prompt_tokens or completion_tokens:
+        return prompt_tokens, completion_tokens
+
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage_metadata = getattr(message, "usage_metadata", None) or {}
+            prompt_tokens += usage_metadata.get("input_tokens", 0)
+            completion_tokens += usage_metadata.get("output_tokens", 0)
+    return prompt_tokens, completion_tokens
+
+mongo_command_listener = MongoCommandListener()
+llm_metrics_handler = LLMMetricsCallbackHandler()
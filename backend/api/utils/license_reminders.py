@@ -0,0 +1,301 @@
+"""
+Reminders for licenses coming due.
+
+A license that is still open (LICENSE_REMINDER_STATUSES) gets a reminder at
+each lead time in LICENSE_REMINDER_LEAD_DAYS before its dueDate. A background
+thread keeps the reminders due in the next LICENSE_REMINDER_HORIZON_SECONDS in
+a timer wheel of one-minute slots and sleeps until the next non-empty slot.
+The wheel is filled from range queries on the (status, dueDate) index, one per
+lead time, so no query reads more than the licenses due in the window.
+
+Fired reminders are claimed on the license (`reminded`, the due date and lead
+time last sent), so workers and restarts never send one twice, and a changed
+due date starts over. Claimed reminders are grouped into one digest per user
+and written to `license_reminders` in batches of LICENSE_REMINDER_BATCH, for
+a notifier to deliver.
+
+Configuration:
+    LICENSE_REMINDER_STATUSES         statuses that still need action (default pending,missing)
+    LICENSE_REMINDER_LEAD_DAYS        days before the due date to remind at (default 7,1,0)
+    LICENSE_REMINDER_HORIZON_SECONDS  how far ahead reminders are loaded (default 3600)
+    LICENSE_REMINDER_BATCH            digests per insert (default 500)
+"""
+import os
+import time
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from .logger import logger
+from .metrics import registry
+
+LICENSE_REMINDER_STATUSES = [s.strip() for s in os.getenv("LICENSE_REMINDER_STATUSES", "pending,missing").split(",") if s.strip()]
+LICENSE_REMINDER_LEAD_DAYS = sorted({int(d) for d in os.getenv("LICENSE_REMINDER_LEAD_DAYS", "7,1,0").split(",") if d.strip()}, reverse=True)
+LICENSE_REMINDER_HORIZON_SECONDS = float(os.getenv("LICENSE_REMINDER_HORIZON_SECONDS", "3600"))
+LICENSE_REMINDER_BATCH = int(os.getenv("LICENSE_REMINDER_BATCH", "500"))
+TICK = timedelta(minutes=1)
+# Pause after a failed pass, so a Mongo outage doesn't spin the thread
+RETRY_SECONDS = 5.0
+PROJECTION = {"userId": 1, "eventId": 1, "name": 1, "type": 1, "status": 1, "dueDate": 1, "reminded": 1}
+
+reminders_sent = registry.counter("license_reminders_sent_total", "License due date reminders claimed and put in a digest", ("lead_days",))
+reminder_digests = registry.counter("license_reminder_digests_total", "License reminder digests written")
+reminders_scheduled = registry.gauge("license_reminders_scheduled", "License reminders waiting in the timer wheel")
+
+def fire_time(due_date: datetime, lead_days: int) -> datetime:
+    return due_date - timedelta(days=lead_days)
+
+def already_sent(license: dict, lead_days: int) -> bool:
+    """A reminder at this lead time, or a later one, went out for the current due date"""
+    reminded = license.get("reminded") or {}
+    return reminded.get("dueDate") == license.get("dueDate") and reminded.get("lead", lead_days + 1) <= lead_days
+
+class TimerWheel:
+    """
+    Slots of `tick` covering `slots` ticks from the cursor. Entries due before
+    the cursor land in the cursor slot, entries past the end are refused.
+    """
+    def __init__(self, start: datetime, tick: timedelta = TICK, slots: int = 61):
+        self.tick = tick
+        self.origin = start
+        self._slots: List[list] = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._size = 0
+
+    def _index(self, when: datetime) -> int:
+        return int((when - self.origin) / self.tick)
+
+    @property
+    def end(self) -> datetime:
+        """Entries must be due before this"""
+        return self.origin + self.tick * (self._cursor + len(self._slots))
+
+    def __len__(self):
+        return self._size
+
+    def add(self, when: datetime, item) -> bool:
+        index = max(self._index(when), self._cursor)
+        if index >= self._cursor + len(self._slots):
+            return False
+        self._slots[index % len(self._slots)].append(item)
+        self._size += 1
+        return True
+
+    def pop_due(self, now: datetime) -> list:
+        """Everything in slots that started by `now`, advancing the cursor past them"""
+        due = []
+        last = self._index(now)
+        while self._cursor <= last and self._size:
+            slot = self._slots[self._cursor % len(self._slots)]
+            due.extend(slot)
+            self._size -= len(slot)
+            slot.clear()
+            self._cursor += 1
+        self._cursor = max(self._cursor, last + 1)
+        return due
+
+    def next_due(self) -> Optional[datetime]:
+        """Start of the first non-empty slot"""
+        if not self._size:
+            return None
+        for index in range(self._cursor, self._cursor + len(self._slots)):
+            if self._slots[index % len(self._slots)]:
+                return self.origin + self.tick * index
+        return None
+
+class LicenseReminders:
+    """Timer wheel of upcoming license reminders and the thread that sends them as digests"""
+    def __init__(self, statuses: List[str] = LICENSE_REMINDER_STATUSES, lead_days: List[int] = LICENSE_REMINDER_LEAD_DAYS,
+                 horizon_seconds: float = LICENSE_REMINDER_HORIZON_SECONDS, batch_size: int = LICENSE_REMINDER_BATCH):
+        self.statuses = statuses
+        self.lead_days = lead_days
+        self.horizon = timedelta(seconds=horizon_seconds)
+        self.batch_size = batch_size
+        self._wheel: Optional[TimerWheel] = None
+        # Every reminder before this is in the wheel, the wheel's own end moves on with its cursor
+        self._loaded_until: Optional[datetime] = None
+        self._wake = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._indexed = False
+
+    def _db(self):
+        from ..database.mongodb import MongoDB
+        db = MongoDB.get_db()
+        if not self._indexed:
+            db.licenses.create_index([("status", 1), ("dueDate", 1)])
+            db.licenses.create_index([("userId", 1), ("status", 1), ("dueDate", 1)])
+            db.licenses.create_index([("eventId", 1), ("status", 1), ("dueDate", 1)])
+            db.license_reminders.create_index([("userId", 1), ("createdAt", -1)])
+            self._indexed = True
+        return db
+
+    def due_soon(self, user_id: str, until: datetime, limit: int) -> List[dict]:
+        """
+        The user's open licenses due by `until`, overdue ones included, soonest
+        first. Licenses the agent added carry no userId and are found through
+        the user's events.
+        """
+        db = self._db()
+        event_ids = [str(event["_id"]) for event in db.events.find({"userId": user_id}, {"_id": 1})]
+        return list(db.licenses.find(
+            {
+                "$or": [{"userId": user_id}, {"eventId": {"$in": event_ids}}],
+                "status": {"$in": self.statuses},
+                "dueDate": {"$lte": until},
+            },
+            sort=[("dueDate", 1)],
+            limit=limit,
+        ))
+
+    def _schedule(self, license: dict, now: datetime, earliest: datetime) -> int:
+        """Put the license's unsent reminders firing from `earliest` on in the wheel"""
+        due_date = license.get("dueDate")
+        if not isinstance(due_date, datetime) or license.get("status") not in self.statuses:
+            return 0
+        added = 0
+        for lead in self.lead_days:
+            when = fire_time(due_date, lead)
+            if when >= earliest and not already_sent(license, lead) and self._wheel.add(when, (license["_id"], lead)):
+                added += 1
+        return added
+
+    def license_changed(self, license: dict):
+        """Call with the stored license after creating or updating it"""
+        now = datetime.now()
+        with self._wake:
+            if self._wheel is None:
+                return
+            # Lead times already behind a new due date are skipped, not sent late
+            if self._schedule(license, now, now):
+                reminders_scheduled.set(len(self._wheel))
+                self._wake.notify()
+
+    def load(self, now: datetime) -> int:
+        """
+        Start a new wheel with every unsent reminder firing before now + horizon,
+        and those missed in the last horizon while no worker ran
+        """
+        db = self._db()
+        start = now - self.horizon
+        wheel = TimerWheel(now, TICK, int(self.horizon / TICK) + 1)
+        found = {}
+        for lead in self.lead_days:
+            lead_time = timedelta(days=lead)
+            query = {"status": {"$in": self.statuses}, "dueDate": {"$gte": start + lead_time, "$lt": wheel.end + lead_time}}
+            for license in db.licenses.find(query, {"status": 1, "dueDate": 1, "reminded": 1}):
+                found[license["_id"]] = license
+        with self._wake:
+            self._wheel = wheel
+            self._loaded_until = wheel.end
+            added = sum(self._schedule(license, now, start) for license in found.values())
+            reminders_scheduled.set(len(wheel))
+        return added
+
+    def run_due(self, now: datetime) -> int:
+        """Claim the reminders due by `now` and write their digests, returns how many were sent"""
+        with self._wake:
+            due = set(self._wheel.pop_due(now)) if self._wheel else set()
+            reminders_scheduled.set(len(self._wheel) if self._wheel else 0)
+        if not due:
+            return 0
+        db = self._db()
+        leads = defaultdict(list)
+        for license_id, lead in due:
+            leads[license_id].append(lead)
+        claimed = []
+        for license in db.licenses.find({"_id": {"$in": list(leads)}}, PROJECTION):
+            due_date = license.get("dueDate")
+            if license.get("status") not in self.statuses or not isinstance(due_date, datetime):
+                continue
+            # Only the most urgent lead time that has come, a backlog doesn't send 7 days and 1 day together
+            ready = [lead for lead in leads[license["_id"]] if fire_time(due_date, lead) <= now and not already_sent(license, lead)]
+            if not ready:
+                with self._wake:
+                    self._schedule(license, now, now)  # Due date moved later since it was scheduled
+                continue
+            lead = min(ready)
+            result = db.licenses.update_one(
+                {
+                    "_id": license["_id"],
+                    "dueDate": due_date,
+                    "$nor": [{"reminded.dueDate": due_date, "reminded.lead": {"$lte": lead}}],
+                },
+                {"$set": {"reminded": {"dueDate": due_date, "lead": lead, "at": now}}},
+            )
+            if result.modified_count:
+                claimed.append((license, lead))
+                reminders_sent.inc(lead_days=lead)
+        if claimed:
+            self._write_digests(db, claimed, now)
+        return len(claimed)
+
+    def _write_digests(self, db, claimed: List[Tuple[dict, int]], now: datetime):
+        # Licenses added by the agent have no userId, they belong to their event's owner
+        orphans = {license["eventId"] for license, _ in claimed if not license.get("userId") and ObjectId.is_valid(license.get("eventId", ""))}
+        owners = {
+            str(event["_id"]): event["userId"]
+            for event in db.events.find({"_id": {"$in": [ObjectId(event_id) for event_id in orphans]}}, {"userId": 1})
+        } if orphans else {}
+        digests: Dict[str, list] = defaultdict(list)
+        for license, lead in claimed:
+            user_id = license.get("userId") or owners.get(license.get("eventId"))
+            if not user_id:
+                continue
+            digests[user_id].append({
+                "licenseId": str(license["_id"]),
+                "eventId": license.get("eventId"),
+                "name": license.get("name"),
+                "type": license.get("type"),
+                "status": license["status"],
+                "dueDate": license["dueDate"],
+                "leadDays": lead,
+            })
+        documents = [
+            {"userId": user_id, "createdAt": now, "delivered": False, "licenses": sorted(items, key=lambda item: item["dueDate"])}
+            for user_id, items in digests.items()
+        ]
+        for start in range(0, len(documents), self.batch_size):
+            db.license_reminders.insert_many(documents[start:start + self.batch_size], ordered=False)
+        reminder_digests.inc(len(documents))
+        logger.info(f"Sent {len(claimed)} license reminders", extra={"fields": {"digests": len(documents)}})
+
+    def start(self):
+        with self._wake:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="license-reminders", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._wake:
+            self._stopping = True
+            self._wake.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self):
+        while True:
+            wait = None
+            try:
+                now = datetime.now()
+                if self._wheel is None or now >= self._loaded_until - self.horizon / 2:
+                    # Reload half way through, the new wheel overlaps the old one and claims drop repeats
+                    self.load(now)
+                self.run_due(now)
+            except Exception as e:
+                logger.error(f"License reminder error: {e}")
+                wait = RETRY_SECONDS
+            with self._wake:
+                if self._stopping:
+                    return
+                if wait is None:
+                    reload_at = self._loaded_until - self.horizon / 2
+                    wake_at = min(self._wheel.next_due() or reload_at, reload_at)
+                    wait = (wake_at - datetime.now()).total_seconds()
+                self._wake.wait(max(wait, 0.001))
+
+license_reminders = LicenseReminders()
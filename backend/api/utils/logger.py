@@ -1,14 +1,53 @@
 import os
+import json
 import logging
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Request id of the HTTP request currently being served, set by the request middleware
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current request id to every log record"""
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Render log records as one JSON object per line"""
+    def format(self, record):
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        # Structured fields passed through logger.info(..., extra={"fields": {...}})
+        fields = getattr(record, "fields", None)
+        if isinstance(fields, dict):
+            payload.update(fields)
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
 def setup_logger():
+    handler = logging.StreamHandler()
+    handler.addFilter(RequestIdFilter())
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+        ))
+    else:
+        handler.setFormatter(JsonFormatter())
+
     logging.basicConfig(
         level=os.getenv("LOG_LEVEL", "INFO"),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        handlers=[handler]
     )
     return logging.getLogger(__name__)
 
-logger = setup_logger() 
\ No newline at end of file
+logger = setup_logger()
@@ -0,0 +1,139 @@
+"""
+Incremental JSON parsing of streamed LLM output.
+
+Structured output and tool-call arguments arrive as a growing JSON string.
+Re-parsing the whole prefix on every chunk is quadratic, so this parser keeps
+its scanner state between chunks, looks at every character once and reports
+each element of a top-level array as soon as it is complete:
+
+    parser = IncrementalJSONParser()
+    parser.feed('{"items": [{"name": "Ris')   # -> []
+    parser.feed('otto"}, {"na')                # -> [(("items", 0), {"name": "Risotto"})]
+
+Tracked arrays are the root value itself when it is an array (paths `(i,)`)
+and arrays directly under a key of the root object (paths `(key, i)`).
+Only completed elements are decoded, each exactly once.
+"""
+import json
+from typing import Any, List, Tuple
+
+WHITESPACE = " \t\r\n"
+
+class _Frame:
+    __slots__ = ("kind", "key", "expect_key", "index", "tracked", "element_start", "key_start")
+
+    def __init__(self, kind: str, tracked: bool = False, key: Any = None):
+        self.kind = kind            # "{" or "["
+        self.key = key              # last key read, or this array's key in the root object
+        self.expect_key = kind == "{"
+        self.index = 0              # position of the next element of an array
+        self.tracked = tracked      # elements of this array are reported
+        self.element_start = None   # offset where the current tracked element began
+        self.key_start = None       # offset of the key string being read
+
+class IncrementalJSONParser:
+    """Feed chunks, get back (path, value) for every newly completed top-level array element"""
+    def __init__(self):
+        self._chunks: List[str] = []
+        # Unscanned text plus whatever an open element or key still needs, so
+        # memory and copying stay proportional to one element, not the document
+        self._window = ""
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escaped = False
+        self._done = False
+
+    @property
+    def done(self) -> bool:
+        """True once the root value is closed"""
+        return self._done
+
+    def value(self) -> Any:
+        """Decode the complete document"""
+        return json.loads("".join(self._chunks))
+
+    def _emit(self, frame: _Frame, end: int, out: list):
+        path = (frame.index,) if frame.key is None else (frame.key, frame.index)
+        out.append((path, json.loads(self._window[frame.element_start:end])))
+        frame.element_start = None
+        frame.index += 1
+
+    def feed(self, chunk: str) -> List[Tuple[tuple, Any]]:
+        self._chunks.append(chunk)
+        start = len(self._window)
+        self._window += chunk
+        out: List[Tuple[tuple, Any]] = []
+        buffer = self._window
+        stack = self._stack
+        for pos in range(start, len(buffer)):
+            char = buffer[pos]
+            top = stack[-1] if stack else None
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if top is not None and top.kind == "{" and top.key_start is not None:
+                        top.key = json.loads(buffer[top.key_start:pos + 1])
+                        top.key_start = None
+                    elif top is not None and top.tracked and top.element_start is not None:
+                        self._emit(top, pos + 1, out)
+                continue
+
+            if char in WHITESPACE:
+                continue
+
+            # A tracked array's scalar element (number, true, false, null) ends at , or ]
+            if top is not None and top.tracked and top.element_start is not None and char in ",]":
+                self._emit(top, pos, out)
+
+            if char == '"':
+                self._in_string = True
+                if top is not None and top.kind == "{" and top.expect_key:
+                    top.key_start = pos
+                    top.expect_key = False
+                elif top is not None and top.tracked and top.element_start is None:
+                    top.element_start = pos
+            elif char in "{[":
+                if top is not None and top.tracked and top.element_start is None:
+                    top.element_start = pos
+                # Arrays that are the root, or a value of the root object, are tracked
+                tracked = char == "[" and (top is None or (len(stack) == 1 and top.kind == "{"))
+                key = top.key if tracked and top is not None else None
+                stack.append(_Frame(char, tracked=tracked, key=key))
+            elif char in "}]":
+                if not stack:
+                    raise ValueError(f"Unexpected {char!r} in JSON stream")
+                stack.pop()
+                parent = stack[-1] if stack else None
+                if parent is None:
+                    self._done = True
+                elif parent.tracked and parent.element_start is not None:
+                    self._emit(parent, pos + 1, out)
+            elif char == ",":
+                if top is not None and top.kind == "{":
+                    top.expect_key = True
+            elif char == ":":
+                pass
+            elif top is not None and top.tracked and top.element_start is None:
+                top.element_start = pos
+        self._trim()
+        return out
+
+    def _trim(self):
+        """Drop scanned text that no open element or key refers to"""
+        starts = [
+            offset for frame in self._stack
+            for offset in (frame.element_start, frame.key_start) if offset is not None
+        ]
+        cut = min(starts) if starts else len(self._window)
+        if cut:
+            self._window = self._window[cut:]
+            for frame in self._stack:
+                if frame.element_start is not None:
+                    frame.element_start -= cut
+                if frame.key_start is not None:
+                    frame.key_start -= cut
@@ -0,0 +1,209 @@
+"""
+Analytics across all of a user's events.
+
+Attendees (events), food budget and vendor progress (event_food) and license
+cost (licenses) are read with projections, three queries whatever the number
+of events, into NumPy columns aligned by event, and rolled up in vectorized
+form: totals, cost per attendee, vendor completion distributions and license
+spend by type and status.
+
+Each user has a data version in `portfolio_versions`, bumped by every write
+that changes one of these columns. Results are cached per worker under
+(user, version), so a repeat request costs the version point read, and a write
+on any worker makes the next request recompute.
+
+Configuration:
+    PORTFOLIO_CACHE_USERS  users whose latest result is kept per worker (default 256)
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from bson import ObjectId
+from .metrics import registry
+
+PORTFOLIO_CACHE_USERS = int(os.getenv("PORTFOLIO_CACHE_USERS", "256"))
+# Vendor progress buckets, the last one is exactly 100
+PROGRESS_BINS = [0, 25, 50, 75, 100, 101]
+PROGRESS_LABELS = ["0-24", "25-49", "50-74", "75-99", "100"]
+
+portfolio_requests = registry.counter("portfolio_analytics_requests_total", "Portfolio analytics requests", ("result",))
+
+class PortfolioColumns:
+    """A user's portfolio as arrays: one row per event, per vendor and per license"""
+    def __init__(self, event_ids: List[ObjectId], attendees, budget, budget_percentage,
+                 vendor_event, vendor_progress, vendor_status, license_event, license_cost, license_type, license_status):
+        self.event_ids = event_ids
+        self.attendees = attendees
+        self.budget = budget
+        self.budget_percentage = budget_percentage
+        self.vendor_event = vendor_event
+        self.vendor_progress = vendor_progress
+        self.vendor_status = vendor_status
+        self.license_event = license_event
+        self.license_cost = license_cost
+        self.license_type = license_type
+        self.license_status = license_status
+
+def _number(value) -> float:
+    return float(value) if isinstance(value, (int, float)) else 0.0
+
+def load_columns(db, user_id: str) -> PortfolioColumns:
+    """Three projected queries, the rows of food and licenses mapped to their event's row"""
+    events = list(db.events.find({"userId": user_id}, {"attendees": 1}))
+    event_ids = [event["_id"] for event in events]
+    row = {event_id: i for i, event_id in enumerate(event_ids)}
+    attendees = np.fromiter((_number(event.get("attendees")) for event in events), dtype=np.float64, count=len(events))
+
+    budget = np.zeros(len(events))
+    budget_percentage = np.zeros(len(events))
+    vendor_event, vendor_progress, vendor_status = [], [], []
+    projection = {"event_id": 1, "summary.budget": 1, "summary.budget_percentage": 1, "vendors.progress": 1, "vendors.status": 1}
+    for food in db.event_food.find({"event_id": {"$in": event_ids}}, projection):
+        i = row[food["event_id"]]
+        summary = food.get("summary") or {}
+        budget[i] = _number(summary.get("budget"))
+        budget_percentage[i] = _number(summary.get("budget_percentage"))
+        for vendor in food.get("vendors") or []:
+            vendor_event.append(i)
+            vendor_progress.append(_number(vendor.get("progress")))
+            vendor_status.append(vendor.get("status") or "Unknown")
+
+    license_event, license_cost, license_type, license_status = [], [], [], []
+    by_string = {str(event_id): i for event_id, i in row.items()}
+    for license in db.licenses.find({"eventId": {"$in": list(by_string)}}, {"eventId": 1, "cost": 1, "type": 1, "status": 1}):
+        license_event.append(by_string[license["eventId"]])
+        license_cost.append(_number(license.get("cost")))
+        license_type.append(license.get("type") or "Unspecified")
+        license_status.append(license.get("status") or "Unknown")
+
+    return PortfolioColumns(
+        event_ids, attendees, budget, budget_percentage,
+        np.array(vendor_event, dtype=np.intp), np.clip(np.array(vendor_progress, dtype=np.float64), 0, 100),
+        np.array(vendor_status, dtype=object),
+        np.array(license_event, dtype=np.intp), np.array(license_cost, dtype=np.float64),
+        np.array(license_type, dtype=object), np.array(license_status, dtype=object),
+    )
+
+def _round(value) -> float:
+    return round(float(value), 2)
+
+def _summary(values) -> Optional[dict]:
+    if not len(values):
+        return None
+    p50, p90 = np.percentile(values, [50, 90])
+    return {"mean": _round(values.mean()), "median": _round(p50), "p90": _round(p90),
+            "min": _round(values.min()), "max": _round(values.max())}
+
+def _grouped(labels, weights) -> List[dict]:
+    """Count and weight sum per label, largest sum first"""
+    if not len(labels):
+        return []
+    names, codes = np.unique(labels, return_inverse=True)
+    counts = np.bincount(codes, minlength=len(names))
+    sums = np.bincount(codes, weights=weights, minlength=len(names))
+    order = np.lexsort((names, -sums))
+    return [{"name": names[i], "count": int(counts[i]), "total": _round(sums[i])} for i in order]
+
+def compute(columns: PortfolioColumns) -> dict:
+    events = len(columns.event_ids)
+    license_cost_by_event = np.bincount(columns.license_event, weights=columns.license_cost, minlength=events)
+    food_spent = columns.budget * columns.budget_percentage / 100
+    event_cost = columns.budget + license_cost_by_event
+    with_attendees = columns.attendees > 0
+    total_attendees = columns.attendees.sum()
+
+    vendors_by_event = np.bincount(columns.vendor_event, minlength=events)
+    has_vendors = vendors_by_event > 0
+    event_completion = np.bincount(columns.vendor_event, weights=columns.vendor_progress, minlength=events)[has_vendors] / vendors_by_event[has_vendors]
+    histogram, _ = np.histogram(columns.vendor_progress, bins=PROGRESS_BINS)
+    statuses, status_counts = np.unique(columns.vendor_status, return_counts=True) if len(columns.vendor_status) else ([], [])
+
+    return {
+        "totals": {
+            "events": events,
+            "attendees": int(total_attendees),
+            "foodBudget": _round(columns.budget.sum()),
+            "foodSpent": _round(food_spent.sum()),
+            "licenseCost": _round(columns.license_cost.sum()),
+            "totalCost": _round(event_cost.sum()),
+            "vendors": int(len(columns.vendor_progress)),
+            "licenses": int(len(columns.license_cost)),
+        },
+        "costPerAttendee": {
+            "portfolio": _round(event_cost[with_attendees].sum() / total_attendees) if total_attendees else None,
+            "byEvent": _summary(event_cost[with_attendees] / columns.attendees[with_attendees]),
+        },
+        "budgetUsedPercentage": _summary(columns.budget_percentage[columns.budget > 0]),
+        "vendorCompletion": {
+            "progress": _summary(columns.vendor_progress),
+            "histogram": dict(zip(PROGRESS_LABELS, (int(count) for count in histogram))),
+            "byStatus": {status: int(count) for status, count in zip(statuses, status_counts)},
+            "eventsWithVendors": int(has_vendors.sum()),
+            "eventsComplete": int((event_completion >= 100).sum()),
+            "eventCompletion": _summary(event_completion),
+        },
+        "licenseSpend": {
+            "byType": _grouped(columns.license_type, columns.license_cost),
+            "byStatus": _grouped(columns.license_status, columns.license_cost),
+        },
+    }
+
+class PortfolioAnalytics:
+    """Portfolio rollups cached under the user's data version"""
+    def __init__(self, capacity: int = PORTFOLIO_CACHE_USERS):
+        self.capacity = capacity
+        # user id -> (version, result), least recently used first
+        self._results: "OrderedDict[str, Tuple[int, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._indexed = False
+
+    def _db(self):
+        from ..database.mongodb import MongoDB
+        db = MongoDB.get_db()
+        if not self._indexed:
+            db.events.create_index("userId")
+            db.event_food.create_index("event_id")
+            db.licenses.create_index("eventId")
+            self._indexed = True
+        return db
+
+    def version(self, user_id: str) -> int:
+        doc = self._db().portfolio_versions.find_one({"_id": user_id})
+        return doc["version"] if doc else 0
+
+    def touch(self, user_id: str):
+        """Call after a write that changes attendees, food budget, vendors or license costs"""
+        self._db().portfolio_versions.update_one({"_id": user_id}, {"$inc": {"version": 1}}, upsert=True)
+
+    def touch_event(self, event_id: str):
+        """touch() for writers that only know the event"""
+        if not ObjectId.is_valid(event_id):
+            return
+        event = self._db().events.find_one({"_id": ObjectId(event_id)}, {"userId": 1})
+        if event and event.get("userId"):
+            self.touch(event["userId"])
+
+    def get(self, user_id: str) -> Tuple[dict, int, bool]:
+        """The user's analytics, their data version, and whether it came from the cache"""
+        version = self.version(user_id)
+        with self._lock:
+            cached = self._results.get(user_id)
+            if cached is not None and cached[0] == version:
+                self._results.move_to_end(user_id)
+                portfolio_requests.inc(result="cached")
+                return cached[1], version, True
+        result = compute(load_columns(self._db(), user_id))
+        portfolio_requests.inc(result="computed")
+        with self._lock:
+            # A slower request may have computed an older version meanwhile, keep the newest
+            current = self._results.get(user_id)
+            if current is None or current[0] <= version:
+                self._results[user_id] = (version, result)
+                self._results.move_to_end(user_id)
+                while len(self._results) > self.capacity:
+                    self._results.popitem(last=False)
+        return result, version, False
+
+portfolio_analytics = PortfolioAnalytics()
@@ -0,0 +1,206 @@
+"""
+Opt-in profiler for agent graph runs.
+
+A sampled fraction of LangGraph runs is recorded as a span tree (graph -> node ->
+LLM call / routing / state emission / Mongo command) and written to a local file
+in Chrome trace format, viewable in chrome://tracing or https://ui.perfetto.dev.
+
+Configuration:
+    AGENT_PROFILE_SAMPLE_RATE  fraction of runs to record, 0 disables (default 0)
+    AGENT_PROFILE_DIR          output directory for traces (default ./traces)
+"""
+import os
+import json
+import time
+import random
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+from .logger import logger
+
+PROFILE_SAMPLE_RATE = float(os.getenv("AGENT_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("AGENT_PROFILE_DIR", "traces")
+
+# Run id of the innermost profiled chain in the current task, used to parent
+# spans that are not reported through LangChain callbacks (Mongo commands)
+_active_run_var: ContextVar[Optional[UUID]] = ContextVar("agent_profile_active_run", default=None)
+
+def payload_size(payload: Any) -> int:
+    """Approximate serialized size in bytes of a state/tool payload"""
+    try:
+        return len(json.dumps(payload, default=str))
+    except (TypeError, ValueError):
+        return len(str(payload))
+
+class _Trace:
+    def __init__(self, root_id: UUID):
+        self.root_id = root_id
+        self.origin = time.perf_counter()
+        self.events = []
+        self.lock = threading.Lock()
+
+    def add(self, name: str, category: str, start: float, duration: float, args: Dict[str, Any]):
+        with self.lock:
+            self.events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((start - self.origin) * 1_000_000, 1),
+                "dur": round(duration * 1_000_000, 1),
+                "pid": 1,
+                "tid": 1,
+                "args": args,
+            })
+
+class AgentRunProfiler(BaseCallbackHandler):
+    """LangChain callback handler that records sampled graph runs as Chrome traces"""
+    run_inline = True
+
+    def __init__(self, sample_rate: float = PROFILE_SAMPLE_RATE, output_dir: str = PROFILE_DIR):
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self._traces: Dict[UUID, _Trace] = {}
+        # run id -> (trace, start, name, category, parent run id, args, active run token)
+        self._runs: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+
+    # Span bookkeeping
+
+    def _begin(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, category: str, args=None):
+        with self._lock:
+            if parent_run_id is None:
+                if random.random() >= self.sample_rate:
+                    return
+                trace = _Trace(run_id)
+                self._traces[run_id] = trace
+            else:
+                parent = self._runs.get(parent_run_id)
+                if parent is None:
+                    return
+                trace = parent[0]
+            token = _active_run_var.set(run_id) if category == "node" else None
+            self._runs[run_id] = (trace, time.perf_counter(), name, category, parent_run_id, args or {}, token)
+
+    def _end(self, run_id: UUID, extra_args=None, error: Optional[BaseException] = None):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        trace, start, name, category, parent_run_id, args, token = run
+        args = {**args, **(extra_args or {})}
+        if error is not None:
+            args["error"] = repr(error)
+        trace.add(name, category, start, time.perf_counter() - start, args)
+        if token is not None:
+            try:
+                _active_run_var.reset(token)
+            except ValueError:
+                # Ended from a different context than it started in, the
+                # started context's value is out of reach
+                pass
+        if parent_run_id is None:
+            with self._lock:
+                self._traces.pop(run_id, None)
+            self._write(trace)
+
+    def record_span(self, parent_run_id: Optional[UUID], name: str, category: str, start: float, duration: float, args=None):
+        """Record an already-measured span under a profiled run, ignored if the run is not sampled"""
+        if parent_run_id is None:
+            return
+        with self._lock:
+            parent = self._runs.get(parent_run_id)
+        if parent is not None:
+            parent[0].add(name, category, start, duration, args or {})
+
+    def is_profiled(self, run_id: Optional[UUID]) -> bool:
+        if run_id is None:
+            return False
+        with self._lock:
+            return run_id in self._runs
+
+    def _category(self, run_id: UUID) -> Optional[str]:
+        with self._lock:
+            run = self._runs.get(run_id)
+        return run[3] if run is not None else None
+
+    def _write(self, trace: _Trace):
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, f"agent-run-{trace.root_id}.json")
+            with open(path, "w") as f:
+                json.dump({"traceEvents": trace.events, "displayTimeUnit": "ms"}, f)
+            logger.info(f"Wrote agent profile {path}")
+        except OSError as e:
+            logger.error(f"Failed to write agent profile: {e}")
+
+    # LangChain callbacks
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        name = kwargs.get("name") or (serialized or {}).get("name") or "chain"
+        if parent_run_id is None:
+            self._begin(run_id, None, name, "graph")
+        elif node and name == node:
+            self._begin(run_id, parent_run_id, node, "node", {
+                "step": metadata.get("langgraph_step"),
+                "input_bytes": payload_size(inputs) if self.is_profiled(parent_run_id) else 0,
+            })
+        else:
+            # Conditional edges (route) and inner runnables
+            self._begin(run_id, parent_run_id, name, "routing" if name == "route" else "chain")
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs):
+        if self._category(run_id) == "node":
+            self._end(run_id, {"output_bytes": payload_size(outputs)})
+        else:
+            self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, parent_run_id=None, **kwargs):
+        invocation = kwargs.get("invocation_params") or {}
+        args = {"model": invocation.get("model") or invocation.get("model_name")}
+        if self.is_profiled(parent_run_id):
+            args["prompt_bytes"] = payload_size([[m.content for m in batch] for batch in messages])
+        self._begin(run_id, parent_run_id, "llm", "llm", args)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, parent_run_id=None, **kwargs):
+        self._begin(run_id, parent_run_id, "llm", "llm", {"prompt_bytes": payload_size(prompts)})
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+        self._end(run_id, {"completion_bytes": payload_size(
+            [[g.text for g in generations] for generations in response.generations]
+        )})
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._end(run_id, error=error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, parent_run_id=None, **kwargs):
+        self._begin(run_id, parent_run_id, (serialized or {}).get("name", "tool"), "tool")
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._end(run_id, error=error)
+
+def config_run_id(config) -> Optional[UUID]:
+    """Run id of the node executing with the given RunnableConfig"""
+    callbacks = (config or {}).get("callbacks")
+    return getattr(callbacks, "parent_run_id", None)
+
+def active_run_id() -> Optional[UUID]:
+    return _active_run_var.get()
+
+run_profiler = AgentRunProfiler()
+
+# Attach the profiler to every LangChain/LangGraph run when sampling is enabled
+_profiler_var: ContextVar[Optional[AgentRunProfiler]] = ContextVar(
+    "agent_run_profiler", default=run_profiler if PROFILE_SAMPLE_RATE > 0 else None
+)
+register_configure_hook(_profiler_var, inheritable=True)
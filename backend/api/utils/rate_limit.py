@@ -0,0 +1,268 @@
+"""
+Rate limiting and LLM admission control.
+
+- Token buckets per (user, route rule), kept in process or, with
+  RATE_LIMIT_STORE=mongo, in a shared `rate_limits` collection so several
+  workers enforce the same budget.
+- A global limit on concurrent in-flight LLM calls. Calls wait in a queue for
+  at most LLM_QUEUE_TIMEOUT seconds, and new agent requests are rejected while
+  the queue is full.
+
+Rejected requests get a 429 with a Retry-After header, as do requests whose
+LLM call timed out in the admission queue (LLMOverloadedError).
+
+/copilotkit is reached through the Next.js runtime, which forwards the user's
+bearer token. Requests from a trusted proxy (RATE_LIMIT_TRUSTED_PROXIES,
+default 127.0.0.1,::1) without a token are keyed on X-Forwarded-User, and
+share one bucket per proxy address when there is none.
+"""
+import os
+import math
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+from jose import JWTError, jwt
+from pymongo import ReturnDocument
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from .logger import logger
+from .metrics import registry
+
+rate_limited_requests = registry.counter(
+    "rate_limited_requests_total", "Requests rejected with 429", ("rule", "reason")
+)
+llm_in_flight = registry.gauge("llm_in_flight", "LLM calls currently running")
+llm_queue_wait = registry.histogram(
+    "llm_queue_wait_seconds", "Time LLM calls waited for an admission slot", ("outcome",)
+)
+
+class RateLimitRule:
+    """Bucket of `capacity` requests refilled at `refill_per_second` for paths under `prefix`"""
+    def __init__(self, name: str, prefix: str, capacity: float, refill_per_second: float, methods=None):
+        self.name = name
+        self.prefix = prefix
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.methods = set(methods) if methods else None
+
+    def matches(self, method: str, path: str) -> bool:
+        return path.startswith(self.prefix) and (self.methods is None or method in self.methods)
+
+def parse_rules(spec: str) -> List[RateLimitRule]:
+    """Parse "name=prefix:capacity:per_minute,..." e.g. "agents=/copilotkit:10:20" """
+    rules = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rest = entry.partition("=")
+        prefix, capacity, per_minute = rest.rsplit(":", 2)
+        rules.append(RateLimitRule(name, prefix, float(capacity), float(per_minute) / 60))
+    return rules
+
+# Agent conversations are the expensive path: each turn makes several gpt-4o calls
+DEFAULT_RULES = "agents=/copilotkit:10:20,api=/api:120:600"
+# Hops allowed to say which user a request is for
+TRUSTED_PROXIES = {host.strip() for host in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "127.0.0.1,::1").split(",") if host.strip()}
+
+class InMemoryBucketStore:
+    """Token buckets in a process-local dict"""
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float):
+        # Buckets idle for an hour are full again, forgetting them changes nothing
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < 3600}
+
+    def consume(self, key: str, capacity: float, refill_per_second: float, cost: float = 1) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, _retry_after(tokens, cost, refill_per_second, allowed)
+
+class MongoBucketStore:
+    """Token buckets shared across workers, refilled and consumed in one atomic update"""
+    def __init__(self, collection_name: str = "rate_limits", idle_ttl_seconds: int = 3600):
+        self.collection_name = collection_name
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._indexed = False
+
+    def _collection(self):
+        from ..database.mongodb import MongoDB
+        collection = MongoDB.get_db()[self.collection_name]
+        if not self._indexed:
+            # Drop buckets that have been idle long enough to be full again
+            collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+        return collection
+
+    def consume(self, key: str, capacity: float, refill_per_second: float, cost: float = 1) -> Tuple[bool, float]:
+        now = time.time()
+        refilled = {"$min": [capacity, {"$add": [
+            {"$ifNull": ["$tokens", capacity]},
+            {"$multiply": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, refill_per_second]},
+        ]}]}
+        bucket = self._collection().find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]},
+                    "expires_at": {"$add": ["$$NOW", self.idle_ttl_seconds * 1000]},
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return bucket["allowed"], _retry_after(bucket["tokens"], cost, refill_per_second, bucket["allowed"])
+
+def _retry_after(tokens: float, cost: float, refill_per_second: float, allowed: bool) -> float:
+    if allowed or refill_per_second <= 0:
+        return 0.0
+    return (cost - tokens) / refill_per_second
+
+class LLMOverloadedError(Exception):
+    """No LLM admission slot became free within the queue timeout"""
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM capacity exhausted, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class LLMAdmissionController:
+    """Global cap on concurrent LLM calls with a bounded wait queue"""
+    def __init__(self, max_concurrent: int, queue_timeout: float, max_queue: int):
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+
+    @property
+    def saturated(self) -> bool:
+        """True when new work would only join an already full queue"""
+        return self._running >= self.max_concurrent and self._waiting >= self.max_queue
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        start = time.perf_counter()
+        if self._semaphore.locked():
+            if self._waiting >= self.max_queue:
+                # Queue is full, fail now rather than wait out a timeout
+                llm_queue_wait.observe(0, outcome="rejected")
+                raise LLMOverloadedError(self.queue_timeout)
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                llm_queue_wait.observe(time.perf_counter() - start, outcome="timeout")
+                raise LLMOverloadedError(self.queue_timeout)
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        llm_queue_wait.observe(time.perf_counter() - start, outcome="admitted")
+        self._running += 1
+        llm_in_flight.set(self._running)
+        try:
+            yield
+        finally:
+            self._running -= 1
+            llm_in_flight.set(self._running)
+            self._semaphore.release()
+
+def request_identity(request: Request, trusted_proxies=TRUSTED_PROXIES) -> str:
+    """
+    Bearer token subject when present, then the user a trusted proxy forwards,
+    otherwise the client address. Anonymous requests through a trusted proxy
+    share one bucket for that proxy.
+    """
+    from ..routes.auth import SECRET_KEY, ALGORITHM
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            payload = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM])
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except JWTError:
+            pass
+    client = request.client.host if request.client else "unknown"
+    if client in trusted_proxies:
+        forwarded = request.headers.get("x-forwarded-user", "").strip()
+        return f"user:{forwarded}" if forwarded else f"proxy:{client}"
+    return f"ip:{client}"
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    """Applies the first matching rule's token bucket per identity and sheds agent load on LLM saturation"""
+    def __init__(self, app, rules: List[RateLimitRule], store, admission: LLMAdmissionController, agent_prefix: str = "/copilotkit"):
+        super().__init__(app)
+        self.rules = rules
+        self.store = store
+        self.admission = admission
+        self.agent_prefix = agent_prefix
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        if request.method == "OPTIONS" or path == "/metrics":
+            return await call_next(request)
+
+        if path.startswith(self.agent_prefix) and self.admission.saturated:
+            rate_limited_requests.inc(rule="llm_admission", reason="saturated")
+            return _too_many_requests(self.admission.queue_timeout, "LLM capacity exhausted")
+
+        rule = next((r for r in self.rules if r.matches(request.method, path)), None)
+        if rule is not None:
+            key = f"{rule.name}:{request_identity(request)}"
+            try:
+                if isinstance(self.store, InMemoryBucketStore):
+                    allowed, retry_after = self.store.consume(key, rule.capacity, rule.refill_per_second)
+                else:
+                    allowed, retry_after = await run_in_threadpool(
+                        self.store.consume, key, rule.capacity, rule.refill_per_second
+                    )
+            except Exception as e:
+                # Fail open: a broken limiter store must not take the API down
+                logger.error(f"Rate limit store error: {e}")
+                allowed, retry_after = True, 0.0
+            if not allowed:
+                rate_limited_requests.inc(rule=rule.name, reason="bucket_empty")
+                return _too_many_requests(retry_after, "Rate limit exceeded")
+
+        return await call_next(request)
+
+def overloaded_reply(error: LLMOverloadedError) -> str:
+    """What an agent answers when its LLM call could not be admitted"""
+    return (f"I'm handling a lot of requests right now, please try again in about "
+            f"{max(1, math.ceil(error.retry_after))} seconds.")
+
+async def llm_overloaded_handler(request: Request, error: LLMOverloadedError) -> JSONResponse:
+    """Exception handler turning an admission timeout into a 429"""
+    rate_limited_requests.inc(rule="llm_admission", reason="queue_timeout")
+    return _too_many_requests(error.retry_after, "LLM capacity exhausted")
+
+def _too_many_requests(retry_after: float, detail: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+rate_limit_rules = parse_rules(os.getenv("RATE_LIMIT_RULES", DEFAULT_RULES))
+rate_limit_store = MongoBucketStore() if os.getenv("RATE_LIMIT_STORE", "memory") == "mongo" else InMemoryBucketStore()
+llm_admission = LLMAdmissionController(
+    max_concurrent=int(os.getenv("LLM_MAX_CONCURRENT", "8")),
+    queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "30")),
+    max_queue=int(os.getenv("LLM_MAX_QUEUE", "32")),
+)
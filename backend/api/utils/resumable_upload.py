@@ -0,0 +1,202 @@
+"""
+Resumable chunked uploads into the blob store.
+
+A client creates an upload with the total size and then appends the bytes in
+one or more requests, each starting at the offset the server already has. A
+dropped connection loses nothing that reached disk: the client asks for the
+offset and continues from there. The staged file is hashed as it grows, and
+once complete it is handed to the blob store under its SHA-256.
+
+Memory use is one request chunk per append, whatever the file size. Sessions
+live in the `upload_sessions` collection so any worker can resume them, and
+abandoned ones expire after UPLOAD_SESSION_TTL_HOURS.
+
+An append first claims the session at its offset with one conditional update,
+so two appends racing on any workers cannot both write: the loser gets the
+409 of a stale offset. The claim is a lease, renewed before a write once a
+third of it has passed, and an append that died or stalled holding it is
+taken over once UPLOAD_CLAIM_SECONDS pass. A stalled append that finds its
+claim gone stops without writing, since the new holder may have truncated
+the staged file already.
+"""
+import os
+import time
+import uuid
+import hashlib
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Optional, Tuple
+from pymongo import ReturnDocument
+from starlette.concurrency import run_in_threadpool
+from .blob_store import blob_store
+from .logger import logger
+from .metrics import registry
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(2 * 1024 ** 3)))
+UPLOAD_SESSION_TTL_SECONDS = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")) * 3600
+UPLOAD_CLAIM_SECONDS = float(os.getenv("UPLOAD_CLAIM_SECONDS", "120"))
+
+upload_bytes = registry.counter("resumable_upload_bytes_total", "Bytes appended to resumable uploads")
+upload_events = registry.counter("resumable_uploads_total", "Resumable upload lifecycle events", ("event",))
+
+class UploadOffsetMismatch(Exception):
+    """An append did not start where the upload is, or another append holds it; `offset` is where it is"""
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+class UploadTooLarge(ValueError):
+    pass
+
+def _write(f, hasher, chunk: bytes):
+    f.write(chunk)
+    hasher.update(chunk)
+
+class ResumableUploads:
+    def __init__(self, collection_name: str = "upload_sessions", max_bytes: int = UPLOAD_MAX_BYTES,
+                 ttl_seconds: float = UPLOAD_SESSION_TTL_SECONDS, claim_seconds: float = UPLOAD_CLAIM_SECONDS):
+        self.collection_name = collection_name
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.claim_seconds = claim_seconds
+        self._indexed = False
+        # upload id -> (offset, sha256 of the bytes before it, last used), saves re-hashing on every append
+        self._hashers: Dict[str, Tuple[int, "hashlib._Hash", float]] = {}
+
+    def _collection(self):
+        from ..database.mongodb import MongoDB
+        collection = MongoDB.get_db()[self.collection_name]
+        if not self._indexed:
+            collection.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+        return collection
+
+    def _path(self, upload_id: str) -> str:
+        return os.path.join(blob_store.staging_dir, upload_id)
+
+    def _purge_staged(self):
+        """Drop staged files and cached hashes of sessions that expired"""
+        cutoff = time.time() - self.ttl_seconds
+        for entry in os.scandir(blob_store.staging_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        for upload_id in [k for k, (_, _, used) in self._hashers.items() if used < cutoff]:
+            del self._hashers[upload_id]
+
+    def create(self, owner: str, size: int, mime_type: str, metadata: Optional[dict] = None) -> dict:
+        if size < 0 or size > self.max_bytes:
+            raise UploadTooLarge(f"Uploads are limited to {self.max_bytes} bytes")
+        os.makedirs(blob_store.staging_dir, exist_ok=True)
+        self._purge_staged()
+        session = {
+            "_id": uuid.uuid4().hex,
+            "owner": owner,
+            "size": size,
+            "mimeType": mime_type,
+            "offset": 0,
+            "metadata": metadata or {},
+            "createdAt": datetime.now(),
+            "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+        }
+        open(self._path(session["_id"]), "wb").close()
+        self._collection().insert_one(session)
+        upload_events.inc(event="created")
+        return session
+
+    def get(self, upload_id: str, owner: str) -> Optional[dict]:
+        return self._collection().find_one({"_id": upload_id, "owner": owner})
+
+    def _hasher(self, session: dict):
+        cached = self._hashers.pop(session["_id"], None)
+        if cached is not None and cached[0] == session["offset"]:
+            return cached[1]
+        # Appended through another worker, or this one restarted: hash what is staged
+        hasher = hashlib.sha256()
+        with open(self._path(session["_id"]), "rb") as f:
+            remaining = session["offset"]
+            while remaining > 0:
+                chunk = f.read(min(1024 * 1024, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                remaining -= len(chunk)
+        return hasher
+
+    def _claim(self, upload_id: str, owner: str, offset: int, claim: str) -> dict:
+        """Take the session at `offset` for one append, unless another append holds a live claim"""
+        now = datetime.utcnow()
+        session = self._collection().find_one_and_update(
+            {"_id": upload_id, "owner": owner, "offset": offset,
+             "$or": [{"claim": None}, {"claimExpiresAt": {"$lt": now}}]},
+            {"$set": {"claim": claim, "claimExpiresAt": now + timedelta(seconds=self.claim_seconds)}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if session is not None:
+            return session
+        current = self.get(upload_id, owner)
+        if current is None:
+            raise KeyError(upload_id)
+        upload_events.inc(event="conflict")
+        raise UploadOffsetMismatch(current["offset"])
+
+    def _renew(self, upload_id: str, claim: str) -> bool:
+        return self._collection().update_one(
+            {"_id": upload_id, "claim": claim},
+            {"$set": {"claimExpiresAt": datetime.utcnow() + timedelta(seconds=self.claim_seconds)}},
+        ).matched_count == 1
+
+    def _release(self, upload_id: str, claim: str, offset: int) -> bool:
+        """Record the new offset and drop the claim, False when the claim was lost"""
+        return self._collection().update_one(
+            {"_id": upload_id, "claim": claim},
+            {"$set": {"offset": offset, "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)},
+             "$unset": {"claim": "", "claimExpiresAt": ""}},
+        ).matched_count == 1
+
+    async def append(self, upload_id: str, owner: str, offset: int, chunks: AsyncIterator[bytes]) -> Tuple[dict, Optional[dict]]:
+        """Write `chunks` at `offset`. Returns the session and, once the upload is complete, the stored blob"""
+        claim = uuid.uuid4().hex
+        session = await run_in_threadpool(self._claim, upload_id, owner, offset, claim)
+
+        hasher = await run_in_threadpool(self._hasher, session)
+        written = session["offset"]
+        renewed_at = time.monotonic()
+        released = False
+        # Unbuffered: nothing of ours may reach the file after the claim is given up
+        f = open(self._path(upload_id), "r+b", buffering=0)
+        try:
+            # Bytes past the recorded offset are from an append that never got recorded
+            f.truncate(written)
+            f.seek(written)
+            async for chunk in chunks:
+                if written + len(chunk) > session["size"]:
+                    raise UploadTooLarge(f"Upload is {session['size']} bytes")
+                # The client may have kept us waiting for this chunk, make sure the claim is still ours
+                if time.monotonic() - renewed_at > self.claim_seconds / 3:
+                    if not await run_in_threadpool(self._renew, upload_id, claim):
+                        break
+                    renewed_at = time.monotonic()
+                await run_in_threadpool(_write, f, hasher, chunk)
+                written += len(chunk)
+        finally:
+            f.close()
+            # What reached disk counts, also when the client went away mid-append
+            upload_bytes.inc(written - session["offset"])
+            released = await run_in_threadpool(self._release, upload_id, claim, written)
+            if released:
+                self._hashers[upload_id] = (written, hasher, time.time())
+        if not released:
+            # Stalled past the claim and another append took over, whatever it recorded stands
+            current = await run_in_threadpool(self.get, upload_id, owner)
+            raise UploadOffsetMismatch(current["offset"] if current else 0)
+        session["offset"] = written
+
+        if written < session["size"]:
+            return session, None
+        blob = await run_in_threadpool(blob_store.put_file, self._path(upload_id), hasher.hexdigest(), session["mimeType"])
+        await run_in_threadpool(self._collection().delete_one, {"_id": upload_id})
+        self._hashers.pop(upload_id, None)
+        upload_events.inc(event="completed")
+        logger.info(f"Upload {upload_id} complete", extra={"fields": {"size": blob["size"], "sha256": blob["sha256"]}})
+        return session, blob
+
+resumable_uploads = ResumableUploads()
@@ -0,0 +1,409 @@
+"""
+Full-text and prefix search over events and licenses.
+
+Events are searched by name, location and description, licenses by name and
+issuing authority. Users only find their own events and the licenses of those
+events. Results of both are ranked together and paginated on the server.
+
+Two backends:
+
+- Atlas Search, when the deployment has it. The `eventflow_search` indexes are
+  created on first use and kept current by Atlas.
+- A local inverted index per worker, used everywhere else. It holds one shard
+  per user: term postings, a sorted vocabulary for prefix matches and a
+  character trigram index for misspelled terms. It is built from Mongo on
+  first use and updated by every write that goes through this process. Writes
+  made by other workers show up when the index is rebuilt in the background,
+  at most SEARCH_INDEX_MAX_AGE_SECONDS after the last build.
+
+Configuration:
+    SEARCH_BACKEND                atlas, local or auto: Atlas for *.mongodb.net clusters (default auto)
+    SEARCH_INDEX_MAX_AGE_SECONDS  age after which the local index is rebuilt (default 600)
+"""
+import os
+import re
+import math
+import time
+import heapq
+import bisect
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+from .logger import logger
+from .metrics import registry
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+SEARCH_INDEX_MAX_AGE_SECONDS = float(os.getenv("SEARCH_INDEX_MAX_AGE_SECONDS", "600"))
+ATLAS_INDEX_NAME = "eventflow_search"
+
+# Searchable fields of each collection and how much a match in them counts
+FIELD_WEIGHTS = {
+    "events": {"eventName": 3.0, "location": 1.5, "description": 1.0},
+    "licenses": {"name": 3.0, "issuingAuthority": 1.5},
+}
+# Prefix terms considered per query term, shortest first
+PREFIX_EXPANSIONS = 64
+# Trigram similarity a vocabulary term needs to count as a misspelling of a query term
+FUZZY_MIN_SIMILARITY = 0.35
+STOPWORDS = {"a", "an", "and", "the", "of", "for", "in", "on", "at", "to", "with"}
+
+search_requests = registry.counter("search_requests_total", "Event and license searches", ("backend",))
+search_seconds = registry.histogram(
+    "search_seconds", "Event and license search latency", ("backend",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+search_index_documents = registry.gauge("search_index_documents", "Documents in the local search index")
+
+def tokenize(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return [term for term in re.findall(r"[a-z0-9]+", text.lower()) if term not in STOPWORDS]
+
+def _trigrams(term: str) -> Set[str]:
+    padded = f"#{term}#"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _summary(kind: str, doc: dict) -> dict:
+    """What a search result shows"""
+    if kind == "events":
+        return {
+            "type": "event",
+            "id": str(doc["_id"]),
+            "title": doc.get("eventName", ""),
+            "subtitle": doc.get("location", ""),
+            "date": doc.get("dateTime"),
+        }
+    return {
+        "type": "license",
+        "id": str(doc["_id"]),
+        "title": doc.get("name", ""),
+        "subtitle": doc.get("issuingAuthority", ""),
+        "date": doc.get("dueDate"),
+        "eventId": doc.get("eventId"),
+        "status": doc.get("status"),
+    }
+
+def _term_weights(kind: str, doc: dict) -> Dict[str, float]:
+    """Term -> weight of a document, field weighted and length normalized"""
+    weights: Dict[str, float] = {}
+    for field, field_weight in FIELD_WEIGHTS[kind].items():
+        terms = tokenize(str(doc.get(field) or ""))
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        norm = 1 + math.log(len(terms)) if terms else 1
+        for term, count in counts.items():
+            weights[term] = weights.get(term, 0.0) + field_weight * (1 + math.log(count)) / norm
+    return weights
+
+class _Shard:
+    """Inverted index over the documents of one user"""
+    def __init__(self, bulk: bool = False):
+        # While bulk loading the vocabulary is appended to and sorted once at the end
+        self.bulk = bulk
+        # (kind, id) -> result summary
+        self.docs: Dict[Tuple[str, str], dict] = {}
+        self.doc_terms: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self.postings: Dict[str, Dict[Tuple[str, str], float]] = {}
+        # Sorted terms, a prefix is a contiguous range
+        self.vocabulary: List[str] = []
+        self.trigrams: Dict[str, Set[str]] = {}
+
+    def add(self, key: Tuple[str, str], summary: dict, terms: Dict[str, float]):
+        self.docs[key] = summary
+        self.doc_terms[key] = terms
+        for term, weight in terms.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                if self.bulk:
+                    self.vocabulary.append(term)
+                else:
+                    bisect.insort(self.vocabulary, term)
+                for trigram in _trigrams(term):
+                    self.trigrams.setdefault(trigram, set()).add(term)
+            postings[key] = weight
+
+    def finish_bulk(self):
+        self.vocabulary.sort()
+        self.bulk = False
+
+    def remove(self, key: Tuple[str, str]):
+        self.docs.pop(key, None)
+        for term in self.doc_terms.pop(key, {}):
+            postings = self.postings[term]
+            del postings[key]
+            if not postings:
+                del self.postings[term]
+                if self.bulk:
+                    self.vocabulary.remove(term)
+                else:
+                    del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+                for trigram in _trigrams(term):
+                    terms = self.trigrams[trigram]
+                    terms.discard(term)
+                    if not terms:
+                        del self.trigrams[trigram]
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Vocabulary terms a query term matches, with how well: exact, prefix, then misspelled"""
+        matches = [(token, 1.0)] if token in self.postings else []
+        if len(token) >= 2:
+            start = bisect.bisect_right(self.vocabulary, token)
+            end = bisect.bisect_left(self.vocabulary, token + "\x7f", start)
+            prefixed = heapq.nsmallest(PREFIX_EXPANSIONS, self.vocabulary[start:end], key=len)
+            matches += [(term, 0.4 + 0.4 * len(token) / len(term)) for term in prefixed]
+        if not matches and len(token) >= 4:
+            query_trigrams = _trigrams(token)
+            shared: Dict[str, int] = {}
+            for trigram in query_trigrams:
+                for term in self.trigrams.get(trigram, ()):
+                    shared[term] = shared.get(term, 0) + 1
+            for term, count in shared.items():
+                similarity = count / (len(query_trigrams) + len(term) - count)
+                if similarity >= FUZZY_MIN_SIMILARITY:
+                    matches.append((term, 0.5 * similarity))
+        return matches
+
+    def search(self, tokens: List[str], kinds: Set[str]) -> Dict[Tuple[str, str], float]:
+        """
+        Score of every document matching all query terms or, when none does,
+        of those matching any, ranked by how many they match
+        """
+        total = len(self.docs)
+        every_kind = kinds >= {"events", "licenses"}
+        scores: Dict[Tuple[str, str], float] = {}
+        matched: Dict[Tuple[str, str], int] = {}
+        for token in tokens:
+            best: Dict[Tuple[str, str], float] = {}
+            for term, quality in self._expand(token):
+                postings = self.postings[term]
+                factor = quality * math.log(1 + total / len(postings))
+                for key, weight in postings.items():
+                    if every_kind or key[0] in kinds:
+                        score = factor * weight
+                        if score > best.get(key, 0.0):
+                            best[key] = score
+            for key, score in best.items():
+                scores[key] = scores.get(key, 0.0) + score
+                matched[key] = matched.get(key, 0) + 1
+        complete = {key: score for key, score in scores.items() if matched[key] == len(tokens)}
+        if complete:
+            return complete
+        return {key: score * matched[key] / len(tokens) for key, score in scores.items()}
+
+class LocalSearchIndex:
+    """Per-user inverted indexes of events and licenses, mirrored from Mongo"""
+    def __init__(self, max_age_seconds: float = SEARCH_INDEX_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._shards: Dict[str, _Shard] = {}
+        # (kind, id) -> owner, license owners come from their event
+        self._owners: Dict[Tuple[str, str], str] = {}
+        self._event_owners: Dict[str, str] = {}
+        self._built_at: Optional[float] = None
+        self._rebuilding = False
+        # Writes made while a rebuild reads Mongo, replayed onto the new index
+        self._pending: List[Tuple[str, str, Optional[dict]]] = []
+        self._bulk = False
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._owners)
+
+    def _apply(self, kind: str, doc_id: str, doc: Optional[dict]):
+        key = (kind, doc_id)
+        owner = self._owners.pop(key, None)
+        if owner is not None:
+            self._shards[owner].remove(key)
+        if doc is None:
+            return
+        if kind == "events":
+            owner = doc.get("userId")
+            if owner is not None:
+                self._event_owners[doc_id] = owner
+        else:
+            owner = self._event_owners.get(str(doc.get("eventId"))) or doc.get("userId")
+        if owner is None:
+            return
+        shard = self._shards.get(owner)
+        if shard is None:
+            shard = self._shards[owner] = _Shard(bulk=self._bulk)
+        shard.add(key, _summary(kind, doc), _term_weights(kind, doc))
+        self._owners[key] = owner
+
+    def _read_all(self) -> "LocalSearchIndex":
+        from ..database.mongodb import MongoDB
+        db = MongoDB.get_db()
+        index = LocalSearchIndex(self.max_age_seconds)
+        index._bulk = True
+        # Events first, licenses are filed under their event's owner
+        for kind, extra in (("events", ("userId", "dateTime")), ("licenses", ("userId", "eventId", "dueDate", "status"))):
+            projection = {field: 1 for field in (*FIELD_WEIGHTS[kind], *extra)}
+            for doc in db[kind].find({}, projection):
+                index._apply(kind, str(doc["_id"]), doc)
+        for shard in index._shards.values():
+            shard.finish_bulk()
+        index._bulk = False
+        return index
+
+    def _swap(self, index: "LocalSearchIndex"):
+        with self._lock:
+            for kind, doc_id, doc in self._pending:
+                index._apply(kind, doc_id, doc)
+            self._pending = []
+            self._shards, self._owners, self._event_owners = index._shards, index._owners, index._event_owners
+            self._built_at = time.monotonic()
+            self._rebuilding = False
+        search_index_documents.set(len(self._owners))
+
+    def _rebuild(self):
+        start = time.perf_counter()
+        try:
+            self._swap(self._read_all())
+            logger.info(f"Built search index of {len(self)} documents in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            with self._lock:
+                self._rebuilding = False
+                self._pending = []
+            logger.error(f"Failed to build search index: {e}")
+
+    def _ensure_fresh(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            if self._built_at is None:
+                # First use: nothing to serve yet, build inline (other callers wait on the lock)
+                self._rebuilding = True
+                try:
+                    self._swap(self._read_all())
+                finally:
+                    self._rebuilding = False
+                return
+            if time.monotonic() - self._built_at < self.max_age_seconds:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild, name="search-index-rebuild", daemon=True).start()
+
+    def upsert(self, kind: str, doc: dict):
+        """Index a created or updated document"""
+        self._write(kind, str(doc["_id"]), doc)
+
+    def remove(self, kind: str, doc_id: str):
+        self._write(kind, str(doc_id), None)
+
+    def _write(self, kind: str, doc_id: str, doc: Optional[dict]):
+        with self._lock:
+            if self._built_at is None and not self._rebuilding:
+                return  # Not built yet, the first build reads it from Mongo
+            if self._rebuilding:
+                self._pending.append((kind, doc_id, doc))
+            if self._built_at is not None:
+                self._apply(kind, doc_id, doc)
+        search_index_documents.set(len(self._owners))
+
+    def search(self, user_id: str, query: str, kinds: Iterable[str], limit: int, offset: int) -> dict:
+        self._ensure_fresh()
+        tokens = tokenize(query)
+        with self._lock:
+            shard = self._shards.get(user_id)
+            if shard is None or not tokens:
+                return {"total": 0, "results": []}
+            scores = shard.search(tokens, set(kinds))
+            top = heapq.nsmallest(offset + limit, scores.items(), key=lambda item: (-item[1], shard.docs[item[0]]["title"]))
+            results = [{**shard.docs[key], "score": round(score, 4)} for key, score in top[offset:]]
+        return {"total": len(scores), "results": results}
+
+def atlas_index_definition(kind: str) -> dict:
+    """Atlas Search mappings: text and autocomplete on the searchable fields, the owner as a token"""
+    autocomplete = {"type": "autocomplete", "tokenization": "edgeGram", "minGrams": 2, "maxGrams": 15, "foldDiacritics": True}
+    fields = {
+        field: [{"type": "string"}, autocomplete] if weight > 1 else {"type": "string"}
+        for field, weight in FIELD_WEIGHTS[kind].items()
+    }
+    fields["userId" if kind == "events" else "eventId"] = {"type": "token"}
+    return {"mappings": {"dynamic": False, "fields": fields}}
+
+class AtlasSearch:
+    """$search queries against the eventflow_search index of each collection"""
+    def __init__(self, index_name: str = ATLAS_INDEX_NAME):
+        self.index_name = index_name
+        self._ready: Dict[str, bool] = {}
+        self._checked_at = 0.0
+
+    def available(self) -> bool:
+        """Whether both indexes exist and are queryable, creating missing ones (rechecked every minute)"""
+        from ..database.mongodb import MongoDB
+        if all(self._ready.get(kind) for kind in FIELD_WEIGHTS) or time.monotonic() - self._checked_at < 60:
+            return all(self._ready.get(kind) for kind in FIELD_WEIGHTS)
+        self._checked_at = time.monotonic()
+        for kind in FIELD_WEIGHTS:
+            self._ready[kind] = MongoDB.ensure_search_index(kind, self.index_name, atlas_index_definition(kind))
+        return all(self._ready.values())
+
+    def _query(self, kind: str, query: str, scope: dict, limit: int) -> Tuple[int, List[dict]]:
+        from ..database.mongodb import MongoDB
+        should = []
+        for field, weight in FIELD_WEIGHTS[kind].items():
+            should.append({"text": {"query": query, "path": field, "fuzzy": {"maxEdits": 1},
+                                    "score": {"boost": {"value": weight}}}})
+            if weight > 1:
+                should.append({"autocomplete": {"query": query, "path": field,
+                                                "score": {"boost": {"value": weight * 0.8}}}})
+        pipeline = [
+            {"$search": {
+                "index": self.index_name,
+                "compound": {"filter": [scope], "should": should, "minimumShouldMatch": 1},
+                "count": {"type": "total"},
+            }},
+            {"$limit": limit},
+            {"$addFields": {"_score": {"$meta": "searchScore"}, "_meta": "$$SEARCH_META"}},
+        ]
+        docs = list(MongoDB.get_db()[kind].aggregate(pipeline))
+        total = docs[0]["_meta"]["count"]["total"] if docs else 0
+        return total, [{**_summary(kind, doc), "score": round(doc["_score"], 4)} for doc in docs]
+
+    def search(self, user_id: str, query: str, kinds: Iterable[str], limit: int, offset: int) -> dict:
+        from ..database.mongodb import MongoDB
+        kinds = list(kinds)
+        total, results = 0, []
+        for kind in kinds:
+            if kind == "events":
+                scope = {"equals": {"path": "userId", "value": user_id}}
+            else:
+                event_ids = [str(i) for i in MongoDB.get_db().events.distinct("_id", {"userId": user_id})]
+                if not event_ids:
+                    continue
+                scope = {"in": {"path": "eventId", "value": event_ids}}
+            # Each collection's top offset + limit is enough to page through the merged ranking
+            count, hits = self._query(kind, query, scope, offset + limit)
+            total += count
+            results += hits
+        results.sort(key=lambda hit: (-hit["score"], hit["title"]))
+        return {"total": total, "results": results[offset:offset + limit]}
+
+def _use_atlas() -> bool:
+    if SEARCH_BACKEND == "auto":
+        return (urlparse(os.getenv("MONGODB_URL", "")).hostname or "").endswith(".mongodb.net")
+    return SEARCH_BACKEND == "atlas"
+
+local_search_index = LocalSearchIndex()
+atlas_search = AtlasSearch()
+
+def search(user_id: str, query: str, kinds: Iterable[str] = ("events", "licenses"), limit: int = 20,
+           offset: int = 0) -> dict:
+    """Ranked page of a user's events and licenses matching the query"""
+    start = time.perf_counter()
+    backend = "atlas" if _use_atlas() and atlas_search.available() else "local"
+    engine = atlas_search if backend == "atlas" else local_search_index
+    try:
+        return {"backend": backend, **engine.search(user_id, query, kinds, limit, offset)}
+    finally:
+        search_requests.inc(backend=backend)
+        search_seconds.observe(time.perf_counter() - start, backend=backend)
+
+def index_document(kind: str, doc: dict):
+    """Keep the local index current after a write, Atlas indexes follow on their own"""
+    local_search_index.upsert(kind, doc)
+
+def unindex_document(kind: str, doc_id: str):
+    local_search_index.remove(kind, doc_id)
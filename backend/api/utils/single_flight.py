@@ -0,0 +1,112 @@
+"""
+Single-flight coalescing of identical concurrent async calls.
+
+The first caller for a key starts the call as a separate task and later callers
+with the same key await that same task. Items a streaming call produces before
+its result are delivered to every waiter. Waiters are shielded from each other:
+a waiter that is cancelled (client disconnected) only leaves, and the shared
+call is cancelled only when no waiter is left.
+"""
+import re
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from .logger import logger
+from .metrics import registry
+
+single_flight_calls = registry.counter(
+    "single_flight_calls_total", "Calls through single-flight groups by role", ("group", "role")
+)
+single_flight_cancelled = registry.counter(
+    "single_flight_cancelled_total", "Shared calls cancelled because every waiter left", ("group",)
+)
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and trailing punctuation insensitive form of a search query"""
+    return re.sub(r"\s+", " ", query.strip().lower()).strip(" .!?")
+
+class _Call:
+    """One shared call: its task, waiters, and the items it streamed so far"""
+    def __init__(self):
+        self.task: Optional[asyncio.Future] = None
+        self.waiters = 0
+        self.items: List[tuple] = []
+        self.listeners: List[Callable[..., Awaitable[None]]] = []
+        # Orders deliveries, so a waiter joining mid-stream replays and then
+        # follows the items without interleaving
+        self.delivery = asyncio.Lock()
+
+    async def publish(self, *item):
+        async with self.delivery:
+            self.items.append(item)
+            for listener in list(self.listeners):
+                try:
+                    await listener(*item)
+                except Exception as e:
+                    # A broken listener only stops its own waiter's stream
+                    logger.error(f"Single-flight listener failed: {e}")
+                    self.listeners.remove(listener)
+
+    async def listen(self, on_item: Callable[..., Awaitable[None]]):
+        async with self.delivery:
+            for item in self.items:
+                await on_item(*item)
+            self.listeners.append(on_item)
+
+class SingleFlight:
+    """Group of in-flight calls keyed by a hashable key"""
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        return await self.stream(key, lambda publish: fn())
+
+    async def stream(self, key: Hashable, fn: Callable[[Callable[..., Awaitable[None]]], Awaitable[Any]],
+                     on_item: Optional[Callable[..., Awaitable[None]]] = None) -> Any:
+        """
+        Like do, for calls that produce items before their result. fn gets a
+        `publish(*item)` coroutine function, every waiter's on_item receives
+        each published item, including the ones published before it joined.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call()
+            call.task = asyncio.ensure_future(fn(call.publish))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _, key=key, call=call: self._forget(key, call))
+            single_flight_calls.inc(group=self.name, role="leader")
+        else:
+            single_flight_calls.inc(group=self.name, role="follower")
+
+        task = call.task
+        call.waiters += 1
+        try:
+            if on_item is not None:
+                await call.listen(on_item)
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and call.waiters == 1:
+                # Last waiter is gone, nobody needs the result any more. Forget the
+                # call first so a caller arriving meanwhile starts a fresh one.
+                self._forget(key, call)
+                task.cancel()
+                single_flight_cancelled.inc(group=self.name)
+            raise
+        finally:
+            call.waiters -= 1
+            if on_item in call.listeners:
+                call.listeners.remove(on_item)
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+def search_key(agent: str, query: str, model: str) -> Tuple[str, str, str]:
+    return (agent, normalize_query(query), model)
+
+# Shared by the structured search calls of both agents
+agent_search_flight = SingleFlight("agent_search")
@@ -0,0 +1,241 @@
+"""
+Vendor directory shared by a user's events.
+
+A vendor's details (name, type, contact, phone) are stored once per user in
+`vendors`. Events reference them from event_food.vendors as
+{vendor_id, status, progress}, the parts that differ per event, so changing
+a caterer's phone number is one write however many events book them.
+
+Vendors are matched on their normalized name (case, accents, punctuation and
+spacing ignored) and on their phone digits, each unique per user. Booking a
+vendor from an event matches or creates one, and is refused when the details
+given differ from the matched vendor's rather than silently taking the stored
+ones. Shared details change through `update`, from PUT /api/vendors/{id} or
+from editing the vendor on an event. A vendor needs a name. Reads
+hydrate the references with a $lookup, or with one batched query for many
+events at once.
+
+Events saved before the directory embed full vendors. Those are returned as
+they are until moved over with:
+
+    cd backend && python -m api.utils.vendor_directory migrate
+"""
+import re
+import sys
+import unicodedata
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from .logger import logger
+
+# The parts of a vendor shared by every event that books them
+SHARED_FIELDS = ("name", "type", "contact", "phone")
+
+class VendorConflict(ValueError):
+    """The details match one vendor by name and another by phone"""
+
+class InvalidVendor(ValueError):
+    """The details have no name to file the vendor under"""
+
+def normalize_name(name: str) -> str:
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode()
+    # Joe's and Joes are one word
+    text = text.replace("'", "")
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+def normalize_phone(phone: str) -> Optional[str]:
+    digits = re.sub(r"\D", "", phone or "")
+    # +1 919 555 0100 and (919) 555-0100 are the same number
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits or None
+
+def reference(vendor: dict, details: dict) -> dict:
+    """What an event stores for a directory vendor"""
+    return {"vendor_id": vendor["_id"], "status": details.get("status", ""), "progress": details.get("progress", 0)}
+
+def merge(entries: Iterable[dict], directory: Dict[ObjectId, dict]) -> List[dict]:
+    """Event vendor entries with their directory details filled in, position for position"""
+    vendors = []
+    for entry in entries:
+        if "vendor_id" not in entry:
+            vendors.append(entry)  # Embedded before the directory
+            continue
+        vendor = directory.get(entry["vendor_id"], {})
+        vendors.append({
+            "id": str(entry["vendor_id"]),
+            **{field: vendor.get(field, "") for field in SHARED_FIELDS},
+            "status": entry.get("status", ""),
+            "progress": entry.get("progress", 0),
+        })
+    return vendors
+
+class VendorDirectory:
+    """Per-user vendors, the references events hold to them, and their hydration"""
+    def __init__(self):
+        self._indexed = False
+
+    def _collection(self):
+        from ..database.mongodb import MongoDB
+        collection = MongoDB.get_db().vendors
+        if not self._indexed:
+            # Keys carry the user id, so uniqueness is per user and a missing phone stays out of the index
+            collection.create_index("nameKey", unique=True)
+            collection.create_index("phoneKey", unique=True, sparse=True)
+            collection.create_index([("userId", 1), ("name", 1)])
+            self._indexed = True
+        return collection
+
+    @staticmethod
+    def _keys(user_id: str, details: dict) -> dict:
+        name = normalize_name(details.get("name", ""))
+        if not name:
+            raise InvalidVendor("A vendor needs a name")
+        keys = {"nameKey": f"{user_id}|{name}"}
+        phone = normalize_phone(details.get("phone", ""))
+        if phone:
+            keys["phoneKey"] = f"{user_id}|{phone}"
+        return keys
+
+    @staticmethod
+    def differences(vendor: dict, details: dict) -> List[str]:
+        """Shared fields given in `details` that the stored vendor has otherwise"""
+        changed = []
+        for field in SHARED_FIELDS:
+            given = (details.get(field) or "").strip()
+            if not given:
+                continue
+            stored = vendor.get(field) or ""
+            if field == "name":
+                equal = normalize_name(stored) == normalize_name(given)
+            elif field == "phone":
+                equal = normalize_phone(stored) == normalize_phone(given)
+            else:
+                equal = stored.strip() == given
+            if not equal:
+                changed.append(field)
+        return changed
+
+    def resolve(self, user_id: str, details: dict, exact: bool = False) -> dict:
+        """
+        The user's directory vendor matching these details by name or phone,
+        as stored, or a new one created from them. Never changes an existing
+        vendor, that is `update`. With `exact`, a match whose stored details
+        differ from the given ones is a VendorConflict.
+        """
+        collection = self._collection()
+        keys = self._keys(user_id, details)
+        clauses = [{"nameKey": keys["nameKey"]}] + ([{"phoneKey": keys["phoneKey"]}] if "phoneKey" in keys else [])
+        for _ in range(2):
+            existing = list(collection.find({"$or": clauses}))
+            if len(existing) > 1:
+                raise VendorConflict(
+                    f"'{details.get('name')}' and phone {details.get('phone')} belong to different vendors"
+                )
+            if existing:
+                changed = self.differences(existing[0], details) if exact else []
+                if changed:
+                    raise VendorConflict(
+                        f"'{existing[0].get('name')}' is already in your vendors with a different "
+                        f"{', '.join(changed)}, edit that vendor to change it"
+                    )
+                return existing[0]
+            vendor = {"userId": user_id, **{field: details.get(field, "") for field in SHARED_FIELDS}, **keys,
+                      "createdAt": datetime.utcnow()}
+            try:
+                vendor["_id"] = collection.insert_one(vendor).inserted_id
+                return vendor
+            except DuplicateKeyError:
+                # Created concurrently: match it
+                vendor.pop("_id", None)
+                continue
+        raise VendorConflict(f"'{details.get('name')}' conflicts with another vendor")
+
+    def update(self, user_id: str, vendor_id: ObjectId, details: dict) -> Optional[dict]:
+        """Change a vendor's shared details, every event booking them sees it"""
+        shared = {field: details.get(field, "") for field in SHARED_FIELDS}
+        keys = self._keys(user_id, details)
+        update = {"$set": {**shared, **keys, "updatedAt": datetime.utcnow()}}
+        if "phoneKey" not in keys:
+            update["$unset"] = {"phoneKey": ""}
+        try:
+            result = self._collection().update_one({"_id": vendor_id, "userId": user_id}, update)
+        except DuplicateKeyError:
+            raise VendorConflict(f"Another vendor already has the name '{details.get('name')}' or phone {details.get('phone')}")
+        if not result.matched_count:
+            return None
+        return self._collection().find_one({"_id": vendor_id})
+
+    def list(self, user_id: str, query: str = "", limit: int = 100) -> List[dict]:
+        """The user's vendors by name, `query` matches the start of a normalized name"""
+        match = {"userId": user_id}
+        if normalize_name(query):
+            match["nameKey"] = {"$regex": f"^{re.escape(user_id + '|' + normalize_name(query))}"}
+        return list(self._collection().find(match, sort=[("name", 1)], limit=limit))
+
+    def food_data(self, food_collection, event_id: ObjectId) -> Optional[dict]:
+        """An event's food document with its vendors hydrated, one $lookup"""
+        self._collection()
+        pipeline = [
+            {"$match": {"event_id": event_id}},
+            # The ids as a top level array, $lookup matches any of them
+            {"$addFields": {"_vendorIds": "$vendors.vendor_id"}},
+            {"$lookup": {"from": "vendors", "localField": "_vendorIds", "foreignField": "_id", "as": "_directory"}},
+        ]
+        food = next(food_collection.aggregate(pipeline), None)
+        if food is None:
+            return None
+        directory = {vendor["_id"]: vendor for vendor in food.pop("_directory", [])}
+        food.pop("_vendorIds", None)
+        food["vendors"] = merge(food.get("vendors") or [], directory)
+        return food
+
+    def hydrate(self, foods: List[dict]) -> List[dict]:
+        """Fill in the vendors of many food documents with one query"""
+        ids = {entry["vendor_id"] for food in foods for entry in food.get("vendors") or [] if "vendor_id" in entry}
+        directory = {vendor["_id"]: vendor for vendor in self._collection().find({"_id": {"$in": list(ids)}})} if ids else {}
+        for food in foods:
+            if food.get("vendors"):
+                food["vendors"] = merge(food["vendors"], directory)
+        return foods
+
+    def migrate(self, food_collection) -> int:
+        """Move embedded vendors into the directory, returns how many event food documents changed"""
+        db = self._collection().database
+        migrated = 0
+        # A vendor booked by many events is resolved once per spelling of its details
+        resolved: Dict[tuple, dict] = {}
+        for food in food_collection.find({"vendors.name": {"$exists": True}}, {"event_id": 1, "vendors": 1}):
+            event = db.events.find_one({"_id": food["event_id"]}, {"userId": 1})
+            if not event or not event.get("userId"):
+                logger.warning(f"Vendors of event {food['event_id']} left embedded, the event has no owner")
+                continue
+            entries = []
+            for entry in food["vendors"]:
+                if "vendor_id" not in entry:
+                    key = (event["userId"],) + tuple(entry.get(field, "") for field in SHARED_FIELDS)
+                    if key not in resolved:
+                        try:
+                            resolved[key] = self.resolve(event["userId"], entry)
+                        except ValueError as e:
+                            # No name, or one vendor's name with another's phone: stays embedded
+                            logger.warning(f"Vendor '{entry.get('name')}' of event {food['event_id']} left embedded: {e}")
+                            resolved[key] = None
+                    if resolved[key] is not None:
+                        entry = reference(resolved[key], entry)
+                entries.append(entry)
+            food_collection.update_one({"_id": food["_id"], "vendors": food["vendors"]}, {"$set": {"vendors": entries}})
+            migrated += 1
+        return migrated
+
+vendor_directory = VendorDirectory()
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["migrate"]:
+        sys.exit("usage: python -m api.utils.vendor_directory migrate")
+    from ..database.mongodb import MongoDB
+    MongoDB.connect_db()
+    count = vendor_directory.migrate(MongoDB.client.eventflow_db.event_food)
+    print(f"Moved the vendors of {count} events into the directory")
+    MongoDB.close_db()
@@ -0,0 +1,142 @@
+"""
+Payload size and server memory of chat turns with an attached image, inline
+base64 vs content-addressed blob references.
+
+A conversation attaches one image in its first turn and keeps going. Inline,
+the base64 image is part of every request (the client re-sends the history)
+and of the converted HumanMessage held in graph state. With references, the
+image is uploaded once to POST /api/blobs and messages carry
+`blob:sha256:...`, resolved into a data URL only for the model call.
+
+Drives add_langgraph_route and the blobs router in process, with a graph that
+resolves references the way the agents' chat nodes do instead of calling an
+LLM. The store is a temporary filesystem store, who holds which blob is kept
+in mongomock. Also checks that a second user can neither read the first
+user's blob nor learn that it exists.
+
+    cd backend && python -m benchmarks.blob_refs --image-kb 1024 --turns 20
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import tempfile
+import tracemalloc
+
+def build_graph(resolved_sizes: list):
+    from langchain_core.messages import AIMessage, HumanMessage
+    from langgraph.checkpoint.memory import MemorySaver
+    from langgraph.graph import END, START, MessagesState, StateGraph
+    from api.utils.blob_store import resolve_blob_refs
+
+    async def answer(state: MessagesState):
+        # What chat_node hands to the model
+        messages = resolve_blob_refs(state["messages"])
+        resolved_sizes.append(sum(len(json.dumps(m.content)) for m in messages if isinstance(m, HumanMessage)))
+        return {"messages": [AIMessage(content="Noted, the floor plan fits 120 guests.")]}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("answer", answer)
+    builder.add_edge(START, "answer")
+    builder.add_edge("answer", END)
+    return builder.compile(checkpointer=MemorySaver())
+
+def build_app(graph):
+    from fastapi import FastAPI
+    import mongomock
+    from api.database.mongodb import MongoDB
+    from api.routes.add_langgraph_route import add_langgraph_route
+    from api.routes.blobs import router as blobs_router
+
+    MongoDB.client = mongomock.MongoClient()
+    MongoDB.db = MongoDB.client["eventflow_bench"]
+    app = FastAPI()
+    add_langgraph_route(app, graph, "/chat")
+    app.include_router(blobs_router, prefix="/api/blobs")
+    act_as(app, "bench-user")
+    return app
+
+def act_as(app, user_id: str):
+    from api.routes.add_langgraph_route import current_user_or_none
+    from api.routes.auth import get_current_user
+    app.dependency_overrides[get_current_user] = lambda: user_id
+    app.dependency_overrides[current_user_or_none] = lambda: user_id
+
+def text_part(text: str) -> dict:
+    return {"type": "text", "text": text}
+
+async def converse(client, image: bytes, turns: int, by_reference: bool, resolved_sizes: list):
+    if by_reference:
+        response = await client.post("/api/blobs", content=image, headers={"Content-Type": "image/png"})
+        response.raise_for_status()
+        image_value = response.json()["blob"]["ref"]
+    else:
+        image_value = base64.b64encode(image).decode("ascii")
+
+    history, sizes, peaks = [], [], []
+    for turn in range(turns):
+        content = [text_part(f"Turn {turn}: how many guests fit this layout?")]
+        if turn == 0:
+            content.append({"type": "image", "image": image_value, "mimeType": "image/png"})
+        history.append({"role": "user", "content": content})
+        data = json.dumps({"messages": history}).encode()
+        sizes.append(len(data))
+
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        response = await client.post("/chat", content=data, headers={"Content-Type": "application/json"})
+        response.raise_for_status()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        history.append({"role": "assistant", "content": [text_part("Noted, the floor plan fits 120 guests.")]})
+    return sizes, peaks, resolved_sizes[-turns:]
+
+def report(label: str, sizes, peaks, resolved):
+    print(f"{label:<11} {sizes[0] / 1e3:>9.1f} KB {sizes[-1] / 1e3:>9.1f} KB {sum(sizes) / 1e6:>9.2f} MB "
+          f"{max(peaks) / 1e6:>10.1f} MB {resolved[-1] / 1e3:>10.0f} KB")
+
+async def main(args):
+    import httpx
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    image = os.urandom(args.image_kb * 1024)
+    resolved_sizes = []
+    app = build_app(build_graph(resolved_sizes))
+    transport = httpx.ASGITransport(app=app)
+    tracemalloc.start()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        inline = await converse(client, image, args.turns, False, resolved_sizes)
+        referenced = await converse(client, image, args.turns, True, resolved_sizes)
+        # Same image again: deduplicated, nothing new is stored
+        again = await client.post("/api/blobs", content=image, headers={"Content-Type": "image/png"})
+        digest = again.json()["blob"]["sha256"]
+
+        act_as(app, "other-user")
+        foreign_read = await client.get(f"/api/blobs/{digest}")
+        foreign_chat = await client.post("/chat", json={"messages": [{"role": "user", "content": [
+            {"type": "image", "image": again.json()["blob"]["ref"], "mimeType": "image/png"}]}]})
+        foreign_upload = await client.post("/api/blobs", content=image, headers={"Content-Type": "image/png"})
+    tracemalloc.stop()
+    assert foreign_read.status_code == 404, foreign_read.status_code
+    assert foreign_chat.status_code == 400, foreign_chat.status_code
+    assert foreign_upload.json()["blob"]["deduplicated"] is False
+
+    print(f"{args.image_kb} KB image attached in turn 1 of {args.turns}, full-history requests")
+    print()
+    print(f"{'':<11} {'request 1':>12} {'request ' + str(args.turns):>12} {'all requests':>12} "
+          f"{'peak memory':>13} {'model input':>13}")
+    report("inline", *inline)
+    report("reference", *referenced)
+    print()
+    print(f"second upload of the same image: deduplicated={again.json()['blob']['deduplicated']}")
+    print(f"another user: read {foreign_read.status_code}, chat reference {foreign_chat.status_code}, "
+          f"upload of the same image deduplicated={foreign_upload.json()['blob']['deduplicated']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image-kb", type=int, default=1024)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(prefix="blobs-") as blob_dir:
+        os.environ.setdefault("BLOB_STORE_DIR", blob_dir)
+        asyncio.run(main(args))
@@ -0,0 +1,102 @@
+"""
+Request size and server CPU per turn of the custom chat route over a long
+conversation, full-history requests vs thread id plus new messages.
+
+Drives add_langgraph_route in process with a small checkpointed graph (a node
+that answers without an LLM) so the numbers are the route's own cost: request
+parsing, message conversion and graph state handling. Threaded requests
+authenticate against a mongomock user, as they must.
+
+    cd backend && python -m benchmarks.chat_history --turns 200
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+ASSISTANT_REPLY = "Here are five vegetarian options that fit a conference lunch: " + ", ".join(
+    ["Paneer Tikka", "Caesar Salad", "Falafel Wrap", "Mushroom Risotto", "Lemon Tart"]
+)
+
+def build_graph():
+    from langchain_core.messages import AIMessage
+    from langgraph.checkpoint.memory import MemorySaver
+    from langgraph.graph import END, START, MessagesState, StateGraph
+
+    async def answer(state: MessagesState):
+        return {"messages": [AIMessage(content=f"{ASSISTANT_REPLY} (turn {len(state['messages']) // 2 + 1})")]}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("answer", answer)
+    builder.add_edge(START, "answer")
+    builder.add_edge("answer", END)
+    return builder.compile(checkpointer=MemorySaver())
+
+def build_app(graph, cpu_samples: list):
+    from fastapi import FastAPI
+    from api.routes.add_langgraph_route import add_langgraph_route
+
+    app = FastAPI()
+    add_langgraph_route(app, graph, "/chat")
+
+    async def measured(scope, receive, send):
+        # Process time of everything the app does for the request, streaming included
+        start = time.process_time()
+        await app(scope, receive, send)
+        if scope["type"] == "http":
+            cpu_samples.append(time.process_time() - start)
+    return measured
+
+def user_message(turn: int) -> dict:
+    return {"role": "user", "content": [{"type": "text", "text": f"Turn {turn}: find vegetarian dishes for day {turn}"}]}
+
+def bearer_headers() -> dict:
+    from datetime import timedelta
+    import mongomock
+    from api.database.mongodb import MongoDB
+    from api.routes.auth import create_access_token
+    MongoDB.client = mongomock.MongoClient()
+    MongoDB.db = MongoDB.client["eventflow_bench"]
+    MongoDB.db.users.insert_one({"email": "bench@example.com"})
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'bench@example.com'}, timedelta(hours=1))}"}
+
+async def converse(client, turns: int, stateful: bool, cpu_samples: list, headers: dict):
+    history, sizes = [], []
+    thread_id = str(uuid.uuid4()) if stateful else None
+    for turn in range(turns):
+        history.append(user_message(turn))
+        body = {"messages": [history[-1]] if stateful else history}
+        if stateful:
+            body["threadId"] = thread_id
+        data = json.dumps(body).encode()
+        sizes.append(len(data))
+        response = await client.post("/chat", content=data, headers={"Content-Type": "application/json", **headers})
+        response.raise_for_status()
+        text = "".join(json.loads(line[2:]) for line in response.text.splitlines() if line.startswith("0:"))
+        history.append({"role": "assistant", "content": [{"type": "text", "text": text}]})
+    return sizes, cpu_samples[-turns:]
+
+def report(label: str, sizes, cpu, marks):
+    cells = "  ".join(f"{sizes[m - 1] / 1000:>7.1f} KB {cpu[m - 1] * 1000:>6.1f} ms" for m in marks)
+    print(f"{label:<14} {cells}   total {sum(sizes) / 1e6:.1f} MB, {sum(cpu):.2f} s CPU")
+
+async def main(args):
+    import httpx
+    cpu_samples = []
+    app = build_app(build_graph(), cpu_samples)
+    transport = httpx.ASGITransport(app=app)
+    marks = sorted({1, 10, args.turns // 2, args.turns} - {0})
+    headers = bearer_headers()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        full = await converse(client, args.turns, False, cpu_samples, {})
+        threaded = await converse(client, args.turns, True, cpu_samples, headers)
+    print(f"{args.turns}-turn conversation, request size and server CPU at turn " + ", ".join(map(str, marks)))
+    print()
+    report("full history", *full, marks)
+    report("thread id", *threaded, marks)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+"""
+Concurrent sessions of the crewAI SampleAgentFlow against the fake LLM.
+
+Every session runs one chat turn: a get_weather tool call, the tool result and
+the final answer, i.e. two streamed completions. The previous chat node
+(synchronous litellm `completion` wrapped in copilotkit_stream, tool handler
+run inline) is run next to the current one (`acompletion` + copilotkit_astream,
+handlers on the executor). Event loop lag is sampled by a ticker task, it is
+what every other session on the same loop waits.
+
+Needs crewai, litellm and copilotkit (the app dependencies).
+
+    cd backend && python -m benchmarks.crewai_flow --sessions 32 --llm-latency-ms 300
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+async def blocking_chat(flow):
+    """The chat node as it was: a synchronous stream read on the event loop"""
+    from litellm import completion
+    from copilotkit.crewai import copilotkit_stream
+    from api.services.crewAI.agent import GET_WEATHER_TOOL, tool_handlers
+
+    response = await copilotkit_stream(completion(
+        model="openai/gpt-4o",
+        messages=[{"role": "system", "content": "You are a helpful assistant."}, *flow.state.messages],
+        tools=[*flow.state.copilotkit.actions, GET_WEATHER_TOOL],
+        parallel_tool_calls=False,
+        stream=True,
+    ))
+    message = response.choices[0].message
+    flow.state.messages.append(message)
+    if message.get("tool_calls"):
+        tool_call = message["tool_calls"][0]
+        result = tool_handlers[tool_call["function"]["name"]](json.loads(tool_call["function"]["arguments"]))
+        flow.state.messages.append({"role": "tool", "content": result, "tool_call_id": tool_call["id"]})
+        return "route_follow_up"
+    return "route_end"
+
+async def session(index: int, chat):
+    from copilotkit.runloop import set_context_queue
+    from api.services.crewAI.agent import SampleAgentFlow
+
+    queue = asyncio.Queue()
+    set_context_queue(queue)
+    flow = SampleAgentFlow()
+    flow.state.messages.append({"role": "user", "content": f"What is the weather for event {index}?"})
+    start = time.perf_counter()
+    route, calls = "route_follow_up", 0
+    while route == "route_follow_up":
+        route = await chat(flow)
+        calls += 1
+    events = queue.qsize()
+    return time.perf_counter() - start, calls, events
+
+async def run(label: str, chat, sessions: int):
+    lags = []
+    stop = asyncio.Event()
+
+    async def ticker():
+        while not stop.is_set():
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            lags.append(max(0.0, time.perf_counter() - expected))
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(session(i, chat) for i in range(sessions)))
+    wall = time.perf_counter() - start
+    stop.set()
+    await tick
+    latencies = [r[0] for r in results]
+    assert all(r[1] == 2 for r in results) and all(r[2] > 0 for r in results), "tool call, answer and streamed events"
+    print(f"{label:<32} {wall:>7.2f} s {sessions / wall:>8.1f} {percentile(latencies, 50) * 1000:>9.0f} ms "
+          f"{percentile(latencies, 95) * 1000:>9.0f} ms {max(lags) * 1000:>9.0f} ms")
+
+async def main(args):
+    async def chat(flow):
+        return await flow.chat()
+
+    print(f"{args.sessions} concurrent sessions, fake LLM {args.llm_latency_ms:.0f} ms to first byte, "
+          f"{args.token_delay_ms:.0f} ms per chunk")
+    print()
+    print(f"{'chat node':<32} {'wall':>9} {'turns/s':>8} {'turn p50':>12} {'turn p95':>12} {'loop lag':>12}")
+    await run("completion + copilotkit_stream", blocking_chat, args.sessions)
+    await run("acompletion + copilotkit_astream", chat, args.sessions)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--token-delay-ms", type=float, default=10)
+    args = parser.parse_args()
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    from .loadtest.fake_llm import FakeOpenAIServer
+    with FakeOpenAIServer(latency_ms=args.llm_latency_ms, token_delay_ms=args.token_delay_ms) as server:
+        os.environ["OPENAI_API_BASE"] = server.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-fake"
+        asyncio.run(main(args))
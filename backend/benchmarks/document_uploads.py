@@ -0,0 +1,143 @@
+"""
+Resumable license document uploads: server memory for a 500 MB file and
+throughput of concurrent uploads.
+
+Drives the licenses router in process against mongomock and a temporary
+filesystem blob store. Bodies are streamed from generators, so neither the
+client nor the server ever holds a whole file.
+
+Part 1 uploads one large file in several appends, checks a stale offset gets
+409, drops the in-process hash state halfway (as after a worker restart) and
+resumes, then verifies the SHA-256 and a range download. Part 2 uploads
+files concurrently.
+
+    cd backend && python -m benchmarks.document_uploads --size-mb 500 --concurrency 8
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+
+BLOCK = os.urandom(1024 * 1024)
+CHUNK = 64 * 1024
+
+def build_app():
+    import mongomock
+    from bson import ObjectId
+    from fastapi import FastAPI
+    from api.database.mongodb import MongoDB
+    from api.routes.auth import get_current_user
+    from api.routes.licenses import router as licenses_router
+
+    MongoDB.db = mongomock.MongoClient()["eventflow_bench"]
+    license_id = MongoDB.db.licenses.insert_one({"_id": ObjectId(), "name": "Temporary Food Permit", "userId": "bench-user"}).inserted_id
+    app = FastAPI()
+    app.include_router(licenses_router, prefix="/api/events")
+    app.dependency_overrides[get_current_user] = lambda: "bench-user"
+    return app, str(license_id)
+
+def content(start: int, end: int, hasher=None):
+    """Bytes start..end of a file made of BLOCK repeated with the block number mixed in"""
+    position = start
+    while position < end:
+        block, offset = divmod(position, len(BLOCK))
+        chunk = (block.to_bytes(8, "big") + BLOCK[8:])[offset:offset + min(CHUNK, end - position)]
+        if hasher is not None:
+            hasher.update(chunk)
+        position += len(chunk)
+        yield chunk
+
+async def body(start: int, end: int, hasher=None):
+    for chunk in content(start, end, hasher):
+        yield chunk
+
+async def upload(client, license_id: str, name: str, size: int, append_bytes: int, on_half=None):
+    base = f"/api/events/licenses/{license_id}/documents/uploads"
+    response = await client.post(base, json={"name": name, "size": size, "mimeType": "application/pdf"})
+    response.raise_for_status()
+    upload_id = response.json()["upload"]["id"]
+    hasher = hashlib.sha256()
+    offset, result = 0, None
+    while offset < size:
+        if on_half is not None and offset >= size // 2:
+            await on_half(base, upload_id)
+            on_half = None
+            offset = (await client.get(f"{base}/{upload_id}")).json()["upload"]["offset"]
+        end = min(size, offset + append_bytes)
+        response = await client.patch(f"{base}/{upload_id}", content=body(offset, end, hasher),
+                                      headers={"Upload-Offset": str(offset)})
+        response.raise_for_status()
+        result = response.json()
+        offset = result["upload"]["offset"]
+    assert result["document"]["sha256"] == hasher.hexdigest(), "stored digest matches the uploaded bytes"
+    return result["document"]
+
+async def large_file(client, license_id: str, args):
+    size = args.size_mb * 1024 * 1024
+    from api.utils.resumable_upload import resumable_uploads
+    checks = {}
+
+    async def interrupt(base, upload_id):
+        # A client that lost track of the offset gets a 409 telling it where to resume
+        stale = await client.patch(f"{base}/{upload_id}", content=b"x", headers={"Upload-Offset": "0"})
+        checks["stale offset"] = f"{stale.status_code}, resume at {stale.headers['Upload-Offset']}"
+        resumable_uploads._hashers.clear()
+
+    tracemalloc.start()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    document = await upload(client, license_id, "site-plan.pdf", size, args.append_mb * 1024 * 1024, interrupt)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    rss_growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+
+    first = size // 3
+    response = await client.get(document["url"], headers={"Range": f"bytes={first}-{first + 65535}"})
+    expected = b"".join(content(first, first + 65536))
+    checks["range download"] = f"{response.status_code}, {response.headers['Content-Range']}, " + \
+        ("bytes match" if response.content == expected else "BYTES DIFFER")
+
+    print(f"{args.size_mb} MB document in {args.append_mb} MB appends: {elapsed:.1f} s "
+          f"({args.size_mb / elapsed:.0f} MB/s), peak traced memory {peak / 1e6:.1f} MB, max RSS growth {rss_growth:.0f} MB")
+    for name, outcome in checks.items():
+        print(f"  {name}: {outcome}")
+
+async def concurrent(client, license_id: str, args):
+    size = args.concurrent_mb * 1024 * 1024
+    print()
+    print(f"{'concurrent uploads':>18} {'total':>8} {'seconds':>8} {'MB/s':>8}")
+    for concurrency in sorted({1, args.concurrency}):
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            upload(client, license_id, f"permit-{concurrency}-{i}.pdf", size, size)
+            for i in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+        total = concurrency * args.concurrent_mb
+        print(f"{concurrency:>18} {total:>5} MB {elapsed:>8.2f} {total / elapsed:>8.0f}")
+
+async def main(args):
+    import httpx
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app, license_id = build_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        await large_file(client, license_id, args)
+        await concurrent(client, license_id, args)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=500)
+    parser.add_argument("--append-mb", type=int, default=64)
+    parser.add_argument("--concurrent-mb", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory(prefix="blobs-") as blob_dir:
+        os.environ.setdefault("BLOB_STORE_DIR", blob_dir)
+        asyncio.run(main(args))
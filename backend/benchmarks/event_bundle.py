@@ -0,0 +1,165 @@
+"""
+Opening an event page: GET /{id}, /{id}/food-data and /{id}/licenses one
+after the other, what the client does today, vs one GET /{id}/bundle.
+
+Requests go through the real routers and the real JWT authentication. Every
+Mongo call is counted, and against mongomock each one waits --rtt-ms first,
+the round trip to a mongod on another host, so the bundle's concurrent reads
+have something to overlap. Also timed: the bundle with include=food,licenses
+and the same page with no simulated round trip.
+
+    cd backend && python -m benchmarks.event_bundle --requests 200 --rtt-ms 2
+"""
+import argparse
+import logging
+import math
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+class RoundTrips:
+    """Counts the Mongo calls of the requests and delays each by the round trip"""
+    METHODS = ("find_one", "find", "aggregate", "insert_one", "update_one")
+
+    def __init__(self, collection_class, rtt: float):
+        self.rtt = rtt
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        # mongomock's find_one and $lookup call find, only the outer call is a round trip
+        self._depth = threading.local()
+        for name in self.METHODS:
+            setattr(collection_class, name, self._wrap(getattr(collection_class, name), name))
+
+    def _wrap(self, method, name):
+        trips = self
+        def call(collection, *args, **kwargs):
+            depth = getattr(trips._depth, "value", 0)
+            if not depth:
+                with trips._lock:
+                    trips.counts[f"{collection.name}.{name}"] += 1
+                if trips.rtt:
+                    time.sleep(trips.rtt)
+            trips._depth.value = depth + 1
+            try:
+                return method(collection, *args, **kwargs)
+            finally:
+                trips._depth.value = depth
+        return call
+
+    def take(self) -> Counter:
+        with self._lock:
+            counts, self.counts = self.counts, Counter()
+        return counts
+
+def seed(db, other_events: int, rng: random.Random):
+    from bson import ObjectId
+    from api.routes.auth import get_password_hash
+    from api.utils.vendor_directory import vendor_directory, reference
+    user_id = str(db.users.insert_one({"email": "bench@example.com", "password": get_password_hash("bench")}).inserted_id)
+    event_id = ObjectId()
+    db.events.insert_many([{"_id": event_id, "userId": user_id, "eventName": "Spring Gala", "location": "Raleigh, NC",
+                            "dateTime": datetime(2025, 4, 12, 18), "attendees": 300, "description": "x" * 400, "sustainable": True}] +
+                          [{"userId": f"user-{i % 500}", "eventName": f"Event {i}", "dateTime": datetime(2025, 1, 1) + timedelta(hours=i)}
+                           for i in range(other_events)])
+    vendors = [vendor_directory.resolve(user_id, {"name": f"Vendor {j}", "type": "Caterer", "contact": "Sam", "phone": f"919-555-01{j:02d}"})
+               for j in range(6)]
+    db.event_food.insert_one({
+        "event_id": event_id,
+        "summary": {"budget": 12000.0, "budget_percentage": 35, "vendor_count": 6, "vendor_status": "In progress",
+                    "menu_item_count": 24, "dietary_options_count": 6, "status": "Planning", "last_updated": datetime(2025, 3, 1)},
+        "menu_items": [{"name": f"Dish {j}", "type": "main", "dietary": rng.choice(["None", "Vegan"]), "status": "pending"} for j in range(24)],
+        "beverages": [{"name": f"Drink {j}", "category": "Soft", "serving": "Glass", "status": "pending"} for j in range(8)],
+        "vendors": [reference(vendor, {"status": "Pending", "progress": 30}) for vendor in vendors],
+    })
+    db.licenses.insert_many([{"eventId": str(event_id), "userId": user_id, "name": f"Permit {j}", "type": "Special Event Permit",
+                              "description": "", "status": "pending", "dueDate": datetime(2025, 3, 20), "issuingAuthority": "City",
+                              "cost": 150.0, "documents": []} for j in range(8)] +
+                            [{"eventId": str(ObjectId()), "userId": "someone", "name": "Permit", "status": "pending"} for _ in range(other_events)])
+    return str(event_id)
+
+def timed(client, paths, headers, requests: int):
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        for path in paths:
+            response = client.get(path, headers=headers)
+            assert response.status_code == 200, (path, response.status_code, response.text)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def main(args):
+    import mongomock
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from pymongo import MongoClient
+    from api.database.mongodb import MongoDB
+    from api.routes.auth import create_access_token
+    from api.routes.events import router as events_router
+    from api.routes.food import router as food_router
+    from api.routes.licenses import router as licenses_router
+
+    logging.getLogger("api.utils.logger").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    rng = random.Random(6)
+    MongoDB.client = MongoClient(args.mongodb_url) if args.mongodb_url else mongomock.MongoClient()
+    # The food routes read eventflow_db, the other routes MongoDB.db
+    MongoDB.db = db = MongoDB.client["eventflow_db"]
+    for name in ("users", "events", "event_food", "licenses", "vendors"):
+        db[name].drop()
+    event_id = seed(db, args.other_events, rng)
+    for collection, key in (("events", "userId"), ("event_food", "event_id"), ("licenses", "eventId"), ("users", "email")):
+        db[collection].create_index(key)
+    trips = RoundTrips(mongomock.Collection, 0.0) if not args.mongodb_url else None
+
+    app = FastAPI()
+    app.include_router(events_router, prefix="/api/events")
+    app.include_router(food_router, prefix="/api/events")
+    app.include_router(licenses_router, prefix="/api/events")
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench@example.com'}, timedelta(hours=1))}"}
+    sequential = [f"/api/events/{event_id}", f"/api/events/{event_id}/food-data", f"/api/events/{event_id}/licenses"]
+    bundle = [f"/api/events/{event_id}/bundle"]
+
+    pages = [client.get(path, headers=headers).json() for path in sequential]
+    combined = client.get(bundle[0], headers=headers).json()
+    assert combined["event"] == pages[0]["event"]
+    assert combined["food"] == pages[1]
+    assert combined["licenses"] == pages[2]["licenses"]
+    assert client.get(f"{bundle[0]}?include=food,bogus", headers=headers).status_code == 400
+    other = db.events.find_one({"userId": "user-1"})["_id"]
+    assert client.get(f"/api/events/{other}/bundle", headers=headers).status_code == 404
+    print(f"bundle payload matches the three responses ({len(combined['food']['menu_items'])} menu items, "
+          f"{len(combined['food']['vendors'])} vendors, {len(combined['licenses'])} licenses)")
+
+    rtts = [0.0] if args.mongodb_url else [0.0, args.rtt_ms / 1000]
+    for rtt in rtts:
+        if trips is not None:
+            trips.rtt = rtt
+        print()
+        print(f"round trip {'of the mongod' if args.mongodb_url else f'{rtt * 1000:.0f} ms per Mongo call'}, {args.requests} page loads:")
+        for label, paths in (("three sequential calls", sequential), ("bundle", bundle),
+                             ("bundle, include=food,licenses", [f"{bundle[0]}?include=food,licenses"])):
+            timed(client, paths, headers, 3)
+            if trips is not None:
+                trips.take()
+            samples = timed(client, paths, headers, args.requests)
+            calls = ""
+            if trips is not None:
+                counts = trips.take()
+                calls = f", {sum(counts.values()) / args.requests:.0f} Mongo calls (" + \
+                    ", ".join(f"{name} {count // args.requests}" for name, count in sorted(counts.items())) + ")"
+            print(f"  {label:<30} p50 {percentile(samples, 50) * 1000:6.2f} ms, p95 {percentile(samples, 95) * 1000:6.2f} ms{calls}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=2.0, help="simulated round trip per Mongo call with mongomock")
+    parser.add_argument("--other-events", type=int, default=2000, help="events and licenses of other users")
+    parser.add_argument("--mongodb-url", default=None)
+    main(parser.parse_args())
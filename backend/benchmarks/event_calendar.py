@@ -0,0 +1,104 @@
+"""
+Time-window queries over 50k events of one user.
+
+- Python scan: every event read and compared, what get_dashboard_data did.
+- Mongo: the overlap query on (userId, dateTime, endDate). mongomock scans,
+  so its numbers say little, run with --mongodb-url against a mongod for
+  the real plan.
+- Interval tree: the cache hot users get, month, week and day views at random
+  dates, checked against the scan.
+
+    cd backend && python -m benchmarks.event_calendar --events 50000
+"""
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+def make_events(count: int, rng: random.Random):
+    from bson import ObjectId
+    origin = datetime(2024, 1, 1)
+    events = []
+    for i in range(count):
+        start = origin + timedelta(minutes=rng.randrange(0, 3 * 365 * 24 * 60))
+        # Mostly hours long, some multi-day festivals, a few without an end date
+        duration = timedelta(hours=rng.choice([2, 3, 4, 8])) if rng.random() < 0.9 else timedelta(days=rng.randint(1, 14))
+        event = {"_id": ObjectId(), "userId": "bench-user", "eventName": f"Event {i}", "dateTime": start,
+                 "location": "Raleigh, NC", "attendees": 100, "description": "", "sustainable": False}
+        if rng.random() > 0.02:
+            event["endDate"] = start + duration
+        events.append(event)
+    return events
+
+def scan(events, start, end):
+    from api.utils.event_calendar import event_interval
+    return [e for e in events if event_interval(e)[0] <= end and event_interval(e)[1] >= start]
+
+def timed(fn, windows, repeat=1):
+    samples, results = [], 0
+    for _ in range(repeat):
+        for start, end in windows:
+            t = time.perf_counter()
+            results += len(fn(start, end))
+            samples.append(time.perf_counter() - t)
+    return samples, results / len(samples)
+
+def main(args):
+    import mongomock
+    from pymongo import MongoClient
+    from api.database.mongodb import MongoDB
+    from api.utils.event_calendar import EventCalendar, IntervalTree, calendar_window
+
+    rng = random.Random(5)
+    events = make_events(args.events, rng)
+    MongoDB.client = MongoClient(args.mongodb_url) if args.mongodb_url else mongomock.MongoClient()
+    MongoDB.db = MongoDB.client["eventflow_bench_calendar"]
+    MongoDB.db.events.drop()
+    MongoDB.db.events.insert_many([dict(e) for e in events])
+
+    start = time.perf_counter()
+    tree = IntervalTree(events)
+    print(f"{args.events} events, interval tree built in {(time.perf_counter() - start) * 1000:.0f} ms")
+    print()
+
+    days = [datetime(2024, 1, 1) + timedelta(days=rng.randrange(0, 3 * 365)) for _ in range(args.queries)]
+    calendar = EventCalendar(hot_queries=10 ** 9)  # always Mongo
+    print(f"{'view':<6} {'events':>7} {'scan p50':>10} {'mongo p50':>10} {'tree p50':>10} {'tree p95':>10}")
+    for view in ("month", "week", "day"):
+        windows = [calendar_window(view, day) for day in days]
+        for window in windows[:20]:
+            found = tree.overlapping(*window)
+            assert {e["_id"] for e in found} == {e["_id"] for e in scan(events, *window)}, "tree matches the scan"
+            assert all(a["dateTime"] <= b["dateTime"] for a, b in zip(found, found[1:])), "sorted by start"
+        scan_samples, found = timed(lambda s, e: scan(events, s, e), windows[:10])
+        mongo_samples, _ = timed(lambda s, e: calendar.overlapping("bench-user", s, e), windows[:args.mongo_queries])
+        tree_samples, _ = timed(tree.overlapping, windows, repeat=5)
+        print(f"{view:<6} {found:>7.0f} {percentile(scan_samples, 50) * 1000:>8.1f}ms "
+              f"{percentile(mongo_samples, 50) * 1000:>8.1f}ms {percentile(tree_samples, 50) * 1000:>8.3f}ms "
+              f"{percentile(tree_samples, 95) * 1000:>8.3f}ms")
+
+    now = datetime(2025, 6, 15, 12)
+    start = time.perf_counter()
+    total, ongoing, upcoming, past = EventCalendar(hot_queries=1).classify("bench-user", now)
+    cold = time.perf_counter() - start
+    hot_calendar = EventCalendar(hot_queries=1)
+    hot_calendar.classify("bench-user", now)
+    start = time.perf_counter()
+    hot_calendar.classify("bench-user", now)
+    hot = time.perf_counter() - start
+    print()
+    print(f"dashboard classification ({len(ongoing)} ongoing, {len(upcoming)} upcoming, {len(past)} past): "
+          f"{cold * 1000:.0f} ms building the tree, then {hot * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--mongo-queries", type=int, default=5)
+    parser.add_argument("--mongodb-url", default=None)
+    main(parser.parse_args())
@@ -0,0 +1,140 @@
+"""
+GetEventInformation calls of simulated crew runs over seeded events in mongomock.
+
+Every run calls the tool the way the events agent does, several times for the
+same event: by name, again by name, by a leading part of the name and by id.
+Uncached is the tool as it was (name lookup, then one query per collection on
+every call, untrimmed result). Memoized runs the current tool inside
+event_lookups(): one aggregation per event and run, repeated calls served from
+the memo, results trimmed to EVENT_INFO_TOKEN_BUDGET. Prints the per-call
+latency and cache-hit report of one run.
+
+mongomock scans whole collections instead of using indexes, for $lookup too,
+so a single Mongo call costs more than it would against mongod. Compare the
+queries per run: every one is a round trip to the database.
+
+Needs crewai and mongomock.
+
+    cd backend && python -m benchmarks.event_info_tool --events 2000 --runs 100
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+def seed(events: int, menu_items: int):
+    import mongomock
+    from bson import ObjectId
+    from api.database.mongodb import MongoDB
+
+    MongoDB.client = mongomock.MongoClient()
+    MongoDB.db = MongoDB.client["eventflow_db"]
+    names = {}
+    for i in range(events):
+        event_id = ObjectId()
+        names[str(event_id)] = f"Spring Gala {i:05d} Fundraiser"
+        start = datetime(2026, 1, 1) + timedelta(days=i % 365)
+        MongoDB.db.events.insert_one({
+            "_id": event_id, "eventName": names[str(event_id)], "location": "Raleigh, NC",
+            "dateTime": start, "endDate": start + timedelta(hours=6), "attendees": 50 + i % 400,
+            "description": "An evening gala with dinner, a silent auction and live music. " * 4,
+            "sustainable": i % 2 == 0, "userId": "bench-user",
+        })
+        MongoDB.db.event_food.insert_one({
+            "event_id": event_id,
+            "menu_items": [{"name": f"Dish {j}", "type": "main", "dietary": "vegetarian", "status": "planned"}
+                           for j in range(menu_items)],
+            "beverages": [{"name": f"Drink {j}", "category": "soft", "serving": "cup", "status": "planned"}
+                          for j in range(10)],
+            "vendors": [{"name": "Triangle Catering", "type": "catering", "contact": "Sam", "phone": "555",
+                         "status": "booked", "progress": 50}],
+        })
+        for kind in ("food", "alcohol", "fire"):
+            MongoDB.db.licenses.insert_one({
+                "eventId": str(event_id), "name": f"Temporary {kind} permit", "type": kind, "status": "pending",
+                "dueDate": start - timedelta(days=14), "issuingAuthority": "Wake County", "cost": 75.0,
+                "documents": ["Site plan"], "userId": "bench-user",
+            })
+    return names
+
+def uncached_lookup(argument: str) -> str:
+    """The tool as it was: resolve, then one query per collection, on every call"""
+    from bson import ObjectId
+    from api.database.mongodb import MongoDB
+    from api.events_crew.tools.get_event_infromation import event_information
+
+    db = MongoDB.get_db()
+    event = db.events.find_one({"_id": ObjectId(argument)} if ObjectId.is_valid(argument) else {"eventName": argument})
+    if event is None:
+        return f"No event found for '{argument}'."
+    food = MongoDB.client.eventflow_db.event_food.find_one({"event_id": event["_id"]})
+    licenses = list(db.licenses.find({"eventId": str(event["_id"])}))
+    return json.dumps(event_information(event, food, licenses), default=str)
+
+def run_calls(event_id: str, name: str):
+    return [name, name, name.rsplit(" ", 1)[0], event_id, name]
+
+def main(args):
+    from api.events_crew.tools.get_event_infromation import GetEventInformation, estimate_tokens, event_lookups
+
+    names = seed(args.events, args.menu_items)
+    sampled = random.Random(7).sample(list(names.items()), args.runs)
+    tool = GetEventInformation()
+
+    uncached, uncached_tokens, uncached_queries = [], [], 0
+    for event_id, name in sampled:
+        for argument in run_calls(event_id, name):
+            if argument == name.rsplit(" ", 1)[0]:
+                continue  # the old tool only matched exact names
+            start = time.perf_counter()
+            result = uncached_lookup(argument)
+            uncached.append(time.perf_counter() - start)
+            uncached_queries += 3
+            uncached_tokens.append(estimate_tokens(result))
+
+    memoized, memoized_tokens, memoized_queries, hits, calls, report = [], [], 0, 0, 0, None
+    for event_id, name in sampled:
+        with event_lookups(user_id="bench-user") as lookups:
+            for argument in run_calls(event_id, name):
+                tool._run(argument)
+        report = lookups.report()
+        calls += report["calls"]
+        hits += report["cacheHits"]
+        memoized_queries += report["queries"]
+        memoized += [call["ms"] / 1000 for call in report["perCall"]]
+        memoized_tokens += [call["tokens"] for call in report["perCall"]]
+
+    print(f"{args.events} events, {args.runs} runs of {len(run_calls('', 'x'))} tool calls, "
+          f"{args.menu_items} menu items per event")
+    print()
+    print(f"{'tool':<10} {'calls':>6} {'p50':>9} {'p95':>9} {'per run':>10} {'queries/run':>12} "
+          f"{'tokens/call':>12} {'cache hits':>11}")
+    for label, samples, tokens, queries, hit_rate in (
+        ("uncached", uncached, uncached_tokens, uncached_queries, "-"),
+        ("memoized", memoized, memoized_tokens, memoized_queries, f"{hits / calls:.0%}"),
+    ):
+        print(f"{label:<10} {len(samples):>6} {percentile(samples, 50) * 1000:>7.2f}ms "
+              f"{percentile(samples, 95) * 1000:>7.2f}ms {sum(samples) / args.runs * 1000:>8.1f}ms "
+              f"{queries / args.runs:>12.1f} {sum(tokens) / len(tokens):>12.0f} {hit_rate:>11}")
+    print()
+    print("report of the last run:")
+    for call in report["perCall"]:
+        print(f"  {call['argument']!r:<28} {call['source']:<9} {call['queries']} queries "
+              f"{call['ms']:>8.3f} ms {call['tokens']:>6} tokens")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--menu-items", type=int, default=60)
+    args = parser.parse_args()
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    main(args)
@@ -0,0 +1,140 @@
+"""
+Dashboard status counters over 2,000 users in mongomock.
+
+- Stats read: recounting one user's 5k events on every request (what
+  get_dashboard_data did), the indexed recount the drift check runs, and the
+  precomputed `event_stats` point read.
+- Scheduler: a simulated day in 5 minute steps. Each step applies the
+  transitions due from the heap, compared with recounting every user per step.
+  The counters are then checked against a recount for a sample of users, and
+  one user's counters are corrupted to check the drift verification finds it.
+
+mongomock scans for every query, so the Mongo times are high across the board,
+run with --mongodb-url against a mongod for the index plans.
+
+    cd backend && python -m benchmarks.event_stats --users 2000
+"""
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+NOW = datetime(2025, 6, 15, 12)
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+def make_events(user_id: str, count: int, rng: random.Random):
+    from bson import ObjectId
+    events = []
+    for i in range(count):
+        start = NOW + timedelta(minutes=rng.randrange(-180 * 24 * 60, 180 * 24 * 60))
+        duration = timedelta(hours=rng.choice([2, 3, 4, 8])) if rng.random() < 0.9 else timedelta(days=rng.randint(1, 14))
+        event = {"_id": ObjectId(), "userId": user_id, "eventName": f"Event {i}", "dateTime": start,
+                 "location": "Raleigh, NC", "attendees": 100, "description": "", "sustainable": False}
+        # A few old events without an end date, they last one day
+        if rng.random() > 0.02:
+            event["endDate"] = start + duration
+        events.append(event)
+    return events
+
+def scan_stats(db, user_id: str, now: datetime):
+    from api.utils.event_stats import BUCKETS, bucket_at
+    stats = dict.fromkeys(("total", *BUCKETS), 0)
+    for event in db.events.find({"userId": user_id}):
+        stats["total"] += 1
+        stats[bucket_at(event, now)] += 1
+    return stats
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def main(args):
+    import mongomock
+    from pymongo import MongoClient
+    from api.database.mongodb import MongoDB
+    from api.utils.event_stats import BUCKETS, EventStats, bucket_at
+
+    rng = random.Random(7)
+    MongoDB.client = MongoClient(args.mongodb_url) if args.mongodb_url else mongomock.MongoClient()
+    MongoDB.db = MongoDB.client["eventflow_bench_stats"]
+    MongoDB.db.events.drop()
+    MongoDB.db.event_stats.drop()
+    users = [f"user-{i}" for i in range(args.users)]
+    events = make_events("heavy-user", args.heavy_events, rng)
+    for user_id in users:
+        events.extend(make_events(user_id, args.events_per_user, rng))
+    # Counted as EventStats.rebuild would, rebuilding 2,000 users one by one takes long on mongomock
+    counters = {}
+    for event in events:
+        event["statsBucket"] = bucket_at(event, NOW)
+        user = counters.setdefault(event["userId"], {"_id": event["userId"], "total": 0, **dict.fromkeys(BUCKETS, 0)})
+        user["total"] += 1
+        user[event["statsBucket"]] += 1
+    MongoDB.db.events.insert_many(events)
+    MongoDB.db.event_stats.insert_many(list(counters.values()))
+    db = MongoDB.db
+
+    stats = EventStats(horizon_seconds=3600)
+    start = time.perf_counter()
+    stats.rebuild("heavy-user", NOW)
+    print(f"{len(events)} events of {len(users) + 1} users, {args.heavy_events} events of one user "
+          f"counted in {time.perf_counter() - start:.2f} s")
+    print()
+
+    print(f"{'stats read, ' + str(args.heavy_events) + ' events':<28} {'p50':>10} {'p95':>10}")
+    for label, fn, repeat in (
+        ("scan and classify", lambda: scan_stats(db, "heavy-user", NOW), 20),
+        ("indexed recount", lambda: stats.count("heavy-user", NOW), 20),
+        ("event_stats point read", lambda: stats.get("heavy-user"), 200),
+    ):
+        samples = timed(fn, repeat)
+        print(f"{label:<28} {percentile(samples, 50) * 1000:>8.2f}ms {percentile(samples, 95) * 1000:>8.2f}ms")
+    assert stats.get("heavy-user") == scan_stats(db, "heavy-user", NOW)
+
+    step = timedelta(minutes=5)
+    moment, loads, moved, step_samples = NOW, 0, 0, []
+    start = time.perf_counter()
+    while moment < NOW + timedelta(days=1):
+        moment += step
+        step_start = time.perf_counter()
+        if stats._horizon is None or moment >= stats._horizon:
+            stats.load(moment)
+            loads += 1
+        moved += stats.run_due(moment)
+        step_samples.append(time.perf_counter() - step_start)
+    elapsed = time.perf_counter() - start
+    sample = rng.sample(users, 50)
+    full = timed(lambda: [scan_stats(db, user_id, moment) for user_id in sample], 1)[0] * (len(users) + 1) / len(sample)
+    print()
+    print(f"one simulated day, {len(step_samples)} steps: {moved} transitions, {loads} heap loads, {elapsed:.2f} s "
+          f"(p50 {percentile(step_samples, 50) * 1000:.1f} ms, p95 {percentile(step_samples, 95) * 1000:.1f} ms per step)")
+    print(f"recounting every user per step instead: ~{full:.1f} s per step, ~{full * len(step_samples) / 60:.0f} min per day")
+
+    checked = ["heavy-user", *sample]
+    wrong = [user_id for user_id in checked if stats.get(user_id) != scan_stats(db, user_id, moment)]
+    print(f"counters matching a recount after the day: {len(checked) - len(wrong)} of {len(checked)} users checked")
+    assert not wrong, wrong[:5]
+
+    # The first drift check batch, users by id
+    corrupted = sorted(counters)[5]
+    db.event_stats.update_one({"_id": corrupted}, {"$inc": {"upcoming": 2}})
+    start = time.perf_counter()
+    drifted = stats.verify(moment)
+    print(f"drift check of {stats.verify_batch} users: {drifted} drifted and rebuilt in {time.perf_counter() - start:.1f} s")
+    assert drifted == 1 and stats.get(corrupted) == scan_stats(db, corrupted, moment)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--events-per-user", type=int, default=10)
+    parser.add_argument("--heavy-events", type=int, default=5000)
+    parser.add_argument("--mongodb-url", default=None)
+    main(parser.parse_args())
@@ -0,0 +1,121 @@
+"""
+Throughput of batch event insights (EventsCrew over many events) against the
+fake LLM, with seeded events, food plans and licenses in mongomock.
+
+One at a time is what was possible before: build the crew, kick it off, next
+event, with the tool reading Mongo on every call. It runs on a sample and is
+extrapolated. The batch runs every event through run_batch (crew built once,
+prefetch, bounded concurrency) and writes the NDJSON stream to a file.
+
+Needs crewai, litellm and mongomock.
+
+    cd backend && python -m benchmarks.events_crew_batch --events 1000 --concurrency 16
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import math
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+def seed(events: int):
+    import mongomock
+    from bson import ObjectId
+    from api.database.mongodb import MongoDB
+
+    MongoDB.client = mongomock.MongoClient()
+    MongoDB.db = MongoDB.client["eventflow_db"]
+    ids = []
+    for i in range(events):
+        event_id = ObjectId()
+        ids.append(str(event_id))
+        start = datetime(2026, 1, 1) + timedelta(days=i % 365)
+        MongoDB.db.events.insert_one({
+            "_id": event_id, "eventName": f"Product Launch {i}", "location": "Raleigh, NC",
+            "dateTime": start, "endDate": start + timedelta(hours=6), "attendees": 50 + i % 400,
+            "description": "Launch event with demos and a catered lunch", "sustainable": i % 2 == 0,
+            "userId": "bench-user",
+        })
+        MongoDB.client.eventflow_db.event_food.insert_one({
+            "event_id": event_id,
+            "menu_items": [{"name": f"Dish {j}", "type": "main", "dietary": "vegetarian", "status": "planned"} for j in range(5)],
+            "beverages": [{"name": "Lemonade", "category": "soft", "serving": "cup", "status": "planned"}],
+            "vendors": [{"name": "Triangle Catering", "type": "catering", "contact": "Sam", "phone": "555", "status": "booked", "progress": 50}],
+        })
+        MongoDB.db.licenses.insert_one({
+            "eventId": str(event_id), "name": "Temporary Food Permit", "type": "food", "status": "pending",
+            "dueDate": start - timedelta(days=14), "issuingAuthority": "Wake County", "cost": 75.0,
+            "documents": ["Site plan"], "userId": "bench-user",
+        })
+    return ids
+
+async def one_at_a_time(event_ids):
+    from bson import ObjectId
+    from api.database.mongodb import MongoDB
+    from api.events_crew.crew import EventsCrew
+
+    durations = []
+    for event_id in event_ids:
+        start = time.perf_counter()
+        event = MongoDB.db.events.find_one({"_id": ObjectId(event_id)})
+        await EventsCrew().crew().kickoff_async(inputs={"event_id": event_id, "event_name": event["eventName"], "user_id": "bench-user"})
+        durations.append(time.perf_counter() - start)
+    return durations
+
+async def batch(event_ids, concurrency: int, path: str):
+    from api.events_crew.batch import ndjson_lines, run_batch
+
+    start = time.perf_counter()
+    first_line, lines, failures = None, 0, 0
+    with open(path, "w") as out:
+        async for line in ndjson_lines(run_batch(event_ids, concurrency, "bench-user")):
+            out.write(line)
+            lines += 1
+            # The fake LLM answers from the tool's observation, so a miss shows up in the insight
+            failures += '"success": false' in line or "No event found" in line
+            if first_line is None:
+                first_line = time.perf_counter() - start
+    return time.perf_counter() - start, first_line, lines, failures
+
+async def main(args):
+    event_ids = seed(args.events)
+    from api.events_crew.batch import run_batch  # noqa: F401, sets up logging before it is quietened
+    for name in ("LiteLLM", "httpx", "httpx2"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    sample = event_ids[:args.sample]
+    quiet = io.StringIO()
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(quiet):
+        sequential = await one_at_a_time(sample)
+        wall, first_line, lines, failures = await batch(event_ids, args.concurrency, os.path.join(tmp, "insights.ndjson"))
+
+    per_event = sum(sequential) / len(sequential)
+    print(f"{args.events} events, fake LLM {args.llm_latency_ms:.0f} ms per call (two calls per event)")
+    print()
+    print(f"one at a time ({len(sample)} sampled): {per_event * 1000:.0f} ms per event, p95 "
+          f"{percentile(sequential, 95) * 1000:.0f} ms, {1 / per_event:.1f} events/s, "
+          f"{args.events} events in ~{per_event * args.events:.0f} s")
+    print(f"batch, concurrency {args.concurrency}: {lines} NDJSON lines ({failures} failed) in {wall:.1f} s, "
+          f"{lines / wall:.1f} events/s, first line after {first_line:.2f} s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--sample", type=int, default=25)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    args = parser.parse_args()
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    from .loadtest.fake_llm import FakeOpenAIServer
+    with FakeOpenAIServer(latency_ms=args.llm_latency_ms) as server:
+        os.environ["OPENAI_API_BASE"] = server.base_url
+        os.environ["OPENAI_API_KEY"] = "sk-fake"
+        asyncio.run(main(args))
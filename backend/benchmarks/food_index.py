@@ -0,0 +1,103 @@
+"""
+Benchmark of the local food catalog index at catalog sizes well beyond the
+curated one.
+
+Synthesizes N dishes by recombining the curated catalog with cooking styles and
+extra ingredients, builds the memory-mapped index into a temporary directory and
+replays a query mix of filter-only, filter + free text and free text queries.
+Reports build time, index size, latency percentiles per query kind and the hit
+rate (queries answered without the LLM).
+
+    cd backend && python -m benchmarks.food_index --items 100000
+"""
+import os
+import math
+import time
+import random
+import argparse
+import tempfile
+from api.langgraph.food_agent.catalog import FoodCatalogIndex, load_catalog_items, food_index_lookups
+
+STYLES = ["smoked", "roasted", "grilled", "braised", "spiced", "crispy", "slow-cooked", "charred", "herbed", "glazed"]
+EXTRAS = ["garlic", "lemon", "chili", "ginger", "saffron", "truffle", "basil", "sesame", "honey", "mint", "pistachio", "coconut"]
+
+QUERIES = {
+    "filter": [
+        "3 vegan desserts", "vegetarian mains", "gluten-free starters", "dairy-free desserts",
+        "vegan indian mains", "gluten-free italian dishes",
+    ],
+    "filter+text": [
+        "vegetarian mains with mushroom", "chocolate desserts", "vegan curry mains",
+        "gluten-free grilled chicken mains", "lemon desserts", "spicy vegetarian starters",
+    ],
+    "text": [
+        "mushroom risotto", "grilled salmon", "chickpea curry", "sushi platter",
+        "quantum physics lecture", "tacos al pastor",
+    ],
+}
+
+def synthesize(base, count: int, rng: random.Random):
+    items = list(base)
+    while len(items) < count:
+        item = rng.choice(base)
+        style, extra = rng.choice(STYLES), rng.choice(EXTRAS)
+        items.append({
+            **item,
+            "name": f"{style.capitalize()} {item['name']} with {extra}",
+            "description": f"{item.get('description', '')} {style} with {extra}",
+        })
+    return items[:count]
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def run(count: int, repeats: int, seed: int):
+    rng = random.Random(seed)
+    items = synthesize(load_catalog_items(), count, rng)
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        start = time.perf_counter()
+        FoodCatalogIndex.build(items, index_dir)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = FoodCatalogIndex.open(index_dir)
+        open_seconds = time.perf_counter() - start
+
+        print(f"catalog entries:  {len(index):,}")
+        print(f"build:            {build_seconds:.1f}s, index {dir_size(index_dir) / 1e6:.1f} MB on disk")
+        print(f"open (mmap):      {open_seconds * 1000:.1f} ms")
+        print()
+        print(f"{'queries':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'hit rate':>9}")
+
+        total_hits = total = 0
+        for kind, queries in QUERIES.items():
+            latencies, hits = [], 0
+            for _ in range(repeats):
+                for query in queries:
+                    start = time.perf_counter()
+                    result = index.search(query)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    hits += result is not None
+            total_hits += hits
+            total += len(latencies)
+            print(
+                f"{kind:<12} {percentile(latencies, 50):>8.2f} {percentile(latencies, 95):>8.2f} "
+                f"{percentile(latencies, 99):>8.2f} {hits / len(latencies):>9.0%}"
+            )
+        print()
+        print(f"overall hit rate: {total_hits / total:.0%} ({int(food_index_lookups.value(outcome='hit'))} hits, "
+              f"{int(food_index_lookups.value(outcome='miss'))} misses fall back to the LLM)")
+        del index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    run(args.items, args.repeats, args.seed)
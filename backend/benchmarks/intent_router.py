@@ -0,0 +1,123 @@
+"""
+Benchmark of the intent fast path in front of chat_node.
+
+Runs a labelled set of first-turn requests through the real food and license
+graphs, against the fake OpenAI server from the load test (fixed latency per
+call) and mongomock, with INTENT_ROUTER_MODE off, shadow and active. Reports
+LLM calls and latency per turn for each mode, plus the classifier's coverage
+and precision on the labelled set. Shadow agreement here is measured against
+the fake server's keyword tool picker, not gpt-4o.
+
+    cd backend && python -m benchmarks.intent_router --llm-latency-ms 400
+"""
+import argparse
+import asyncio
+import math
+import time
+import uuid
+from .loadtest.__main__ import configure_environment
+from .loadtest.fake_llm import FakeOpenAIServer
+
+# (agent, request, tool a careful chat_node would pick, None for a plain answer)
+LABELLED = [
+    ("food", "Find vegetarian main dishes for a summer conference lunch", "search_for_food"),
+    ("food", "Suggest 3 vegan desserts", "search_for_food"),
+    ("food", "What should we serve for dinner on day two?", "search_for_food"),
+    ("food", "I need gluten-free starters for 80 guests", "search_for_food"),
+    ("food", "Recommend some Indian mains", "search_for_food"),
+    ("food", "summarize my menu", "search_for_summary"),
+    ("food", "Give me an overview of the food we have so far", "search_for_summary"),
+    ("food", "Show me a breakdown of the menu by dietary type", "search_for_summary"),
+    ("food", "Add the mushroom risotto to my menu", "add_foods"),
+    ("food", "hi there", None),
+    ("license", "Which permits do I need to serve food at a festival in Raleigh?", "search_for_licenses"),
+    ("license", "What licenses are required for an outdoor concert in Durham, NC", "search_for_licenses"),
+    ("license", "Find the alcohol license for the City of Austin", "search_for_licenses"),
+    ("license", "Do I need a noise permit for a DJ in Chapel Hill?", "search_for_licenses"),
+    ("license", "Update the status of my food permit to submitted", None),
+    ("license", "thanks!", None),
+]
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+def seed_menu():
+    from bson import ObjectId
+    from api.database.mongodb import MongoDB
+    MongoDB.connect_db()
+    # summary_node reads this fixed event
+    MongoDB.client.eventflow_db.event_food.insert_one({
+        "event_id": ObjectId("67e744630b536e26e3fd3976"),
+        "menu_items": [
+            {"name": "Mushroom Risotto", "type": "main", "dietary": "vegetarian"},
+            {"name": "Bruschetta", "type": "starter", "dietary": "vegan"},
+            {"name": "Tiramisu", "type": "dessert", "dietary": "vegetarian"},
+        ],
+    })
+
+async def run_mode(mode: str, graphs: dict, routers: dict, server: FakeOpenAIServer, repeats: int):
+    from langchain_core.messages import HumanMessage
+    for router in routers.values():
+        router.mode = mode
+        router.stats.clear()
+    latencies, calls = [], []
+    for _ in range(repeats):
+        for agent, text, _ in LABELLED:
+            config = {"configurable": {"thread_id": str(uuid.uuid4())}, "recursion_limit": 25}
+            before = server.request_count
+            start = time.perf_counter()
+            await graphs[agent].ainvoke({"messages": [HumanMessage(content=text)]}, config)
+            latencies.append(time.perf_counter() - start)
+            calls.append(server.request_count - before)
+    return latencies, calls
+
+def classifier_report(routers: dict):
+    dispatched = correct = 0
+    start = time.perf_counter()
+    for agent, text, expected in LABELLED:
+        router = routers[agent]
+        tool, _, confidence = router.classify(text)
+        if tool is not None and confidence >= router.min_confidence:
+            dispatched += 1
+            correct += tool == expected
+    per_call = (time.perf_counter() - start) / len(LABELLED)
+    print(f"classifier:        {dispatched}/{len(LABELLED)} requests dispatched locally, "
+          f"{correct}/{dispatched} with the expected tool, {per_call * 1e6:.0f} us per request")
+
+async def main(args):
+    with FakeOpenAIServer(latency_ms=args.llm_latency_ms) as server:
+        configure_environment(argparse.Namespace(database="eventflow_bench", mongo_url=None), server.base_url)
+        from api.langgraph.food_agent.agent import graph as food_graph
+        from api.langgraph.food_agent.intents import intent_router as food_router
+        from api.langgraph.license_agent.agent import graph as license_graph
+        from api.langgraph.license_agent.intents import intent_router as license_router
+        seed_menu()
+        graphs = {"food": food_graph, "license": license_graph}
+        routers = {"food": food_router, "license": license_router}
+
+        classifier_report(routers)
+        print(f"fake LLM latency:  {args.llm_latency_ms:.0f} ms per call, {len(LABELLED) * args.repeats} turns per mode")
+        print()
+        print(f"{'mode':<8} {'LLM calls/turn':>15} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+        results = {}
+        for mode in ("off", "shadow", "active"):
+            latencies, calls = await run_mode(mode, graphs, routers, server, args.repeats)
+            results[mode] = sum(latencies) / len(latencies)
+            print(f"{mode:<8} {sum(calls) / len(calls):>15.2f} {percentile(latencies, 50) * 1000:>8.0f} "
+                  f"{percentile(latencies, 95) * 1000:>8.0f} {results[mode] * 1000:>8.0f}")
+            if mode == "shadow":
+                shadow = {agent: router.agreement() for agent, router in routers.items()}
+        print()
+        for agent, stats in shadow.items():
+            agreement = stats["confident_agreement"]
+            print(f"shadow {agent:<8} {stats['confident']}/{stats['turns']} turns confident, "
+                  f"agreement with chat_node {agreement:.0%}" if agreement is not None else f"shadow {agent}: no confident turns")
+        saved = results["off"] - results["active"]
+        print(f"\nsaved per turn:    {saved * 1000:.0f} ms on average ({saved / results['off']:.0%})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency-ms", type=float, default=400)
+    parser.add_argument("--repeats", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,155 @@
+"""
+License due date reminders over 20k licenses of 2,000 users.
+
+- Polling: read every open license each minute and pick the ones with a
+  reminder due, what a cron job without the index would do.
+- Engine: loading the timer wheel from the (status, dueDate) index, then a
+  simulated day in one-minute steps: reminders claimed, digests and batches
+  written, cost per step. Every reminder is checked to go out exactly once,
+  also when a second worker runs the same day.
+- Due soon: one user's open licenses due within a week, from the
+  (userId, status, dueDate) index vs reading all of them.
+- The timer wheel alone with 1M reminders.
+
+mongomock scans for every query, claims included, so Mongo times grow with
+the collection. For the index plans, and 1M licenses, run against a mongod:
+
+    cd backend && python -m benchmarks.license_reminders --licenses 1000000 --mongodb-url mongodb://localhost:27017
+"""
+import argparse
+import logging
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+NOW = datetime(2025, 6, 15, 12)
+STATUSES = ["pending"] * 5 + ["missing"] * 2 + ["approved"] * 2 + ["rejected"]
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+def seed(db, count: int, users: int, rng: random.Random):
+    from bson import ObjectId
+    licenses = []
+    for i in range(count):
+        licenses.append({
+            "_id": ObjectId(), "userId": f"user-{i % users}", "eventId": str(ObjectId()),
+            "name": f"Permit {i}", "type": "Special Event Permit", "status": rng.choice(STATUSES),
+            "dueDate": NOW + timedelta(seconds=rng.randrange(-180 * 86400, 180 * 86400)),
+            "issuingAuthority": "Fire Marshal", "cost": 100.0, "documents": [],
+        })
+    for start in range(0, count, 50000):
+        db.licenses.insert_many(licenses[start:start + 50000])
+    return licenses
+
+def expected_reminders(licenses, engine, start: datetime, end: datetime):
+    """(license id, lead) of every reminder firing in [start, end)"""
+    from api.utils.license_reminders import fire_time
+    expected = set()
+    for license in licenses:
+        if license["status"] not in engine.statuses:
+            continue
+        leads = [lead for lead in engine.lead_days if start <= fire_time(license["dueDate"], lead) < end]
+        for lead in leads:
+            expected.add((license["_id"], lead))
+    return expected
+
+def simulate_day(engine, steps: int):
+    moment, sent, loads, samples = NOW, 0, 0, []
+    for _ in range(steps):
+        moment += timedelta(minutes=1)
+        start = time.perf_counter()
+        if engine._wheel is None or moment >= engine._loaded_until - engine.horizon / 2:
+            engine.load(moment)
+            loads += 1
+        sent += engine.run_due(moment)
+        samples.append(time.perf_counter() - start)
+    return sent, loads, samples
+
+def main(args):
+    import mongomock
+    from pymongo import MongoClient
+    from api.database.mongodb import MongoDB
+    from api.utils.license_reminders import LicenseReminders, TimerWheel, fire_time
+
+    logging.getLogger("api.utils.logger").setLevel(logging.WARNING)
+    rng = random.Random(3)
+    MongoDB.client = MongoClient(args.mongodb_url) if args.mongodb_url else mongomock.MongoClient()
+    MongoDB.db = db = MongoDB.client["eventflow_bench_reminders"]
+    db.licenses.drop()
+    db.license_reminders.drop()
+    start = time.perf_counter()
+    licenses = seed(db, args.licenses, args.users, rng)
+    engine = LicenseReminders()
+    engine._db()
+    print(f"{args.licenses} licenses of {args.users} users seeded in {time.perf_counter() - start:.1f} s, "
+          f"reminders at {engine.lead_days} days before due")
+    print()
+
+    start = time.perf_counter()
+    polled = list(db.licenses.find({"status": {"$in": engine.statuses}}, {"status": 1, "dueDate": 1, "reminded": 1}))
+    due = [l for l in polled if any(NOW <= fire_time(l["dueDate"], lead) < NOW + timedelta(minutes=1) for lead in engine.lead_days)]
+    poll = time.perf_counter() - start
+    print(f"polling: {len(polled)} open licenses read per minute for {len(due)} reminders, {poll * 1000:.0f} ms per poll")
+
+    start = time.perf_counter()
+    scheduled = engine.load(NOW)
+    print(f"timer wheel load: {scheduled} reminders for the next {engine.horizon}, {(time.perf_counter() - start) * 1000:.0f} ms")
+    if args.mongodb_url:
+        lead = engine.lead_days[0]
+        plan = db.licenses.find({"status": {"$in": engine.statuses}, "dueDate": {
+            "$gte": NOW + timedelta(days=lead), "$lt": NOW + engine.horizon + timedelta(days=lead)}}).explain()
+        stats = plan.get("executionStats", {})
+        print(f"  load query plan: {stats.get('totalKeysExamined')} keys and {stats.get('totalDocsExamined')} documents "
+              f"examined for {stats.get('nReturned')} returned")
+    engine._wheel = None
+
+    sent, loads, samples = simulate_day(engine, args.minutes)
+    end = NOW + timedelta(minutes=args.minutes)
+    claimed = {(doc["licenseId"], doc["leadDays"]) for digest in db.license_reminders.find() for doc in digest["licenses"]}
+    digests = db.license_reminders.count_documents({})
+    # The first load also sends what fired in the hour before, missed while no worker ran
+    caught_up = NOW + timedelta(minutes=1) - engine.horizon
+    expected = {(str(license_id), lead) for license_id, lead in expected_reminders(licenses, engine, caught_up, end)}
+    print(f"simulated {args.minutes} minutes: {sent} reminders in {digests} digests, {loads} wheel loads, "
+          f"step p50 {percentile(samples, 50) * 1000:.2f} ms, p99 {percentile(samples, 99) * 1000:.1f} ms, "
+          f"{sum(samples):.1f} s in total")
+    assert claimed == expected and sent == len(expected), (len(claimed), len(expected))
+
+    second, _, _ = simulate_day(LicenseReminders(), args.minutes)
+    print(f"a second worker over the same minutes: {second} reminders sent again")
+    assert second == 0
+
+    user_id = "user-7"
+    samples = []
+    for _ in range(20):
+        start = time.perf_counter()
+        soon = engine.due_soon(user_id, NOW + timedelta(days=7), 50)
+        samples.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    everything = list(db.licenses.find({"userId": user_id}))
+    read_all = time.perf_counter() - start
+    print()
+    print(f"due soon for one user: {len(soon)} licenses, p50 {percentile(samples, 50) * 1000:.1f} ms, "
+          f"vs {read_all * 1000:.1f} ms to read all {len(everything)} of their licenses")
+
+    wheel = TimerWheel(NOW, timedelta(minutes=1), 61)
+    times = [NOW + timedelta(seconds=rng.random() * 3600) for _ in range(1000000)]
+    start = time.perf_counter()
+    for i, when in enumerate(times):
+        wheel.add(when, i)
+    added = time.perf_counter() - start
+    start = time.perf_counter()
+    popped = sum(len(wheel.pop_due(NOW + timedelta(minutes=minute))) for minute in range(61))
+    print(f"timer wheel with 1M reminders: add {added * 1e3:.0f} ns, pop {(time.perf_counter() - start) * 1e3:.0f} ns "
+          f"per reminder, {popped} popped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--licenses", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--minutes", type=int, default=1440)
+    parser.add_argument("--mongodb-url", default=None)
+    main(parser.parse_args())
@@ -0,0 +1,210 @@
+"""
+Offline load test of the whole API.
+
+Starts the deterministic fake OpenAI server, points the agents at it, runs the
+FastAPI app from api/index.py under uvicorn against mongomock (default) or a
+real mongod, then drives a weighted scenario mix with concurrent virtual users.
+Prints throughput and latency percentiles per endpoint and compares them with
+a stored baseline.
+
+    cd backend
+    python -m benchmarks.loadtest --mix default --users 20 --duration 30
+    python -m benchmarks.loadtest --mongo-url mongodb://localhost:27017 --save-baseline
+    python -m benchmarks.loadtest --llm-latency-ms 300 --mix agent
+
+Exits with status 1 when an endpoint regresses past --threshold.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from .fake_llm import FakeOpenAIServer
+from .scenarios import MIXES, SCENARIOS, Recorder, VirtualUser
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def configure_environment(args, llm_base_url: str):
+    """Must run before api.index is imported: the agents build their LLM clients at import time"""
+    os.environ["OPENAI_BASE_URL"] = llm_base_url
+    os.environ["OPENAI_API_BASE"] = llm_base_url
+    os.environ["OPENAI_API_KEY"] = "sk-loadtest"
+    os.environ["DATABASE_NAME"] = args.database
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Measure the API itself, not the per-user rate limits (override to load-test the limiter)
+    os.environ.setdefault("RATE_LIMIT_RULES", "")
+    if args.mongo_url:
+        os.environ["MONGODB_URL"] = args.mongo_url
+        return
+    import mongomock
+    from api.database import mongodb
+    mongodb.MongoClient = mongomock.MongoClient
+
+def start_app(port: int):
+    import uvicorn
+    from api.index import app
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 30
+    while not server.started:
+        if time.time() > deadline or not thread.is_alive():
+            raise RuntimeError("API server failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+async def run_load(args, base_url: str) -> tuple:
+    import httpx
+    recorder = Recorder()
+    weights = MIXES[args.mix]
+    names = list(weights)
+    limits = httpx.Limits(max_connections=args.users * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        users = [
+            VirtualUser(client, recorder, f"loadtest-{args.seed}-{i}@example.com", "loadtest-password")
+            for i in range(args.users)
+        ]
+        await asyncio.gather(*(user.setup() for user in users))
+        # Setup traffic (signup, first login, event creation) is not part of the measurement
+        recorder.samples.clear()
+        recorder.errors.clear()
+
+        deadline = time.perf_counter() + args.duration
+
+        async def worker(index: int, user: VirtualUser):
+            rng = random.Random(args.seed * 1000 + index)
+            iterations = 0
+            while time.perf_counter() < deadline and (not args.iterations or iterations < args.iterations):
+                scenario = rng.choices(names, weights=[weights[n] for n in names])[0]
+                await SCENARIOS[scenario](user)
+                iterations += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i, user) for i, user in enumerate(users)))
+        elapsed = time.perf_counter() - start
+    return recorder, elapsed
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    endpoints = {}
+    for endpoint, samples in sorted(recorder.samples.items()):
+        ordered = sorted(samples)
+        endpoints[endpoint] = {
+            "count": len(ordered),
+            "errors": recorder.errors.get(endpoint, 0),
+            "rps": len(ordered) / elapsed,
+            "p50_ms": 1000 * percentile(ordered, 0.50),
+            "p90_ms": 1000 * percentile(ordered, 0.90),
+            "p95_ms": 1000 * percentile(ordered, 0.95),
+            "p99_ms": 1000 * percentile(ordered, 0.99),
+            "max_ms": 1000 * ordered[-1],
+        }
+    total = sum(e["count"] for e in endpoints.values())
+    return {
+        "elapsed_s": elapsed,
+        "requests": total,
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "rps": total / elapsed if elapsed else 0,
+        "endpoints": endpoints,
+    }
+
+def print_report(summary: dict):
+    print(f"\n{'endpoint':<48} {'count':>6} {'err':>4} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for endpoint, e in summary["endpoints"].items():
+        print(
+            f"{endpoint:<48} {e['count']:>6} {e['errors']:>4} {e['rps']:>7.1f} "
+            f"{e['p50_ms']:>8.1f} {e['p95_ms']:>8.1f} {e['p99_ms']:>8.1f} {e['max_ms']:>8.1f}"
+        )
+    print(f"\ntotal: {summary['requests']} requests, {summary['errors']} errors, "
+          f"{summary['rps']:.1f} req/s over {summary['elapsed_s']:.1f}s")
+
+def compare_with_baseline(summary: dict, baseline: dict, threshold: float) -> list:
+    """Endpoints whose p95 latency grew, or throughput dropped, by more than `threshold`"""
+    regressions = []
+    for endpoint, current in summary["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous:
+            continue
+        if previous["p95_ms"] > 0 and current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{endpoint}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms")
+        if previous["rps"] > 0 and current["rps"] < previous["rps"] * (1 - threshold):
+            regressions.append(f"{endpoint}: throughput {previous['rps']:.1f} -> {current['rps']:.1f} req/s")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="default")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of measured load")
+    parser.add_argument("--iterations", type=int, default=0, help="stop each user after N scenarios (0 = duration only)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--llm-latency-ms", type=float, default=0, help="fake LLM time to first byte")
+    parser.add_argument("--llm-token-delay-ms", type=float, default=0, help="fake LLM delay between stream chunks")
+    parser.add_argument("--mongo-url", default=None, help="use a real mongod instead of mongomock")
+    parser.add_argument("--database", default="eventflow_db")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--json", dest="json_output", default=None, help="also write the summary to this file")
+    args = parser.parse_args()
+
+    llm = FakeOpenAIServer(latency_ms=args.llm_latency_ms, token_delay_ms=args.llm_token_delay_ms).start()
+    configure_environment(args, llm.base_url)
+    port = _free_port()
+    server, thread = start_app(port)
+    try:
+        recorder, elapsed = asyncio.run(run_load(args, f"http://127.0.0.1:{port}"))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        llm.stop()
+
+    summary = summarize(recorder, elapsed)
+    summary["config"] = {"mix": args.mix, "users": args.users, "llm_latency_ms": args.llm_latency_ms,
+                         "mongo": "mongod" if args.mongo_url else "mongomock", "llm_requests": llm.request_count}
+    print_report(summary)
+
+    if args.json_output:
+        with open(args.json_output, "w") as f:
+            json.dump(summary, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline stored yet, run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("config", {}).get("mix") != args.mix:
+        print(f"Baseline was recorded with mix {baseline.get('config', {}).get('mix')!r}, comparison may be meaningless")
+    regressions = compare_with_baseline(summary, baseline, args.threshold)
+    if regressions:
+        print(f"\nRegressions beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+Deterministic fake OpenAI-compatible chat completions server.
+
+Answers /v1/chat/completions (streaming and non-streaming) the way the agents
+expect, without network access:
+- structured output requests (forced FoodList / LicenseList tool, or a
+  json_schema response_format) get a generated list derived from the query
+- the first chat_node call of a turn gets a tool call picked from the offered
+  tools by keyword (summary -> search_for_summary, license/permit -> search_for_licenses)
+- a call whose last message is a tool result gets a short text reply
+- crewAI agents (ReAct prompt) get one Action with the first listed tool,
+  then a Final Answer built from its observation
+
+Responses only depend on the request body, so runs are reproducible.
+
+    python -m benchmarks.loadtest.fake_llm --port 8001 --latency-ms 200
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DISH_TYPES = ["main", "starter", "dessert"]
+DIETARY = ["vegetarian", "vegan", "gluten-free", "dairy-free"]
+
+def _digest(payload) -> str:
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+def _words(query: str):
+    words = [w.strip(".,!?").capitalize() for w in query.split() if len(w) > 3]
+    return words or ["House"]
+
+def food_list(query: str, count: int = 5) -> dict:
+    words = _words(query)
+    return {"items": [
+        {
+            "name": f"{words[i % len(words)]} Special {i + 1}",
+            "type": DISH_TYPES[i % len(DISH_TYPES)],
+            "dietary": DIETARY[i % len(DIETARY)],
+        }
+        for i in range(count)
+    ]}
+
+def license_list(query: str, count: int = 3) -> dict:
+    words = _words(query)
+    return {"items": [
+        {
+            "name": f"{words[i % len(words)]} Permit {i + 1}",
+            "issuing_authority": f"{words[0]} County Permits Office",
+            "cost": 50.0 * (i + 1),
+            "required_documents": ["Site plan", "Certificate of insurance"],
+            "notes": f"Apply at least {2 * (i + 1)} weeks before the event.",
+        }
+        for i in range(count)
+    ]}
+
+STRUCTURED_GENERATORS = {
+    "FoodList": food_list,
+    "LicenseList": license_list,
+}
+
+def _last_user_text(messages) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return _message_text(message)
+    return ""
+
+def react_step(system: str, messages) -> str:
+    """Call the first tool once with the quoted name from the task, then answer from its observation"""
+    transcript = "\n".join(_message_text(message) for message in messages[1:])
+    observation = transcript.rpartition("Observation:")[2].strip() if "Observation:" in transcript else None
+    if observation is not None:
+        return f"Thought: I now know the final answer\nFinal Answer: Summary of the event: {observation[:300]}"
+    tool = re.search(r"Tool Name: (\S+)", system)
+    subject = re.search(r'"([^"]+)"', transcript)
+    argument = subject.group(1) if subject else _last_user_text(messages)[:80]
+    return (f"Thought: I should look this up\nAction: {tool.group(1) if tool else 'unknown'}\n"
+            f"Action Input: {json.dumps({'argument': argument})}")
+
+def plan_response(body: dict) -> dict:
+    """Decide the assistant message: {"content": str} or {"tool_call": (name, args)}"""
+    messages = body.get("messages", [])
+    query = _last_user_text(messages)
+
+    # Structured output through a forced tool call
+    tool_choice = body.get("tool_choice")
+    if isinstance(tool_choice, dict):
+        name = tool_choice.get("function", {}).get("name")
+        if name in STRUCTURED_GENERATORS:
+            return {"tool_call": (name, STRUCTURED_GENERATORS[name](query))}
+
+    # Structured output through response_format=json_schema
+    response_format = body.get("response_format") or {}
+    schema_name = (response_format.get("json_schema") or {}).get("name")
+    if schema_name in STRUCTURED_GENERATORS:
+        return {"content": json.dumps(STRUCTURED_GENERATORS[schema_name](query))}
+
+    # crewAI agents: tools described in the prompt, ReAct text instead of tool calls
+    system = _message_text(messages[0]) if messages and messages[0].get("role") == "system" else ""
+    if "Action Input:" in system and "Final Answer:" in system:
+        return {"content": react_step(system, messages)}
+
+    if messages and messages[-1].get("role") == "tool":
+        return {"content": "Done! Let me know if you want to add these to your event."}
+
+    offered = {tool.get("function", {}).get("name") for tool in body.get("tools") or []}
+    lowered = query.lower()
+    if "search_for_summary" in offered and "summar" in lowered:
+        return {"tool_call": ("search_for_summary", {})}
+    if "search_for_licenses" in offered and ("license" in lowered or "permit" in lowered):
+        return {"tool_call": ("search_for_licenses", {"query": query})}
+    if "search_for_food" in offered:
+        return {"tool_call": ("search_for_food", {"query": query})}
+    if "get_weather" in offered and "weather" in lowered:
+        return {"tool_call": ("get_weather", {"location": "Raleigh, NC"})}
+    return {"content": f"Sure, here is some help with: {query[:80]}"}
+
+def _usage(body: dict, completion: str) -> dict:
+    prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+    completion_tokens = max(1, len(completion) // 4)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    server_version = "FakeOpenAI/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json({"object": "list", "data": [{"id": "gpt-4o", "object": "model"}]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with self.server.count_lock:
+            self.server.request_count += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        plan = plan_response(body)
+        completion_id = "chatcmpl-" + _digest(body)[:24]
+        model = body.get("model", "gpt-4o")
+        if body.get("stream"):
+            self._stream(body, plan, completion_id, model)
+        else:
+            self._send_json(self._completion(body, plan, completion_id, model))
+
+    def _completion(self, body, plan, completion_id, model):
+        message = {"role": "assistant", "content": plan.get("content")}
+        finish_reason = "stop"
+        completion = plan.get("content") or ""
+        if "tool_call" in plan:
+            name, args = plan["tool_call"]
+            arguments = json.dumps(args)
+            message["tool_calls"] = [{
+                "id": "call_" + completion_id[-16:],
+                "type": "function",
+                "function": {"name": name, "arguments": arguments},
+            }]
+            finish_reason = "tool_calls"
+            completion = arguments
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": 0,
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": _usage(body, completion),
+        }
+
+    def _stream(self, body, plan, completion_id, model):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def chunk(delta, finish_reason=None):
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        events = [chunk({"role": "assistant", "content": ""})]
+        if "tool_call" in plan:
+            name, args = plan["tool_call"]
+            arguments = json.dumps(args)
+            events.append(chunk({"tool_calls": [{
+                "index": 0, "id": "call_" + completion_id[-16:], "type": "function",
+                "function": {"name": name, "arguments": ""},
+            }]}))
+            for i in range(0, len(arguments), self.server.chunk_size):
+                events.append(chunk({"tool_calls": [{
+                    "index": 0, "function": {"arguments": arguments[i:i + self.server.chunk_size]},
+                }]}))
+            events.append(chunk({}, "tool_calls"))
+            completion = arguments
+        else:
+            content = plan["content"]
+            for i in range(0, len(content), self.server.chunk_size):
+                events.append(chunk({"content": content[i:i + self.server.chunk_size]}))
+            events.append(chunk({}, "stop"))
+            completion = content
+        if (body.get("stream_options") or {}).get("include_usage"):
+            events.append({
+                "id": completion_id, "object": "chat.completion.chunk", "created": 0,
+                "model": model, "choices": [], "usage": _usage(body, completion),
+            })
+
+        for event in events:
+            if self.server.token_delay:
+                time.sleep(self.server.token_delay)
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _send_json(self, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class FakeOpenAIServer:
+    """Runs the fake server in a background thread; `base_url` ends in /v1"""
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0,
+                 token_delay_ms: float = 0, chunk_size: int = 16):
+        self.httpd = ThreadingHTTPServer((host, port), FakeOpenAIHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency_ms / 1000
+        self.httpd.token_delay = token_delay_ms / 1000
+        self.httpd.chunk_size = chunk_size
+        self.httpd.request_count = 0
+        self.httpd.count_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def request_count(self) -> int:
+        return self.httpd.request_count
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deterministic fake OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--token-delay-ms", type=float, default=0)
+    args = parser.parse_args()
+    server = FakeOpenAIServer(args.host, args.port, args.latency_ms, args.token_delay_ms)
+    print(f"Fake OpenAI server listening on {server.base_url}")
+    server.httpd.serve_forever()
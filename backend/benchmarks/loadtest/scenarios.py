@@ -0,0 +1,166 @@
+"""
+Virtual user scenarios for the load test. Each scenario is a short sequence of
+requests a planner would make; every request is timed under a stable
+endpoint label (path templates, not ids).
+"""
+import time
+import uuid
+from datetime import datetime, timedelta
+
+class Recorder:
+    """Collects (endpoint, seconds, ok) samples"""
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        self.samples.setdefault(endpoint, []).append(seconds)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+class VirtualUser:
+    """One signed-up planner with a token and an event of their own"""
+    def __init__(self, client, recorder: Recorder, email: str, password: str):
+        self.client = client
+        self.recorder = recorder
+        self.email = email
+        self.password = password
+        self.token = None
+        self.event_id = None
+        self.thread_ids = {}
+
+    @property
+    def headers(self):
+        return {"Authorization": f"Bearer {self.token}"}
+
+    async def request(self, endpoint: str, method: str, url: str, stream: bool = False, **kwargs):
+        kwargs.setdefault("headers", self.headers)
+        start = time.perf_counter()
+        ok = False
+        try:
+            if stream:
+                async with self.client.stream(method, url, **kwargs) as response:
+                    async for _ in response.aiter_bytes():
+                        pass
+                    ok = response.status_code < 400
+                    return response
+            response = await self.client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+            return response
+        finally:
+            self.recorder.record(endpoint, time.perf_counter() - start, ok)
+
+    async def setup(self):
+        """Sign up, log in and create the event the scenarios work on"""
+        await self.client.post("/api/auth/signup", json={
+            "username": self.email,
+            "password": self.password,
+            "firstName": "Load",
+            "lastName": "Test",
+        })
+        await login(self)
+        start = datetime.now() + timedelta(days=7)
+        response = await self.client.post("/api/events", headers=self.headers, json={
+            "eventName": f"Load test conference {self.email}",
+            "location": "Raleigh, NC",
+            "dateTime": start.isoformat(),
+            "endDate": (start + timedelta(days=2)).isoformat(),
+            "attendees": 250,
+            "description": "Synthetic event created by the load test",
+            "sustainable": True,
+        })
+        response.raise_for_status()
+        self.event_id = response.json()["event"]["id"]
+
+async def login(user: VirtualUser):
+    response = await user.request(
+        "POST /api/auth/login", "POST", "/api/auth/login",
+        headers={}, data={"username": user.email, "password": user.password},
+    )
+    if response.status_code == 200:
+        user.token = response.json()["access_token"]
+
+async def dashboard(user: VirtualUser):
+    await user.request("GET /api/events/dashboard", "GET", "/api/events/dashboard")
+    await user.request("GET /api/events/user", "GET", "/api/events/user")
+    await user.request("GET /api/events/{id}", "GET", f"/api/events/{user.event_id}")
+
+async def food_crud(user: VirtualUser):
+    base = f"/api/events/{user.event_id}"
+    item = {"name": "Mushroom Risotto", "type": "main", "dietary": "vegetarian", "status": "pending"}
+    await user.request("GET /api/events/{id}/food-data", "GET", f"{base}/food-data")
+    await user.request("POST /api/events/{id}/menu-items", "POST", f"{base}/menu-items", json=item)
+    await user.request("PUT /api/events/{id}/menu-items/{index}", "PUT", f"{base}/menu-items/0",
+                       json={**item, "status": "confirmed"})
+    await user.request("POST /api/events/{id}/beverages", "POST", f"{base}/beverages", json={
+        "name": "Sparkling water", "category": "soft", "serving": "bottle", "status": "pending",
+    })
+    await user.request("DELETE /api/events/{id}/menu-items/{index}", "DELETE", f"{base}/menu-items/0")
+    await user.request("DELETE /api/events/{id}/beverages/{index}", "DELETE", f"{base}/beverages/0")
+
+async def license_crud(user: VirtualUser):
+    base = f"/api/events/{user.event_id}"
+    license_data = {
+        "name": "Temporary food service permit",
+        "type": "Food",
+        "description": "Required for serving food on site",
+        "status": "pending",
+        "dueDate": (datetime.now() + timedelta(days=14)).isoformat(),
+        "issuingAuthority": "Wake County Environmental Health",
+        "cost": 75.0,
+        "documents": ["Menu", "Floor plan"],
+        "eventId": user.event_id,
+    }
+    response = await user.request("POST /api/events/{id}/licenses", "POST", f"{base}/licenses", json=license_data)
+    await user.request("GET /api/events/{id}/licenses", "GET", f"{base}/licenses")
+    if response.status_code != 200:
+        return
+    license_id = response.json()["license"]["id"]
+    await user.request("PUT /api/events/{id}/licenses/{license_id}", "PUT", f"{base}/licenses/{license_id}",
+                       json={**license_data, "status": "submitted"})
+    await user.request("DELETE /api/events/{license_id}", "DELETE", f"/api/events/{license_id}")
+
+def _agent_body(user: VirtualUser, agent: str, text: str):
+    # Keep one conversation thread per agent so later turns carry history
+    thread_id = user.thread_ids.setdefault(agent, str(uuid.uuid4()))
+    return {
+        "threadId": thread_id,
+        "state": {},
+        "messages": [{
+            "id": str(uuid.uuid4()),
+            "type": "TextMessage",
+            "role": "user",
+            "content": text,
+            "createdAt": datetime.now().isoformat(),
+        }],
+        "actions": [],
+        "metaEvents": [],
+    }
+
+async def food_agent(user: VirtualUser):
+    await user.request(
+        "POST /copilotkit/agent/Food_Agent", "POST", "/copilotkit/agent/Food_Agent", stream=True,
+        json=_agent_body(user, "Food_Agent", "Find vegetarian main dishes for a summer conference lunch"),
+    )
+
+async def license_agent(user: VirtualUser):
+    await user.request(
+        "POST /copilotkit/agent/License_Agent", "POST", "/copilotkit/agent/License_Agent", stream=True,
+        json=_agent_body(user, "License_Agent", "Which permits do I need to serve food at a festival in Raleigh?"),
+    )
+
+SCENARIOS = {
+    "login": login,
+    "dashboard": dashboard,
+    "food_crud": food_crud,
+    "license_crud": license_crud,
+    "food_agent": food_agent,
+    "license_agent": license_agent,
+}
+
+# Relative weights of scenarios per mix
+MIXES = {
+    "default": {"login": 10, "dashboard": 30, "food_crud": 25, "license_crud": 20, "food_agent": 10, "license_agent": 5},
+    "crud": {"login": 10, "dashboard": 40, "food_crud": 25, "license_crud": 25},
+    "agent": {"dashboard": 20, "food_agent": 50, "license_agent": 30},
+}
@@ -0,0 +1,99 @@
+"""
+Benchmark of streamed tool-call arguments with 500-item payloads.
+
+An add_foods call with N foods streams as small argument deltas. Before,
+clients re-parsed the whole accumulated args text on every delta to show
+partial arguments, which is quadratic in the payload size. Now
+add_langgraph_route parses incrementally on the server and sends every
+completed element once as a data event.
+
+Part 1 compares the parse work of both strategies. Part 2 streams the
+payload through add_langgraph_route with a scripted graph and checks the
+emitted elements and the stream size.
+
+    cd backend && python -m benchmarks.partial_args --items 500 --chunk-size 8
+"""
+import argparse
+import asyncio
+import json
+import time
+from api.utils.partial_json import IncrementalJSONParser
+
+DISHES = ["Paneer Tikka", "Caesar Salad", "Tiramisu", "Falafel Wrap", "Mushroom Risotto", "Lemon Tart"]
+
+def payload(items: int) -> str:
+    return json.dumps({"foods": [
+        {"name": f"{DISHES[i % len(DISHES)]} #{i}", "type": "main", "dietary": "vegetarian"}
+        for i in range(items)
+    ]})
+
+def deltas(text: str, chunk_size: int):
+    return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+def reparse_every_delta(chunks):
+    """What a client does with only the args text: parse the growing prefix each time"""
+    from langchain_core.utils.json import parse_partial_json
+    text, seen = "", 0
+    for chunk in chunks:
+        text += chunk
+        partial = parse_partial_json(text) or {}
+        seen = max(seen, len(partial.get("foods", [])))
+    return seen
+
+def incremental(chunks):
+    parser = IncrementalJSONParser()
+    return sum(len(parser.feed(chunk)) for chunk in chunks)
+
+async def stream_through_route(chunks, items: int):
+    import httpx
+    from fastapi import FastAPI
+    from langchain_core.messages import AIMessageChunk
+    from api.routes.add_langgraph_route import add_langgraph_route
+
+    class ScriptedGraph:
+        """Streams one add_foods tool call the way graph.astream(stream_mode="messages") does"""
+        async def astream(self, inputs, config=None, stream_mode=None):
+            for i, chunk in enumerate(chunks):
+                yield AIMessageChunk(content="", tool_call_chunks=[{
+                    "index": 0, "id": "call_bench" if i == 0 else None,
+                    "name": "add_foods" if i == 0 else None, "args": chunk,
+                }]), {}
+
+    app = FastAPI()
+    add_langgraph_route(app, ScriptedGraph(), "/chat")
+    body = {"messages": [{"role": "user", "content": [{"type": "text", "text": "add them all"}]}]}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        response = await client.post("/chat", json=body)
+        elapsed = time.perf_counter() - start
+    lines = response.text.splitlines()
+    elements = [json.loads(line[2:])[0] for line in lines if line.startswith("2:")]
+    assert [e["path"] for e in elements] == [["foods", i] for i in range(items)], "every food exactly once, in order"
+    return elapsed, len(response.content), len(elements)
+
+def main(args):
+    text = payload(args.items)
+    chunks = deltas(text, args.chunk_size)
+    print(f"add_foods arguments: {args.items} foods, {len(text) / 1000:.0f} KB in {len(chunks)} deltas of {args.chunk_size} chars")
+    print()
+
+    start = time.perf_counter()
+    seen = reparse_every_delta(chunks)
+    reparse = time.perf_counter() - start
+    start = time.perf_counter()
+    emitted = incremental(chunks)
+    linear = time.perf_counter() - start
+    assert emitted == args.items and seen == args.items
+    print(f"re-parse args text on every delta: {reparse * 1000:>8.1f} ms")
+    print(f"incremental parser:                {linear * 1000:>8.1f} ms ({reparse / linear:.0f}x less work)")
+
+    elapsed, size, elements = asyncio.run(stream_through_route(chunks, args.items))
+    print()
+    print(f"add_langgraph_route: {elements} element events, {size / 1000:.0f} KB streamed in {elapsed * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--chunk-size", type=int, default=8)
+    main(parser.parse_args())
@@ -0,0 +1,165 @@
+"""
+Portfolio analytics for one user with 5k events in mongomock.
+
+- Per event requests: what the client has to do today, /food-data and
+  /licenses for every event (timed on a sample, extrapolated), then roll up.
+- Projected columns: the three projected queries PortfolioAnalytics runs,
+  then the rollups in plain Python vs NumPy. Both are checked to agree.
+- Cached: a repeat request at the same data version, and the recompute after
+  a write bumps it.
+
+    cd backend && python -m benchmarks.portfolio --events 5000
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+
+LICENSE_TYPES = ["Temporary Food Establishment Permit", "Special Event Permit", "Alcohol Beverage Permit",
+                 "Amplified Sound Permit", "Tent Permit", "Fire Safety Inspection", "Street Closure Permit"]
+VENDOR_STATUSES = ["Confirmed", "Pending", "Negotiating", "Cancelled"]
+
+def seed(db, events_count: int, rng: random.Random):
+    from datetime import datetime, timedelta
+    from bson import ObjectId
+    events, foods, licenses = [], [], []
+    for i in range(events_count):
+        event_id = ObjectId()
+        events.append({"_id": event_id, "userId": "bench-user", "eventName": f"Event {i}", "location": "Raleigh, NC",
+                       "dateTime": datetime(2025, 1, 1) + timedelta(hours=i), "attendees": rng.choice([0, 50, 120, 300, 800]),
+                       "description": "x" * 400, "sustainable": False})
+        foods.append({
+            "event_id": event_id,
+            "summary": {"budget": float(rng.randrange(500, 50000)), "budget_percentage": rng.randrange(0, 101),
+                        "vendor_count": 0, "menu_item_count": 12, "status": "Planning"},
+            "menu_items": [{"name": f"Dish {j}", "type": "main", "dietary": "None", "status": "pending"} for j in range(12)],
+            "vendors": [{"name": f"Vendor {j}", "type": "Caterer", "contact": "Sam", "phone": "919-555-0100",
+                         "status": rng.choice(VENDOR_STATUSES), "progress": rng.choice([0, 10, 30, 50, 80, 100])}
+                        for j in range(rng.randint(0, 6))],
+        })
+        for _ in range(rng.randint(0, 5)):
+            licenses.append({"eventId": str(event_id), "userId": "bench-user", "name": "Permit", "type": rng.choice(LICENSE_TYPES),
+                             "description": "", "status": rng.choice(["pending", "approved", "missing"]), "cost": float(rng.randrange(25, 1500)),
+                             "dueDate": datetime(2025, 1, 1), "issuingAuthority": "City", "documents": []})
+    db.events.insert_many(events)
+    db.event_food.insert_many(foods)
+    db.licenses.insert_many(licenses)
+    return events
+
+def python_rollup(events, foods, licenses):
+    """The same rollups as api.utils.portfolio.compute in plain Python, the parts the benchmark compares"""
+    license_cost = defaultdict(float)
+    by_type = defaultdict(float)
+    for license in licenses:
+        license_cost[license["eventId"]] += license.get("cost", 0)
+        by_type[license.get("type") or "Unspecified"] += license.get("cost", 0)
+    budget = {food["event_id"]: food.get("summary", {}).get("budget", 0) for food in foods}
+    per_attendee = []
+    total_cost = attended_cost = total_attendees = 0
+    for event in events:
+        cost = budget.get(event["_id"], 0) + license_cost.get(str(event["_id"]), 0)
+        total_cost += cost
+        if event.get("attendees"):
+            attended_cost += cost
+            total_attendees += event["attendees"]
+            per_attendee.append(cost / event["attendees"])
+    progress = [min(max(v.get("progress", 0), 0), 100) for food in foods for v in food.get("vendors", [])]
+    histogram = Counter(min(int(p // 25), 3) if p < 100 else 4 for p in progress)
+    return {
+        "totalCost": round(total_cost, 2),
+        "portfolio": round(attended_cost / total_attendees, 2),
+        "medianPerAttendee": round(statistics.median(per_attendee), 2),
+        "meanProgress": round(statistics.fmean(progress), 2),
+        "histogram": [histogram.get(i, 0) for i in range(5)],
+        "byType": {name: round(total, 2) for name, total in by_type.items()},
+    }
+
+def main(args):
+    import bson
+    import mongomock
+    from bson import ObjectId
+    from api.database.mongodb import MongoDB
+    from api.utils.portfolio import PortfolioAnalytics, compute, load_columns
+
+    rng = random.Random(2)
+    MongoDB.client = mongomock.MongoClient()
+    MongoDB.db = db = MongoDB.client["eventflow_db"]
+    start = time.perf_counter()
+    events = seed(db, args.events, rng)
+    print(f"{args.events} events, {db.licenses.count_documents({})} licenses seeded in {time.perf_counter() - start:.1f} s")
+    print()
+
+    sample = events[:args.sample]
+    read = 0
+    start = time.perf_counter()
+    for event in sample:
+        db.events.find_one({"_id": event["_id"], "userId": "bench-user"})
+        read += len(bson.encode(db.event_food.find_one({"event_id": ObjectId(str(event["_id"]))})))
+        db.events.find_one({"_id": event["_id"], "userId": "bench-user"})
+        read += sum(len(bson.encode(license)) for license in db.licenses.find({"eventId": str(event["_id"])}))
+    per_event = (time.perf_counter() - start) / len(sample)
+    print(f"per event requests: {per_event * 1000:.1f} ms per event, ~{per_event * args.events:.0f} s and "
+          f"~{read / len(sample) * args.events / 1e6:.1f} MB read for {args.events} events ({2 * args.events} requests)")
+
+    analytics = PortfolioAnalytics()
+    analytics._db()
+    start = time.perf_counter()
+    columns = load_columns(db, "bench-user")
+    load = time.perf_counter() - start
+    ids = [event["_id"] for event in events]
+    projected = sum(len(bson.encode(doc)) for doc in db.events.find({"userId": "bench-user"}, {"attendees": 1})) + \
+        sum(len(bson.encode(doc)) for doc in db.event_food.find({}, {"event_id": 1, "summary.budget": 1, "summary.budget_percentage": 1,
+                                                                      "vendors.progress": 1, "vendors.status": 1})) + \
+        sum(len(bson.encode(doc)) for doc in db.licenses.find({}, {"eventId": 1, "cost": 1, "type": 1, "status": 1}))
+    print(f"projected columns: {load * 1000:.0f} ms for 3 queries, {projected / 1e6:.1f} MB read, "
+          f"{len(columns.vendor_progress)} vendors, {len(columns.license_cost)} licenses "
+          f"(mongomock matches the {len(ids)} id $in per document, a mongod uses the indexes)")
+
+    full_events = list(db.events.find({"userId": "bench-user"}, {"attendees": 1}))
+    full_foods = list(db.event_food.find({}, {"event_id": 1, "summary.budget": 1, "vendors.progress": 1}))
+    full_licenses = list(db.licenses.find({}, {"eventId": 1, "cost": 1, "type": 1}))
+    timings = {}
+    for label, fn in (("python", lambda: python_rollup(full_events, full_foods, full_licenses)), ("numpy", lambda: compute(columns))):
+        samples = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = fn()
+            samples.append(time.perf_counter() - start)
+        timings[label] = (statistics.median(samples), result)
+    expected, result = timings["python"][1], timings["numpy"][1]
+    assert expected["totalCost"] == result["totals"]["totalCost"]
+    assert expected["portfolio"] == result["costPerAttendee"]["portfolio"]
+    assert expected["medianPerAttendee"] == result["costPerAttendee"]["byEvent"]["median"]
+    assert expected["meanProgress"] == result["vendorCompletion"]["progress"]["mean"]
+    assert expected["histogram"] == list(result["vendorCompletion"]["histogram"].values())
+    assert expected["byType"] == {group["name"]: group["total"] for group in result["licenseSpend"]["byType"]}
+    print(f"rollups: python {timings['python'][0] * 1000:.1f} ms, numpy {timings['numpy'][0] * 1000:.1f} ms (results agree)")
+
+    analytics.get("bench-user")
+    samples = []
+    for _ in range(50):
+        start = time.perf_counter()
+        _, _, cached = analytics.get("bench-user")
+        samples.append(time.perf_counter() - start)
+    assert cached
+    analytics.touch("bench-user")
+    start = time.perf_counter()
+    _, version, cached = analytics.get("bench-user")
+    recompute = time.perf_counter() - start
+    assert not cached
+    print()
+    print(f"cached at the same version: {statistics.median(samples) * 1000:.2f} ms; "
+          f"after a write (version {version}): {recompute * 1000:.0f} ms")
+    print()
+    for key, value in result["totals"].items():
+        print(f"  {key:<12} {value}")
+    print(f"  per attendee {result['costPerAttendee']}")
+    print(f"  vendors      {result['vendorCompletion']['histogram']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--sample", type=int, default=100, help="events timed for the per event requests")
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
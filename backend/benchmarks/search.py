@@ -0,0 +1,151 @@
+"""
+Event and license search over 100k documents in mongomock.
+
+Client side is what the frontend does today: fetch the user's full event and
+license lists and filter them by substring. The local index is the fallback
+search backend: build time, query latency for whole words, prefixes, typos
+and multi-word queries, incremental updates, and how long writes wait while a
+rebuild runs. All documents belong to one user, the worst case for the
+per-user shards.
+
+    cd backend && python -m benchmarks.search --documents 100000
+"""
+import argparse
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+ADJECTIVES = ["Annual", "Spring", "Summer", "Autumn", "Winter", "Charity", "Community", "Corporate", "Global",
+              "Regional", "Downtown", "Riverside", "Harvest", "Midnight", "Sunrise", "Heritage", "Student", "Founders"]
+NOUNS = ["Gala", "Festival", "Conference", "Summit", "Fundraiser", "Marathon", "Concert", "Expo", "Fair",
+         "Workshop", "Banquet", "Showcase", "Market", "Retreat", "Hackathon", "Symposium", "Parade", "Reunion"]
+CITIES = ["Raleigh", "Durham", "Chapel Hill", "Cary", "Charlotte", "Asheville", "Wilmington", "Greensboro",
+          "Boone", "Apex", "Wake Forest", "Morrisville", "Carrboro", "Hillsborough", "Fayetteville", "Pittsboro"]
+LICENSES = ["Temporary Food Establishment Permit", "Special Event Permit", "Alcohol Beverage Permit",
+            "Amplified Sound Permit", "Tent Permit", "Fire Safety Inspection", "Street Closure Permit",
+            "Fireworks Display Permit", "Parking Permit", "Vendor License"]
+AUTHORITIES = ["County Health Department", "Fire Marshal", "Police Department", "Parks and Recreation",
+               "Transportation Department", "ABC Commission", "Planning Department"]
+SYLLABLES = ["ka", "lo", "mi", "ra", "ten", "vo", "shi", "del", "par", "qua", "nor", "bel", "tri", "zan", "ful"]
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+def seed(documents: int, rng: random.Random):
+    import mongomock
+    from bson import ObjectId
+    from api.database.mongodb import MongoDB
+
+    MongoDB.client = mongomock.MongoClient()
+    MongoDB.db = MongoDB.client["eventflow_db"]
+    # Made-up words make the description vocabulary about as large as real text
+    words = list({"".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(20000)})
+    events_count = documents * 7 // 10
+    events, licenses = [], []
+    for i in range(events_count):
+        event_id = ObjectId()
+        city = rng.choice(CITIES)
+        events.append({
+            "_id": event_id, "userId": "bench-user",
+            "eventName": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}",
+            "location": f"{city}, NC",
+            "description": " ".join(rng.choices(words, k=20)),
+            "dateTime": datetime(2026, 1, 1) + timedelta(hours=i), "attendees": rng.randint(10, 500),
+        })
+    for i in range(documents - events_count):
+        licenses.append({
+            "_id": ObjectId(), "userId": "bench-user", "eventId": str(events[i % events_count]["_id"]),
+            "name": rng.choice(LICENSES), "issuingAuthority": f"{rng.choice(CITIES)} {rng.choice(AUTHORITIES)}",
+            "status": "pending", "dueDate": datetime(2026, 1, 1) + timedelta(hours=i),
+        })
+    MongoDB.db.events.insert_many(events)
+    MongoDB.db.licenses.insert_many(licenses)
+    return events, words
+
+def client_filter(events, licenses, query: str):
+    """Substring filter over the full lists, as the frontend does it"""
+    needle = query.lower()
+    return [e for e in events if any(needle in str(e.get(f, "")).lower() for f in ("eventName", "location", "description"))] + \
+        [l for l in licenses if any(needle in str(l.get(f, "")).lower() for f in ("name", "issuingAuthority"))]
+
+def main(args):
+    from api.utils.search import LocalSearchIndex
+
+    rng = random.Random(11)
+    start = time.perf_counter()
+    events, words = seed(args.documents, rng)
+    print(f"{args.documents} documents ({len(events)} events) seeded in {time.perf_counter() - start:.1f} s")
+
+    queries = {
+        "word": ["festival", "raleigh", "permit", "marshal", "hackathon"],
+        "prefix": ["fest", "chap", "amp", "hack", "sym"],
+        "typo": ["festivl", "confrence", "asheville"[:-1] + "e", "fireworkz", "symposum"],
+        "multi-word": ["spring gala raleigh", "alcohol permit durham", "charity marathon", "tent fire"],
+        "description": rng.sample(words, 5),
+    }
+
+    from api.database.mongodb import MongoDB
+    start = time.perf_counter()
+    all_events = list(MongoDB.db.events.find({"userId": "bench-user"}))
+    all_licenses = list(MongoDB.db.licenses.find({"userId": "bench-user"}))
+    fetch = time.perf_counter() - start
+    shipped = len(json.dumps(all_events + all_licenses, default=str))
+    start = time.perf_counter()
+    for query in queries["word"]:
+        client_filter(all_events, all_licenses, query)
+    client = (time.perf_counter() - start) / len(queries["word"])
+    print()
+    print(f"client side: {shipped / 1e6:.1f} MB of lists to ship ({fetch:.1f} s to read from mongomock), "
+          f"then {client * 1000:.0f} ms per substring filter")
+
+    index = LocalSearchIndex()
+    start = time.perf_counter()
+    index._ensure_fresh()
+    print(f"local index: built in {time.perf_counter() - start:.2f} s, {len(index)} documents "
+          f"(most of it the same mongomock read)")
+    print()
+    print(f"{'query':<12} {'p50':>9} {'p95':>9} {'hits (avg)':>11}")
+    for label, terms in queries.items():
+        samples, hits = [], []
+        for _ in range(args.repeat):
+            for query in terms:
+                start = time.perf_counter()
+                page = index.search("bench-user", query, ("events", "licenses"), 20, 0)
+                samples.append(time.perf_counter() - start)
+                hits.append(page["total"])
+        print(f"{label:<12} {percentile(samples, 50) * 1000:>7.2f}ms {percentile(samples, 95) * 1000:>7.2f}ms "
+              f"{sum(hits) / len(hits):>11.0f}")
+
+    page = index.search("bench-user", "spring gala raleigh", ("events", "licenses"), 5, 5)
+    print()
+    print(f"page 2 of 'spring gala raleigh' ({page['total']} hits):", ", ".join(f"{hit['title']} ({hit['subtitle']})" for hit in page["results"][:2]), "...")
+
+    updates = []
+    for event in rng.sample(events, 1000):
+        start = time.perf_counter()
+        index.upsert("events", {**event, "eventName": f"Renamed Zephyr Jubilee {event['_id']}"})
+        updates.append(time.perf_counter() - start)
+    found = index.search("bench-user", "zephyr jubilee", ("events",), 20, 0)["total"]
+    print(f"incremental update: p50 {percentile(updates, 50) * 1000:.3f} ms, p95 {percentile(updates, 95) * 1000:.3f} ms, "
+          f"{found} of 1000 renamed events found right after")
+
+    index._built_at -= index.max_age_seconds
+    index._ensure_fresh()
+    writes = []
+    start = time.perf_counter()
+    while index._rebuilding:
+        write_start = time.perf_counter()
+        index.upsert("events", {**rng.choice(events), "eventName": "Rebuild Racer"})
+        writes.append(time.perf_counter() - write_start)
+        time.sleep(0.01)
+    print(f"background rebuild: {time.perf_counter() - start:.2f} s, {len(writes)} writes meanwhile, "
+          f"p95 {percentile(writes, 95) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,93 @@
+"""
+Concurrency check and benchmark of single-flight coalescing for agent searches.
+
+Fires bursts of concurrent searches (a few distinct queries, written with
+different casing/spacing) at a fake LLM with fixed latency, cancels a share of
+the waiters mid-flight, and verifies that:
+- each distinct normalized query reaches the LLM exactly once per burst
+- every waiter that was not cancelled gets the result
+- cancelling waiters never cancels a call other waiters still need
+
+    cd backend && python -m benchmarks.single_flight --waiters 200 --cancel-fraction 0.3
+"""
+import argparse
+import asyncio
+import random
+import time
+from api.utils.single_flight import SingleFlight, search_key, single_flight_calls
+
+QUERIES = [
+    "Vegetarian mains for 200 guests",
+    "gluten-free desserts",
+    "Food permit in Raleigh",
+    "Alcohol license for an outdoor festival",
+]
+
+def variants(query: str):
+    return [query, query.upper(), f"  {query}  ", query.lower() + "?", query.replace(" ", "   ")]
+
+class FakeLLM:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    async def structured_search(self, query: str):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return {"query": query, "items": [f"{query} #{i}" for i in range(5)]}
+
+async def burst(flight: SingleFlight, llm: FakeLLM, waiters: int, cancel_fraction: float, rng: random.Random):
+    async def search(query: str):
+        return await flight.do(search_key("bench", query, "gpt-4o"), lambda: llm.structured_search(query))
+
+    requests = [rng.choice(variants(rng.choice(QUERIES))) for _ in range(waiters)]
+    tasks = [asyncio.ensure_future(search(q)) for q in requests]
+    cancelled = set(rng.sample(range(waiters), int(waiters * cancel_fraction)))
+
+    await asyncio.sleep(llm.latency / 2)
+    for i in cancelled:
+        tasks[i].cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    served = 0
+    for i, result in enumerate(results):
+        if i in cancelled:
+            assert isinstance(result, asyncio.CancelledError), f"waiter {i} should have been cancelled"
+        else:
+            assert isinstance(result, dict), f"waiter {i} lost its result: {result!r}"
+            served += 1
+    return served
+
+async def run(waiters: int, cancel_fraction: float, latency: float, bursts: int, seed: int):
+    rng = random.Random(seed)
+    flight = SingleFlight("bench")
+    llm = FakeLLM(latency)
+
+    start = time.perf_counter()
+    served = 0
+    for _ in range(bursts):
+        served += await burst(flight, llm, waiters, cancel_fraction, rng)
+    elapsed = time.perf_counter() - start
+
+    assert llm.calls <= len(QUERIES) * bursts, f"{llm.calls} upstream calls for {len(QUERIES)} distinct queries"
+    assert flight.in_flight == 0
+
+    leaders = single_flight_calls.value(group="bench", role="leader")
+    followers = single_flight_calls.value(group="bench", role="follower")
+    print(f"bursts:               {bursts} x {waiters} concurrent searches")
+    print(f"cancelled waiters:    {int(waiters * cancel_fraction) * bursts}")
+    print(f"waiters served:       {served}")
+    print(f"upstream LLM calls:   {llm.calls} (without coalescing: {waiters * bursts})")
+    print(f"leaders / followers:  {int(leaders)} / {int(followers)}")
+    print(f"coalescing ratio:     {followers / (leaders + followers):.1%}")
+    print(f"wall time:            {elapsed:.2f}s ({elapsed / bursts * 1000:.0f} ms/burst, LLM latency {latency * 1000:.0f} ms)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--waiters", type=int, default=200)
+    parser.add_argument("--cancel-fraction", type=float, default=0.3)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(run(args.waiters, args.cancel_fraction, args.latency_ms / 1000, args.bursts, args.seed))
@@ -0,0 +1,72 @@
+"""
+Time-to-first-item benchmark of streamed structured search results.
+
+Streams FoodList and LicenseList tool calls from the fake OpenAI server (fixed
+time to first byte, fixed delay between chunks) through the search nodes'
+model router and records when each list item is handed to the UI. Without
+streaming the first item only shows up together with the last one.
+
+    cd backend && python -m benchmarks.structured_streaming --llm-latency-ms 300 --token-delay-ms 20
+"""
+import argparse
+import asyncio
+import math
+import time
+from .loadtest.__main__ import configure_environment
+from .loadtest.fake_llm import FakeOpenAIServer
+
+QUERIES = {
+    "FoodList": ["vegetarian mains for a conference", "sushi platter ideas", "street food for a night market"],
+    "LicenseList": ["food permit in Raleigh", "alcohol license for a festival", "noise permit for a concert"],
+}
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+async def measure(router, schema, check, query: str):
+    start = time.perf_counter()
+    arrivals = []
+
+    async def on_item(index, item):
+        arrivals.append(time.perf_counter() - start)
+
+    result = await router.ainvoke(schema, query, {}, check, on_item)
+    total = time.perf_counter() - start
+    assert len(arrivals) == len(result.items), "every item should be streamed exactly once"
+    return arrivals[0], total, len(result.items)
+
+async def main(args):
+    with FakeOpenAIServer(latency_ms=args.llm_latency_ms, token_delay_ms=args.token_delay_ms,
+                          chunk_size=args.chunk_size) as server:
+        configure_environment(argparse.Namespace(database="eventflow_bench", mongo_url=None), server.base_url)
+        from api.langgraph.food_agent import search as food_search
+        from api.langgraph.license_agent import search as license_search
+        targets = {
+            "FoodList": (food_search.model_router, food_search.FoodList, food_search.check_food_list),
+            "LicenseList": (license_search.model_router, license_search.LicenseList, license_search.check_license_list),
+        }
+
+        print(f"fake LLM: {args.llm_latency_ms:.0f} ms to first byte, {args.token_delay_ms:.0f} ms per "
+              f"{args.chunk_size}-char chunk, {args.repeats} runs per query")
+        print()
+        print(f"{'schema':<12} {'items':>5} {'first item p50':>15} {'complete p50':>13} {'first item p95':>15} {'complete p95':>13}")
+        for name, queries in QUERIES.items():
+            router, schema, check = targets[name]
+            first, complete, items = [], [], 0
+            for _ in range(args.repeats):
+                for query in queries:
+                    ttfi, total, items = await measure(router, schema, check, query)
+                    first.append(ttfi)
+                    complete.append(total)
+            print(f"{name:<12} {items:>5} {percentile(first, 50) * 1000:>12.0f} ms {percentile(complete, 50) * 1000:>10.0f} ms "
+                  f"{percentile(first, 95) * 1000:>12.0f} ms {percentile(complete, 95) * 1000:>10.0f} ms")
+        print("\nwithout streaming, the first item arrives with the complete list")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--token-delay-ms", type=float, default=20)
+    parser.add_argument("--chunk-size", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,178 @@
+"""
+Vendors embedded in every event vs the per-user vendor directory, for 2,000
+events of 20 users who each book from their own 40 vendors.
+
+- Migration: the embedded data moved into the directory by
+  `vendor_directory.migrate`, then every event checked to read back the same
+  vendors. Names are seeded with case and punctuation variants ("Joe's BBQ",
+  "joes bbq") the way people type them, the directory folds them together.
+- Storage: BSON bytes of event_food with embedded vendors vs references plus
+  the directory.
+- Phone change of a user's most booked vendor: rewriting every embedded copy
+  (documents read and written, copies under another spelling missed) vs one
+  directory update.
+- Reads: one event's /food-data, find_one vs the $lookup hydration, and one
+  user's events hydrated together with one batched query.
+
+    cd backend && python -m benchmarks.vendor_directory --events 2000
+"""
+import argparse
+import logging
+import math
+import random
+import time
+
+TYPES = ["Caterer", "Bakery", "Beverages", "Food Truck", "Rentals"]
+STATUSES = ["Confirmed", "Pending", "Negotiating", "Cancelled"]
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+def spelling(name: str, rng: random.Random) -> str:
+    """How someone might type the vendor's name this time"""
+    return rng.choice([name, name.lower(), name.upper(), name.replace("'", ""), name.replace(" ", "  ")])
+
+def seed(db, events_count: int, users: int, vendors_per_user: int, rng: random.Random):
+    from bson import ObjectId
+    pools = {
+        f"user-{u}": [{"name": f"Vendor's Kitchen {u}-{v}", "type": rng.choice(TYPES), "contact": f"Contact {v}",
+                       "phone": f"919-555-{u:02d}{v:02d}"} for v in range(vendors_per_user)]
+        for u in range(users)
+    }
+    # Zipf-like popularity, a few vendors are booked by most events
+    weights = [1 / (rank + 1) for rank in range(vendors_per_user)]
+    events, foods = [], []
+    for i in range(events_count):
+        user_id = f"user-{i % users}"
+        event_id = ObjectId()
+        events.append({"_id": event_id, "userId": user_id, "eventName": f"Event {i}"})
+        booked = {id(v): v for v in rng.choices(pools[user_id], weights, k=rng.randint(3, 8))}.values()
+        foods.append({
+            "event_id": event_id,
+            "summary": {"budget": 5000.0, "budget_percentage": 40, "vendor_count": len(booked), "status": "Planning"},
+            "menu_items": [{"name": f"Dish {j}", "type": "main", "dietary": "None", "status": "pending"} for j in range(8)],
+            "vendors": [{**vendor, "name": spelling(vendor["name"], rng), "status": rng.choice(STATUSES),
+                         "progress": rng.choice([0, 10, 30, 50, 80, 100])} for vendor in booked],
+        })
+    return pools, events, foods
+
+def collection_bytes(collection) -> int:
+    import bson
+    return sum(len(bson.encode(doc)) for doc in collection.find())
+
+def main(args):
+    import copy
+    import bson
+    import mongomock
+    from pymongo import MongoClient
+    from api.database.mongodb import MongoDB
+    from api.utils.vendor_directory import VendorDirectory, normalize_name, SHARED_FIELDS
+
+    logging.getLogger("api.utils.logger").setLevel(logging.WARNING)
+    rng = random.Random(5)
+    MongoDB.client = MongoClient(args.mongodb_url) if args.mongodb_url else mongomock.MongoClient()
+    embedded = MongoDB.client["eventflow_bench_embedded"]
+    MongoDB.db = db = MongoDB.client["eventflow_bench_directory"]
+    for database in (embedded, db):
+        for name in ("events", "event_food", "vendors"):
+            database[name].drop()
+    pools, events, foods = seed(db, args.events, args.users, args.vendors, rng)
+    for database in (embedded, db):
+        database.events.insert_many(copy.deepcopy(events))
+        database.event_food.insert_many(copy.deepcopy(foods))
+        database.event_food.create_index("event_id")
+    copies = sum(len(food["vendors"]) for food in foods)
+    print(f"{args.events} events of {args.users} users, {copies} vendor bookings of {args.users * args.vendors} vendors")
+    print()
+
+    directory = VendorDirectory()
+    start = time.perf_counter()
+    migrated = directory.migrate(db.event_food)
+    print(f"migration: {migrated} events, {db.vendors.count_documents({})} directory vendors, "
+          f"{time.perf_counter() - start:.1f} s")
+    distinct = {(event["userId"], v["phone"]) for event, food in zip(events, foods) for v in food["vendors"]}
+    assert db.vendors.count_documents({}) == len(distinct)
+    by_event = {food["event_id"]: food for food in foods}
+    summary = lambda vendors: [(normalize_name(v["name"]), v["phone"], v["status"], v["progress"]) for v in vendors]
+    for food in directory.hydrate(list(db.event_food.find())):
+        assert summary(food["vendors"]) == summary(by_event[food["event_id"]]["vendors"])
+    for event in events[:args.sample]:
+        assert summary(directory.food_data(db.event_food, event["_id"])["vendors"]) == summary(by_event[event["_id"]]["vendors"])
+    print("  every event reads back the vendors it had embedded")
+
+    embedded_bytes = collection_bytes(embedded.event_food)
+    referenced_bytes, directory_bytes = collection_bytes(db.event_food), collection_bytes(db.vendors)
+    print()
+    print(f"storage: embedded {embedded_bytes / 1e6:.2f} MB, references {referenced_bytes / 1e6:.2f} MB + directory "
+          f"{directory_bytes / 1e6:.2f} MB = {(referenced_bytes + directory_bytes) / 1e6:.2f} MB "
+          f"({1 - (referenced_bytes + directory_bytes) / embedded_bytes:.0%} less)")
+    embedded_vendors = sum(len(bson.encode({"vendors": food["vendors"]})) for food in embedded.event_food.find({}, {"vendors": 1}))
+    referenced_vendors = sum(len(bson.encode({"vendors": food["vendors"]})) for food in db.event_food.find({}, {"vendors": 1}))
+    print(f"  vendors alone: {embedded_vendors / 1e6:.2f} MB embedded vs {(referenced_vendors + directory_bytes) / 1e6:.2f} MB "
+          f"({1 - (referenced_vendors + directory_bytes) / embedded_vendors:.0%} less), the rest is menu items and summaries")
+
+    user_id = "user-0"
+    popular = pools[user_id][0]
+    new_phone = "919-555-9999"
+    user_events = [event["_id"] for event in events if event["userId"] == user_id]
+    start = time.perf_counter()
+    read = written = rewritten = 0
+    # Without arrayFilters (mongomock has none) each copy is a read-modify-write, a mongod would
+    # run one update_many with vendors.$[v].phone but still rewrite every matching document
+    for food in embedded.event_food.find({"event_id": {"$in": user_events}, "vendors.name": popular["name"]}):
+        read += 1
+        vendors = [{**v, "phone": new_phone} if v["name"] == popular["name"] else v for v in food["vendors"]]
+        written += embedded.event_food.update_one({"_id": food["_id"]}, {"$set": {"vendors": vendors}}).modified_count
+        rewritten += sum(v["name"] == popular["name"] for v in food["vendors"])
+    embedded_time = time.perf_counter() - start
+    booked = sum(normalize_name(v["name"]) == normalize_name(popular["name"])
+                 for food in foods if food["event_id"] in set(user_events) for v in food["vendors"])
+    vendor = db.vendors.find_one({"nameKey": f"{user_id}|{normalize_name(popular['name'])}"})
+    start = time.perf_counter()
+    directory.update(user_id, vendor["_id"], {**{f: vendor[f] for f in SHARED_FIELDS}, "phone": new_phone})
+    directory_time = time.perf_counter() - start
+    print()
+    print(f"phone change of the most booked vendor ({booked} of {len(user_events)} events):")
+    print(f"  embedded:  {read} documents read, {written} rewritten, {booked - rewritten} copies under another "
+          f"spelling left with the old number, {embedded_time * 1000:.1f} ms")
+    print(f"  directory: 1 document updated, {directory_time * 1000:.1f} ms")
+    stale = [v for food in directory.hydrate(list(db.event_food.find({"event_id": {"$in": user_events}})))
+             for v in food["vendors"] if v["id"] == str(vendor["_id"]) and v["phone"] != new_phone]
+    assert not stale
+
+    samples = {"embedded": [], "lookup": [], "batched": []}
+    for event in rng.sample(events, min(args.sample, len(events))):
+        start = time.perf_counter()
+        embedded.event_food.find_one({"event_id": event["_id"]})
+        samples["embedded"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        directory.food_data(db.event_food, event["_id"])
+        samples["lookup"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        directory.hydrate([db.event_food.find_one({"event_id": event["_id"]})])
+        samples["batched"].append(time.perf_counter() - start)
+    print()
+    print(f"one event's food data, p50 / p99: embedded find_one {percentile(samples['embedded'], 50) * 1000:.2f} / "
+          f"{percentile(samples['embedded'], 99) * 1000:.2f} ms, $lookup {percentile(samples['lookup'], 50) * 1000:.2f} / "
+          f"{percentile(samples['lookup'], 99) * 1000:.2f} ms, find_one + vendor $in {percentile(samples['batched'], 50) * 1000:.2f} / "
+          f"{percentile(samples['batched'], 99) * 1000:.2f} ms")
+    if not args.mongodb_url:
+        print("  (mongomock copies the whole collection for every aggregate, a mongod matches on the event_id index)")
+    start = time.perf_counter()
+    list(embedded.event_food.find({"event_id": {"$in": user_events}}))
+    embedded_batch = time.perf_counter() - start
+    start = time.perf_counter()
+    hydrated = directory.hydrate(list(db.event_food.find({"event_id": {"$in": user_events}})))
+    directory_batch = time.perf_counter() - start
+    print(f"one user's {len(hydrated)} events: embedded {embedded_batch * 1000:.1f} ms, "
+          f"references + one batched vendor query {directory_batch * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--vendors", type=int, default=40, help="vendors each user books from")
+    parser.add_argument("--sample", type=int, default=200, help="events timed for single reads")
+    parser.add_argument("--mongodb-url", default=None)
+    main(parser.parse_args())
@@ -0,0 +1,19 @@
+"""
+Shared fixtures. Run from the backend/ directory:
+
+    cd backend && python -m pytest tests
+
+Tests that touch Mongo run against mongomock and are skipped without it.
+"""
+import pytest
+
+@pytest.fixture
+def mongo_db():
+    """A fresh mongomock database installed as the app's MongoDB.db"""
+    mongomock = pytest.importorskip("mongomock")
+    from api.database.mongodb import MongoDB
+    previous = (MongoDB.client, MongoDB.db)
+    MongoDB.client = mongomock.MongoClient()
+    MongoDB.db = MongoDB.client["eventflow_test"]
+    yield MongoDB.db
+    MongoDB.client, MongoDB.db = previous
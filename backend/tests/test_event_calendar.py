@@ -0,0 +1,99 @@
+import random
+from datetime import datetime, timedelta, timezone
+import pytest
+from api.utils.event_calendar import EventCalendar, IntervalTree, as_stored, calendar_window, event_interval
+
+BASE = datetime(2025, 1, 1)
+
+def random_events(rng: random.Random, count: int):
+    events = []
+    for i in range(count):
+        start = BASE + timedelta(hours=rng.randint(0, 24 * 90))
+        event = {"_id": i, "userId": "ada", "dateTime": start}
+        # Some events have no end date and last the default day
+        if rng.random() < 0.8:
+            event["endDate"] = start + timedelta(hours=rng.choice([0, 1, 5, 30, 24 * 10]))
+        events.append(event)
+    return events
+
+def brute_force(events, start, end):
+    hits = [e for e in events if event_interval(e)[0] <= end and event_interval(e)[1] >= start]
+    return sorted(e["_id"] for e in hits)
+
+def test_overlapping_matches_brute_force():
+    rng = random.Random(3)
+    events = random_events(rng, 400)
+    tree = IntervalTree(events)
+    for _ in range(300):
+        start = BASE + timedelta(hours=rng.randint(-48, 24 * 95))
+        end = start + timedelta(hours=rng.choice([0, 1, 24, 24 * 7, 24 * 31]))
+        found = tree.overlapping(start, end)
+        assert sorted(e["_id"] for e in found) == brute_force(events, start, end)
+        # By start
+        assert [e["dateTime"] for e in found] == sorted(e["dateTime"] for e in found)
+
+def test_window_boundaries_are_inclusive():
+    event = {"_id": 1, "dateTime": BASE, "endDate": BASE + timedelta(hours=2)}
+    tree = IntervalTree([event])
+    assert tree.overlapping(BASE + timedelta(hours=2), BASE + timedelta(hours=3)) == [event]
+    assert tree.overlapping(BASE - timedelta(hours=1), BASE) == [event]
+    assert tree.overlapping(BASE + timedelta(hours=2, microseconds=1), BASE + timedelta(hours=3)) == []
+
+def test_starting_after_and_ended_before():
+    rng = random.Random(5)
+    events = random_events(rng, 200)
+    tree = IntervalTree(events)
+    now = BASE + timedelta(days=45)
+    assert sorted(e["_id"] for e in tree.starting_after(now)) == sorted(e["_id"] for e in events if e["dateTime"] > now)
+    assert sorted(e["_id"] for e in tree.ended_before(now)) == sorted(
+        e["_id"] for e in events if event_interval(e)[1] < now)
+    # Every event is ongoing, upcoming or past, exactly once
+    ongoing = tree.overlapping(now, now)
+    assert len(ongoing) + len(tree.starting_after(now)) + len(tree.ended_before(now)) == len(events)
+
+def test_events_without_a_date_are_skipped():
+    tree = IntervalTree([{"_id": 1, "dateTime": None}, {"_id": 2, "dateTime": BASE}])
+    assert [e["_id"] for e in tree.overlapping(BASE, BASE)] == [2]
+    assert tree.total == 2
+
+def test_calendar_window():
+    day = datetime(2025, 2, 12, 15, 30)
+    assert calendar_window("day", day) == (datetime(2025, 2, 12), datetime(2025, 2, 12, 23, 59, 59, 999999))
+    assert calendar_window("week", day) == (datetime(2025, 2, 10), datetime(2025, 2, 16, 23, 59, 59, 999999))
+    assert calendar_window("month", day) == (datetime(2025, 2, 1), datetime(2025, 2, 28, 23, 59, 59, 999999))
+    with pytest.raises(ValueError):
+        calendar_window("year", day)
+
+def test_as_stored_is_naive_utc():
+    aware = datetime(2025, 1, 1, 12, tzinfo=timezone(timedelta(hours=2)))
+    assert as_stored(aware) == datetime(2025, 1, 1, 10)
+    assert as_stored(datetime(2025, 1, 1, 12)) == datetime(2025, 1, 1, 12)
+
+def test_hot_users_are_served_from_the_tree_until_a_write(mongo_db):
+    events = random_events(random.Random(9), 100)
+    mongo_db.events.insert_many([dict(e) for e in events])
+    calendar = EventCalendar(hot_queries=2, ttl_seconds=60)
+    start, end = calendar_window("month", BASE + timedelta(days=40))
+    expected = brute_force(events, start, end)
+    for _ in range(3):
+        # Mongo for the first query, the tree after
+        assert sorted(e["_id"] for e in calendar.overlapping("ada", start, end)) == expected
+    assert calendar._users["ada"][1] is not None
+
+    late = {"_id": 1000, "userId": "ada", "dateTime": start, "endDate": end}
+    mongo_db.events.insert_one(dict(late))
+    calendar.invalidate("ada")
+    assert 1000 in [e["_id"] for e in calendar.overlapping("ada", start, end)]
+    assert calendar.overlapping("eve", start, end) == []
+
+def test_classify_agrees_between_mongo_and_tree(mongo_db):
+    events = random_events(random.Random(11), 150)
+    mongo_db.events.insert_many([dict(e) for e in events])
+    now = BASE + timedelta(days=30, hours=6)
+    from_mongo = EventCalendar(hot_queries=1000).classify("ada", now)
+    from_tree = EventCalendar(hot_queries=1).classify("ada", now)
+    assert from_mongo[0] == from_tree[0] == len(events)
+    for mongo_group, tree_group in zip(from_mongo[1:], from_tree[1:]):
+        # Events starting at the same moment may come in either order
+        assert sorted(e["_id"] for e in mongo_group) == sorted(e["_id"] for e in tree_group)
+        assert [e["dateTime"] for e in mongo_group] == [e["dateTime"] for e in tree_group]
@@ -0,0 +1,67 @@
+import json
+import random
+import pytest
+from api.utils.partial_json import IncrementalJSONParser
+
+DOCUMENT = {
+    "items": [
+        {"name": "Risotto", "type": "main", "tags": ["a", "b"]},
+        {"name": "Say \"cheese\" \\ tart", "type": "dessert", "nested": {"items": [1, 2]}},
+        {"name": "Ünïcödé {not} [json]", "type": "starter"},
+    ],
+    "scores": [1, -2.5, True, None, "x"],
+    "note": "[not, an, array]",
+}
+
+def feed_all(text: str, sizes):
+    parser = IncrementalJSONParser()
+    events, position = [], 0
+    for size in sizes:
+        events.extend(parser.feed(text[position:position + size]))
+        position += size
+    events.extend(parser.feed(text[position:]))
+    return parser, events
+
+def expected_events(document: dict):
+    return [((key, index), value) for key, values in document.items() if isinstance(values, list)
+            for index, value in enumerate(values)]
+
+@pytest.mark.parametrize("chunk", [1, 2, 7, 64, 10_000])
+def test_elements_of_top_level_arrays_in_any_chunking(chunk):
+    text = json.dumps(DOCUMENT, ensure_ascii=False)
+    parser, events = feed_all(text, [chunk] * (len(text) // chunk))
+    assert events == expected_events(DOCUMENT)
+    assert parser.done
+    assert parser.value() == DOCUMENT
+
+def test_random_chunking_matches_a_full_parse():
+    rng = random.Random(7)
+    document = {"items": [{"id": i, "text": "x" * rng.randint(0, 40)} for i in range(50)]}
+    text = json.dumps(document, indent=2)
+    sizes = [rng.randint(1, 30) for _ in range(len(text))]
+    _, events = feed_all(text, sizes)
+    assert events == expected_events(document)
+
+def test_elements_are_reported_once_complete():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"items": [{"name": "Ris') == []
+    assert parser.feed('otto"}, {"na') == [(("items", 0), {"name": "Risotto"})]
+    # A scalar element is only complete at the next , or ]
+    assert parser.feed('me": "Tart"}], "n": [12') == [(("items", 1), {"name": "Tart"})]
+    assert parser.feed('3]}') == [(("n", 0), 123)]
+    assert parser.done
+
+def test_root_array_paths():
+    _, events = feed_all('[{"a": 1}, [2], "three"]', [3] * 8)
+    assert events == [((0,), {"a": 1}), ((1,), [2]), ((2,), "three")]
+
+def test_memory_stays_bounded_by_one_element():
+    parser = IncrementalJSONParser()
+    parser.feed('{"items": [')
+    for i in range(1000):
+        parser.feed(json.dumps({"id": i, "pad": "y" * 100}) + ", ")
+        assert len(parser._window) < 200
+
+def test_unbalanced_close_is_an_error():
+    with pytest.raises(ValueError):
+        IncrementalJSONParser().feed("]")
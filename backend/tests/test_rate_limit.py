@@ -0,0 +1,96 @@
+import asyncio
+from datetime import timedelta
+import pytest
+from starlette.requests import Request
+from api.utils import rate_limit
+from api.utils.rate_limit import (
+    InMemoryBucketStore, LLMAdmissionController, LLMOverloadedError, parse_rules, request_identity,
+)
+
+def make_request(client: str, headers: dict = None) -> Request:
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/copilotkit",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": (client, 4242),
+    })
+
+def test_parse_rules():
+    agents, api = parse_rules("agents=/copilotkit:10:20, api=/api:120:600")
+    assert (agents.name, agents.prefix, agents.capacity) == ("agents", "/copilotkit", 10)
+    assert agents.refill_per_second == pytest.approx(20 / 60)
+    assert api.matches("GET", "/api/events") and not api.matches("GET", "/copilotkit")
+
+def test_bucket_allows_capacity_then_refills(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    store = InMemoryBucketStore()
+
+    assert [store.consume("k", 3, 1)[0] for _ in range(4)] == [True, True, True, False]
+    allowed, retry_after = store.consume("k", 3, 1)
+    assert not allowed and retry_after == pytest.approx(1)
+
+    now[0] += 1
+    assert store.consume("k", 3, 1)[0]
+    # Other keys have their own bucket
+    assert store.consume("other", 3, 1)[0]
+
+def test_identity_prefers_bearer_subject():
+    from api.routes.auth import create_access_token
+    token = create_access_token({"sub": "ada@example.com"}, timedelta(minutes=5))
+    request = make_request("127.0.0.1", {"Authorization": f"Bearer {token}", "X-Forwarded-User": "eve"})
+    assert request_identity(request) == "user:ada@example.com"
+
+def test_identity_of_proxied_requests():
+    proxies = {"127.0.0.1"}
+    assert request_identity(make_request("127.0.0.1", {"X-Forwarded-User": "ada"}), proxies) == "user:ada"
+    # Anonymous traffic through the proxy shares one bucket instead of going unlimited
+    assert request_identity(make_request("127.0.0.1"), proxies) == "proxy:127.0.0.1"
+    # Only trusted proxies may name the user
+    assert request_identity(make_request("10.0.0.9", {"X-Forwarded-User": "ada"}), proxies) == "ip:10.0.0.9"
+
+def test_identity_ignores_invalid_tokens():
+    request = make_request("10.0.0.9", {"Authorization": "Bearer not-a-jwt"})
+    assert request_identity(request, set()) == "ip:10.0.0.9"
+
+def test_admission_rejects_when_queue_is_full():
+    async def scenario():
+        admission = LLMAdmissionController(max_concurrent=1, queue_timeout=1, max_queue=1)
+        release = asyncio.Event()
+        outcomes = []
+
+        async def call(name):
+            try:
+                async with admission.slot():
+                    outcomes.append(f"{name} admitted")
+                    await release.wait()
+            except LLMOverloadedError:
+                outcomes.append(f"{name} rejected")
+
+        running = asyncio.ensure_future(call("first"))
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(call("second"))
+        await asyncio.sleep(0)
+        assert admission.saturated
+        # Nothing waits behind a full queue
+        await call("third")
+        release.set()
+        await asyncio.gather(running, queued)
+        return outcomes
+
+    assert asyncio.run(scenario()) == ["first admitted", "third rejected", "second admitted"]
+
+def test_admission_times_out_in_queue():
+    async def scenario():
+        admission = LLMAdmissionController(max_concurrent=1, queue_timeout=0.05, max_queue=4)
+        async with admission.slot():
+            with pytest.raises(LLMOverloadedError) as error:
+                async with admission.slot():
+                    pass
+        assert error.value.retry_after == 0.05
+        # The slot was given back
+        async with admission.slot():
+            return admission._running
+
+    assert asyncio.run(scenario()) == 1
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import pytest
+from api.utils import blob_store as blob_store_module
+from api.utils import resumable_upload as resumable_upload_module
+from api.utils.blob_store import FileSystemBlobStore
+from api.utils.resumable_upload import ResumableUploads, UploadOffsetMismatch, UploadTooLarge
+
+@pytest.fixture
+def uploads(mongo_db, tmp_path, monkeypatch):
+    store = FileSystemBlobStore(str(tmp_path / "blobs"))
+    monkeypatch.setattr(blob_store_module, "blob_store", store)
+    monkeypatch.setattr(resumable_upload_module, "blob_store", store)
+    return ResumableUploads(max_bytes=1024, claim_seconds=0.3)
+
+async def chunks(*parts, pause: float = 0):
+    for i, part in enumerate(parts):
+        if i and pause:
+            await asyncio.sleep(pause)
+        yield part
+
+def stored_bytes(blob: dict) -> bytes:
+    store = resumable_upload_module.blob_store
+    with store.open(blob["sha256"]) as (data, _):
+        return bytes(data)
+
+def test_upload_in_appends_completes_into_the_blob_store(uploads):
+    session = uploads.create("ada", 10, "text/plain", {"name": "permit.txt"})
+
+    async def scenario():
+        first, blob = await uploads.append(session["_id"], "ada", 0, chunks(b"hello", b" "))
+        assert blob is None and first["offset"] == 6
+        return await uploads.append(session["_id"], "ada", 6, chunks(b"wo", b"rl"))
+
+    _, blob = asyncio.run(scenario())
+    assert blob["sha256"] == hashlib.sha256(b"hello worl").hexdigest()
+    assert stored_bytes(blob) == b"hello worl"
+    # The finished session is gone
+    assert uploads.get(session["_id"], "ada") is None
+
+def test_stale_offset_is_a_conflict_with_the_current_offset(uploads):
+    session = uploads.create("ada", 10, "text/plain")
+
+    async def scenario():
+        await uploads.append(session["_id"], "ada", 0, chunks(b"abcd"))
+        await uploads.append(session["_id"], "ada", 0, chunks(b"abcd"))
+
+    with pytest.raises(UploadOffsetMismatch) as error:
+        asyncio.run(scenario())
+    assert error.value.offset == 4
+
+def test_sessions_belong_to_their_owner(uploads):
+    session = uploads.create("ada", 10, "text/plain")
+    assert uploads.get(session["_id"], "eve") is None
+    with pytest.raises(KeyError):
+        asyncio.run(uploads.append(session["_id"], "eve", 0, chunks(b"abcd")))
+
+def test_size_limits(uploads):
+    with pytest.raises(UploadTooLarge):
+        uploads.create("ada", 4096, "text/plain")
+    session = uploads.create("ada", 4, "text/plain")
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(uploads.append(session["_id"], "ada", 0, chunks(b"abc", b"de")))
+    # What fit before the overflow was kept
+    assert uploads.get(session["_id"], "ada")["offset"] == 3
+
+def test_racing_appends_at_the_same_offset_write_once(uploads):
+    session = uploads.create("ada", 8, "text/plain")
+
+    async def scenario():
+        return await asyncio.gather(
+            uploads.append(session["_id"], "ada", 0, chunks(b"aaaa", b"aaaa", pause=0.02)),
+            uploads.append(session["_id"], "ada", 0, chunks(b"bbbb", b"bbbb", pause=0.02)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(scenario())
+    conflicts = [r for r in results if isinstance(r, UploadOffsetMismatch)]
+    completed = [r for r in results if isinstance(r, tuple)]
+    assert len(conflicts) == 1 and len(completed) == 1
+    assert stored_bytes(completed[0][1]) in (b"aaaaaaaa", b"bbbbbbbb")
+
+def test_stalled_append_loses_its_claim_without_writing(uploads):
+    session = uploads.create("ada", 8, "text/plain")
+
+    async def scenario():
+        # Stalls past the 0.3 s claim between its chunks
+        stalled = asyncio.ensure_future(uploads.append(session["_id"], "ada", 0, chunks(b"ss", b"ss", pause=0.5)))
+        await asyncio.sleep(0.4)
+        _, blob = await uploads.append(session["_id"], "ada", 0, chunks(b"xxxxxxxx"))
+        with pytest.raises(UploadOffsetMismatch):
+            await stalled
+        return blob
+
+    blob = asyncio.run(scenario())
+    assert stored_bytes(blob) == b"xxxxxxxx"
+    assert blob["sha256"] == hashlib.sha256(b"xxxxxxxx").hexdigest()
+
+def test_resume_after_losing_the_cached_hash(uploads):
+    session = uploads.create("ada", 6, "text/plain")
+
+    async def scenario():
+        await uploads.append(session["_id"], "ada", 0, chunks(b"abc"))
+        # As after a restart, or an append through another worker
+        uploads._hashers.clear()
+        return await uploads.append(session["_id"], "ada", 3, chunks(b"def"))
+
+    _, blob = asyncio.run(scenario())
+    assert blob["sha256"] == hashlib.sha256(b"abcdef").hexdigest()
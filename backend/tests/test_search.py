@@ -0,0 +1,66 @@
+from bson import ObjectId
+import pytest
+from api.utils.search import LocalSearchIndex, tokenize
+
+@pytest.fixture
+def index(mongo_db):
+    ada_party, ada_gala, eve_party = ObjectId(), ObjectId(), ObjectId()
+    mongo_db.events.insert_many([
+        {"_id": ada_party, "userId": "ada", "eventName": "Garden party", "location": "Riverside park",
+         "description": "Lanterns and a string quartet"},
+        {"_id": ada_gala, "userId": "ada", "eventName": "Charity gala", "location": "Grand hotel",
+         "description": "Black tie, garden terrace for drinks"},
+        {"_id": ObjectId(), "userId": "ada", "eventName": "Board meeting", "location": "Office",
+         "description": "Quarterly review"},
+        {"_id": eve_party, "userId": "eve", "eventName": "Garden party", "location": "Rooftop",
+         "description": "Eve's own party"},
+    ])
+    mongo_db.licenses.insert_many([
+        {"_id": ObjectId(), "eventId": str(ada_party), "name": "Temporary liquor license",
+         "issuingAuthority": "City licensing board", "status": "pending"},
+        {"_id": ObjectId(), "eventId": str(eve_party), "name": "Amplified sound permit",
+         "issuingAuthority": "Rooftop council", "status": "approved"},
+    ])
+    return LocalSearchIndex()
+
+def titles(result: dict):
+    return [hit["title"] for hit in result["results"]]
+
+def test_tokenize_folds_case_accents_and_stopwords():
+    assert tokenize("The Café at Zürich, 2025!") == ["cafe", "zurich", "2025"]
+
+def test_name_matches_rank_above_description_matches(index):
+    result = index.search("ada", "garden", ("events", "licenses"), 10, 0)
+    assert titles(result) == ["Garden party", "Charity gala"]
+    assert result["results"][0]["score"] > result["results"][1]["score"]
+
+def test_documents_matching_every_term_win(index):
+    assert titles(index.search("ada", "garden lanterns", ("events",), 10, 0)) == ["Garden party"]
+
+def test_prefix_and_misspelled_terms_match(index):
+    assert titles(index.search("ada", "gard", ("events",), 10, 0))[0] == "Garden party"
+    assert titles(index.search("ada", "licence", ("licenses",), 10, 0)) == ["Temporary liquor license"]
+
+def test_results_are_scoped_to_the_owner(index):
+    # Eve's event and the license filed under it never show up for Ada, and the other way round
+    assert "Rooftop" not in [hit["subtitle"] for hit in index.search("ada", "garden party", ("events",), 10, 0)["results"]]
+    assert index.search("ada", "amplified sound", ("events", "licenses"), 10, 0)["total"] == 0
+    assert titles(index.search("eve", "license", ("licenses",), 10, 0)) == []
+    assert index.search("mallory", "garden", ("events", "licenses"), 10, 0)["total"] == 0
+
+def test_kinds_filter_and_pagination(index):
+    assert [hit["type"] for hit in index.search("ada", "board", ("licenses",), 10, 0)["results"]] == ["license"]
+    first = index.search("ada", "board", ("events", "licenses"), 1, 0)
+    second = index.search("ada", "board", ("events", "licenses"), 1, 1)
+    assert first["total"] == second["total"] == 2
+    assert titles(first) + titles(second) == ["Board meeting", "Temporary liquor license"]
+
+def test_writes_keep_the_index_current(index, mongo_db):
+    index.search("ada", "warmup", ("events",), 10, 0)
+    event = {"_id": ObjectId(), "userId": "ada", "eventName": "Wine tasting", "location": "Cellar"}
+    index.upsert("events", event)
+    assert titles(index.search("ada", "wine", ("events",), 10, 0)) == ["Wine tasting"]
+    index.upsert("events", {**event, "eventName": "Beer tasting"})
+    assert index.search("ada", "wine", ("events",), 10, 0)["total"] == 0
+    index.remove("events", str(event["_id"]))
+    assert index.search("ada", "tasting", ("events",), 10, 0)["total"] == 0
@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+from api.utils.single_flight import SingleFlight, normalize_query, search_key
+
+def test_normalize_query():
+    assert normalize_query("  Vegan   Desserts?! ") == "vegan desserts"
+    assert search_key("food", "Vegan desserts", "gpt-4o") == search_key("food", "vegan  desserts.", "gpt-4o")
+
+def test_concurrent_calls_share_one_upstream_call():
+    async def scenario():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"items": [1, 2]}
+
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+        assert flight.in_flight == 0
+        # Finished calls are not cached, the next caller starts a new one
+        await flight.do("key", fetch)
+        return results, len(calls)
+
+    results, calls = asyncio.run(scenario())
+    assert results == [{"items": [1, 2]}] * 5
+    assert calls == 2
+
+def test_errors_reach_every_waiter():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        return await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(scenario()))
+
+def test_cancelled_waiter_leaves_the_call_to_the_others():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.ensure_future(flight.do("key", fetch))
+        follower = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "done"
+
+def test_call_is_cancelled_when_every_waiter_left():
+    async def scenario():
+        flight = SingleFlight("test")
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def fetch():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.ensure_future(flight.do("key", fetch))
+        await started.wait()
+        waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return flight.in_flight
+
+    assert asyncio.run(scenario()) == 0
+
+def test_streamed_items_reach_every_waiter():
+    async def scenario():
+        flight = SingleFlight("test")
+        received = {"leader": [], "follower": [], "late": []}
+
+        async def generate(publish):
+            for index in range(4):
+                await publish(index, f"item {index}")
+                await asyncio.sleep(0.02)
+            return "complete"
+
+        def listener(name):
+            async def on_item(index, item):
+                received[name].append(index)
+            return on_item
+
+        leader = asyncio.ensure_future(flight.stream("key", generate, listener("leader")))
+        await asyncio.sleep(0.005)
+        follower = asyncio.ensure_future(flight.stream("key", generate, listener("follower")))
+        await asyncio.sleep(0.03)
+        # The leader's client goes away mid-stream, the others keep getting items
+        leader.cancel()
+        late = asyncio.ensure_future(flight.stream("key", generate, listener("late")))
+        return await follower, await late, received, leader.cancelled()
+
+    follower, late, received, leader_cancelled = asyncio.run(scenario())
+    assert follower == late == "complete"
+    assert leader_cancelled
+    assert received["follower"] == received["late"] == [0, 1, 2, 3]
+    assert received["leader"] == [0, 1]
+
+def test_failing_listener_does_not_break_the_call():
+    async def scenario():
+        flight = SingleFlight("test")
+        received = []
+
+        async def generate(publish):
+            await publish(0)
+            await publish(1)
+            return "complete"
+
+        async def broken(index):
+            raise ConnectionError("stream closed")
+
+        async def healthy(index):
+            received.append(index)
+
+        results = await asyncio.gather(flight.stream("key", generate, broken), flight.stream("key", generate, healthy))
+        return results, received
+
+    results, received = asyncio.run(scenario())
+    assert results == ["complete", "complete"]
+    assert received == [0, 1]
@@ -0,0 +1,77 @@
+from bson import ObjectId
+import pytest
+from api.utils.vendor_directory import (
+    InvalidVendor, VendorConflict, VendorDirectory, merge, normalize_name, normalize_phone, reference,
+)
+
+@pytest.fixture
+def directory(mongo_db):
+    return VendorDirectory()
+
+CATERER = {"name": "Joe's Catering", "type": "Caterer", "contact": "Joe", "phone": "(919) 555-0100"}
+
+def test_normalization():
+    assert normalize_name("  Joe’s  CATERING, Inc. ") == normalize_name("joes catering inc")
+    assert normalize_name("Café Zürich") == "cafe zurich"
+    assert normalize_phone("+1 919 555 0100") == normalize_phone("(919) 555-0100") == "9195550100"
+    assert normalize_phone("n/a") is None
+
+def test_resolve_matches_by_name_or_phone(directory):
+    created = directory.resolve("ada", CATERER)
+    assert directory.resolve("ada", {"name": "joes catering"})["_id"] == created["_id"]
+    assert directory.resolve("ada", {"name": "Joe Catering LLC", "phone": "+1 919-555-0100"})["_id"] == created["_id"]
+    # Matching never rewrites the stored vendor
+    assert directory.resolve("ada", {**CATERER, "contact": "Someone else"})["contact"] == "Joe"
+    assert len(directory.list("ada")) == 1
+
+def test_exact_resolve_refuses_differing_details(directory):
+    directory.resolve("ada", CATERER)
+    # Same details in another spelling are a match
+    assert directory.resolve("ada", {**CATERER, "name": "JOES CATERING", "phone": "919.555.0100"}, exact=True)
+    with pytest.raises(VendorConflict, match="phone"):
+        directory.resolve("ada", {**CATERER, "phone": "919 555 0199"}, exact=True)
+    with pytest.raises(VendorConflict, match="contact"):
+        directory.resolve("ada", {**CATERER, "contact": "Maria"}, exact=True)
+    # Fields left empty are not a difference
+    assert directory.resolve("ada", {"name": "Joe's Catering"}, exact=True)["phone"] == CATERER["phone"]
+
+def test_name_of_one_vendor_with_the_phone_of_another(directory):
+    directory.resolve("ada", CATERER)
+    directory.resolve("ada", {"name": "Blooms", "type": "Florist", "phone": "919 555 0200"})
+    with pytest.raises(VendorConflict):
+        directory.resolve("ada", {"name": "Blooms", "phone": CATERER["phone"]})
+
+def test_a_vendor_needs_a_name(directory):
+    with pytest.raises(InvalidVendor):
+        directory.resolve("ada", {"name": " !! ", "phone": "919 555 0100"})
+
+def test_update_changes_the_shared_details(directory):
+    vendor = directory.resolve("ada", CATERER)
+    updated = directory.update("ada", vendor["_id"], {**CATERER, "phone": "919 555 0111"})
+    assert updated["phone"] == "919 555 0111"
+    # The new number matches, the old one is free again
+    assert directory.resolve("ada", {"name": "Other", "phone": "919-555-0111"})["_id"] == vendor["_id"]
+    assert directory.resolve("ada", {"name": "New caterer", "phone": CATERER["phone"]})["_id"] != vendor["_id"]
+
+def test_update_into_another_vendor_is_a_conflict(directory):
+    vendor = directory.resolve("ada", CATERER)
+    directory.resolve("ada", {"name": "Blooms", "type": "Florist"})
+    with pytest.raises(VendorConflict):
+        directory.update("ada", vendor["_id"], {**CATERER, "name": "blooms"})
+    # Only the owner can change a vendor
+    assert directory.update("eve", vendor["_id"], CATERER) is None
+
+def test_directories_are_per_user(directory):
+    ada = directory.resolve("ada", CATERER)
+    eve = directory.resolve("eve", {**CATERER, "contact": "Maria"}, exact=True)
+    assert ada["_id"] != eve["_id"]
+    assert [v["contact"] for v in directory.list("eve")] == ["Maria"]
+    assert [v["name"] for v in directory.list("ada", "joe")] == ["Joe's Catering"]
+
+def test_merge_keeps_positions_and_embedded_entries():
+    vendor_id = ObjectId()
+    embedded = {"name": "Legacy band", "status": "booked"}
+    entries = [reference({"_id": vendor_id}, {"status": "confirmed", "progress": 50}), embedded]
+    merged = merge(entries, {vendor_id: {"_id": vendor_id, **CATERER}})
+    assert merged[0] == {"id": str(vendor_id), **CATERER, "status": "confirmed", "progress": 50}
+    assert merged[1] is embedded
@@ -0,0 +1,45 @@
+import { Food } from "@/lib/langgraphtypes";
+import { FoodCard } from "@/components/ui/FoodCard";
+import { LicenseCard } from "@/components/ui/LicenseCard";
+import { Loader2 } from "lucide-react";
+
+type SearchResultsProps<T> = {
+  items?: T[];
+};
+
+const SearchResultsList = ({ count, children }: { count: number; children: React.ReactNode }) => (
+  <div className="w-full bg-secondary p-4 rounded-lg">
+    <h1 className="text-sm mb-3 flex items-center">
+      <Loader2 className="w-4 h-4 mr-2 animate-spin" /> Searching, {count} found so far:
+    </h1>
+    <div className="space-y-2">{children}</div>
+  </div>
+);
+
+export const FoodSearchResults = ({ items }: SearchResultsProps<Food>) => {
+  if (!items?.length) return null;
+  return (
+    <SearchResultsList count={items.length}>
+      {items.map((food, index) => (
+        <div key={`${food.id}-${index}`}>
+          {index > 0 && <div className="border-t border-border/30 my-2" />}
+          <FoodCard food={food as any} />
+        </div>
+      ))}
+    </SearchResultsList>
+  );
+};
+
+export const LicenseSearchResults = ({ items }: SearchResultsProps<any>) => {
+  if (!items?.length) return null;
+  return (
+    <SearchResultsList count={items.length}>
+      {items.map((license, index) => (
+        <div key={`${license.name}-${index}`}>
+          {index > 0 && <div className="border-t border-border/30 my-2" />}
+          <LicenseCard license={license} />
+        </div>
+      ))}
+    </SearchResultsList>
+  );
+};
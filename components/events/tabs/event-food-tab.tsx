@@ -32,6 +32,8 @@ interface Beverage {
 }
 
 interface Vendor {
+  // Directory vendor id, absent on vendors saved before the directory
+  id?: string
   name: string
   type: string
   contact: string
@@ -531,13 +533,19 @@ export function EventFoodTab({ event }: EventFoodTabProps) {
         })
         
         if (!response.ok) {
-          throw new Error("Failed to update vendor")
+          // 409 when the new name or phone belongs to another of the user's vendors
+          const error = await response.json().catch(() => null)
+          throw new Error(error?.detail || "Failed to update vendor")
         }
         
         const updatedVendor = await response.json()
         
-        // Update local state
-        const updatedVendors = [...foodData.vendors]
+        // Update local state. The details are the directory vendor's, other rows booking it change too
+        const { name, type, contact, phone } = updatedVendor
+        const shared = { name, type, contact, phone }
+        const updatedVendors = foodData.vendors.map(v =>
+          updatedVendor.id && v.id === updatedVendor.id ? { ...v, ...shared } : v
+        )
         updatedVendors[editingVendorIndex] = updatedVendor
         setFoodData({
           ...foodData,
@@ -564,7 +572,9 @@ export function EventFoodTab({ event }: EventFoodTabProps) {
         })
         
         if (!response.ok) {
-          throw new Error("Failed to add vendor")
+          // 409 when a vendor of that name or phone exists with other details
+          const error = await response.json().catch(() => null)
+          throw new Error(error?.detail || "Failed to add vendor")
         }
         
         const addedVendor = await response.json()
@@ -1,9 +1,10 @@
 "use client";
 
-import { useCoAgent, useCopilotAction } from "@copilotkit/react-core";
-import { createContext, useContext, ReactNode, useMemo } from "react";
+import { useCoAgent, useCoAgentStateRender, useCopilotAction } from "@copilotkit/react-core";
+import { createContext, useContext, ReactNode, useMemo, useRef } from "react";
 import { Food, FoodAgentState } from "@/lib/langgraphtypes";
 import { AddFoods } from "@/components/ai-chat/chat-sidebar/components/AddFoods";
+import { FoodSearchResults } from "@/components/ai-chat/chat-sidebar/components/SearchResults";
 import { useToast } from "@/components/ui/use-toast";
 
 type FoodsContextType = {
@@ -22,8 +23,20 @@ export const FoodsProvider = ({ children }: { children: ReactNode }) => {
     }
   });
   
+  // Search progress syncs only search_results, keep showing the last foods meanwhile
+  const lastFoods = useRef<Food[]>([]);
+  if (state.foods) lastFoods.current = state.foods;
+  const foods = lastFoods.current;
+
   const { toast } = useToast();
 
+  // Results of a running search, shown in the chat while they are generated
+  useCoAgentStateRender<FoodAgentState>({
+    name: "Food_Agent",
+    nodeName: "search_node",
+    render: ({ state }) => <FoodSearchResults items={state.search_results} />
+  });
+
   useCopilotAction({
     name: "add_foods",
     description: "Add food items to the event menu",
@@ -56,8 +69,8 @@ export const FoodsProvider = ({ children }: { children: ReactNode }) => {
   });
 
   const getFoodById = useMemo(() => (id: number) => {
-    return state.foods?.find(food => food.id === id);
-  }, [state.foods]);
+    return foods.find(food => food.id === id);
+  }, [foods]);
 
   const addFoods = async (foods_arr: Food[]) => {
     try {
@@ -70,7 +83,7 @@ export const FoodsProvider = ({ children }: { children: ReactNode }) => {
         if (!prev) return { foods: newFoods };
         return {
           ...prev,
-          foods: [...(prev.foods || []), ...newFoods]
+          foods: [...(prev.foods ?? lastFoods.current), ...newFoods]
         };
       });
       
@@ -91,7 +104,7 @@ export const FoodsProvider = ({ children }: { children: ReactNode }) => {
 
   return (
     <FoodsContext.Provider value={{
-      foods: state.foods || [],
+      foods,
       addFoods,
       getFoodById
     }}>
@@ -1,9 +1,10 @@
 "use client";
 
-import { useCoAgent, useCopilotAction } from "@copilotkit/react-core";
-import { createContext, useContext, ReactNode, useMemo } from "react";
+import { useCoAgent, useCoAgentStateRender, useCopilotAction } from "@copilotkit/react-core";
+import { createContext, useContext, ReactNode, useMemo, useRef } from "react";
 import { License, LicensesAgentState } from "@/lib/langgraphtypes";
 import { AddLicenses } from "@/components/ai-chat/chat-sidebar/components/AddLicenses";
+import { LicenseSearchResults } from "@/components/ai-chat/chat-sidebar/components/SearchResults";
 import { useToast } from "@/components/ui/use-toast";
 import { FileCheck, Building, Utensils, ShieldCheck, Music, Truck } from "lucide-react";
 
@@ -23,8 +24,20 @@ export const LicensesProvider = ({ children }: { children: ReactNode }) => {
     }
   });
   
+  // Search progress syncs only search_results, keep showing the last licenses meanwhile
+  const lastLicenses = useRef<License[]>([]);
+  if (state.licenses) lastLicenses.current = state.licenses;
+  const licenses = lastLicenses.current;
+
   const { toast } = useToast();
 
+  // Results of a running search, shown in the chat while they are generated
+  useCoAgentStateRender<LicensesAgentState>({
+    name: "License_Agent",
+    nodeName: "search_node",
+    render: ({ state }) => <LicenseSearchResults items={state.search_results} />
+  });
+
   useCopilotAction({ 
     name: "add_licenses",
     description: "Add licenses to the event",
@@ -40,8 +53,8 @@ export const LicensesProvider = ({ children }: { children: ReactNode }) => {
   });
 
   const getLicenseById = useMemo(() => (id: string) => {
-    return state.licenses?.find((license: License & { id?: string }) => license.id === id);
-  }, [state.licenses]);
+    return licenses.find((license: License & { id?: string }) => license.id === id);
+  }, [licenses]);
 
   const addLicenses = async (licenses_arr: License[]) => {
     try {
@@ -54,7 +67,7 @@ export const LicensesProvider = ({ children }: { children: ReactNode }) => {
         if (!prev) return { licenses: newLicenses, foods: [] };
         return {
           ...prev,
-          licenses: [...(prev.licenses || []), ...newLicenses]
+          licenses: [...(prev.licenses ?? lastLicenses.current), ...newLicenses]
         };
       });
       
@@ -76,7 +89,7 @@ export const LicensesProvider = ({ children }: { children: ReactNode }) => {
 
   return (
     <LicensesContext.Provider value={{ 
-      licenses: state.licenses || [],
+      licenses,
       addLicenses,
       getLicenseById
     }}>
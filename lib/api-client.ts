@@ -1,6 +1,7 @@
 import axios from "axios";
 import type { Event } from "./types";
 import { jwtDecode } from "jwt-decode";
+import { AUTH_TOKEN_CHANGED_EVENT } from "@/app/services/auth";
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000/api";
 
@@ -37,6 +38,7 @@ const refreshToken = async (): Promise<string | null> => {
 
     if (response.data.access_token) {
       localStorage.setItem("token", response.data.access_token);
+      window.dispatchEvent(new CustomEvent(AUTH_TOKEN_CHANGED_EVENT));
       return response.data.access_token;
     }
     return null;
@@ -86,6 +88,7 @@ apiClient.interceptors.response.use(
       } else {
         // If refresh failed, redirect to login or clear auth state
         localStorage.removeItem("token");
+        window.dispatchEvent(new CustomEvent(AUTH_TOKEN_CHANGED_EVENT));
         window.location.href = "/";
       }
     }
@@ -169,6 +172,7 @@ export const authApi = {
     
     if (response.data.access_token) {
       localStorage.setItem("token", response.data.access_token);
+      window.dispatchEvent(new CustomEvent(AUTH_TOKEN_CHANGED_EVENT));
     }
     
     return response.data;
@@ -179,6 +183,7 @@ export const authApi = {
     
     if (response.data.access_token) {
       localStorage.setItem("token", response.data.access_token);
+      window.dispatchEvent(new CustomEvent(AUTH_TOKEN_CHANGED_EVENT));
     }
     
     return response.data;
@@ -186,6 +191,7 @@ export const authApi = {
   
   logout: () => {
     localStorage.removeItem("token");
+    window.dispatchEvent(new CustomEvent(AUTH_TOKEN_CHANGED_EVENT));
   },
   
   refreshToken: async () => {
@@ -24,8 +24,12 @@ export type License = {
   export type FoodAgentState = {
     foods: Food[];
     analytics: FoodAnalytics;
+    // Foods of a running search as they are generated
+    search_results?: Food[];
   };
 
   export type LicensesAgentState = {
     licenses: License[];
+    // Licenses of a running search as they are generated
+    search_results?: any[];
   };